@@ -1,6 +1,19 @@
 from django.contrib import admin
+from django.contrib.auth.admin import UserAdmin
 
+from news_app.paginators import EstimatedCountPaginator
 from .models import CustomUser
 
 
-admin.site.register(CustomUser)
\ No newline at end of file
+# ユーザーの管理画面
+# ユーザー数が多くても使えるように、件数は推定値を使い、検索はインデックスのあるユーザー名の完全一致だけにする。
+# 絞り込み（is_staff・is_active など）は、インデックスがなくテーブル全体を読むことになるので使わない。
+@admin.register(CustomUser)
+class CustomUserAdmin(UserAdmin):
+    list_display = ("username", "email", "is_staff", "is_active", "date_joined")
+    list_filter = ()
+    search_fields = ("=username",)
+    search_help_text = "ユーザー名（完全一致）で検索できます。"
+    ordering = ("-pk",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
@@ -1,5 +1,119 @@
-from django.contrib import admin
+import re
+from django.contrib import admin, messages
+from django.db import IntegrityError, transaction
+from django.urls import reverse
+from django.utils.html import format_html
 
-from .models import Article
+from .models import Article, DailySourceStats
+from .paginators import EstimatedCountPaginator
+from .services.utils import url_hash
 
-admin.site.register(Article)
+
+# 一括操作で1回に扱う件数
+ACTION_BATCH_SIZE = 1000
+
+HASH_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+
+# 選択したお気に入りの主キーを、ACTION_BATCH_SIZE 件ずつ返す
+# 「すべて選択」の場合も、全件をメモリに読み込まない。
+def iter_pk_batches(queryset):
+    batch = []
+    for pk in queryset.order_by("pk").values_list("pk", flat=True).iterator(chunk_size=ACTION_BATCH_SIZE):
+        batch.append(pk)
+        if len(batch) == ACTION_BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# お気に入り（Article）の管理画面
+# 数百万件あっても使えるように、以下のようにしている。
+#     - 件数は推定値を使い、全体の件数（COUNT(*)）は表示しない
+#     - ユーザーは1回のクエリでまとめて読み込む（list_select_related）
+#     - 絞り込み・検索はインデックスのある列だけを使う
+#     - 削除などの一括操作は、ACTION_BATCH_SIZE 件ずつ行う
+@admin.register(Article)
+class ArticleAdmin(admin.ModelAdmin):
+    list_display = ("article_title", "user_link", "published_at", "created_at")
+    list_select_related = ("user",)
+    list_filter = ("published_at", "created_at")
+    list_per_page = 50
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    raw_id_fields = ("user",)
+    readonly_fields = ("url_hash", "created_at", "updated_at")
+    search_fields = ("=url_hash",)  # 実際の検索は get_search_results で行う
+    search_help_text = "記事URL・URLのハッシュ・ID・ユーザー名で検索できます（タイトルでは検索できません）。"
+    actions = ("delete_in_batches", "refresh_url_hash")
+
+    # ユーザー名（クリックすると、そのユーザーのお気に入りだけを表示する）
+    @admin.display(description="ユーザー", ordering="user__username")
+    def user_link(self, obj):
+        url = reverse("admin:news_app_article_changelist") + f"?user__id__exact={obj.user_id}"
+        return format_html('<a href="{}">{}</a>', url, obj.user.username)
+
+    # 検索語の形に応じて、インデックスのある列で検索する
+    #     URL → 正規化したURLのハッシュ、32文字の16進数 → ハッシュ、数字 → ID、それ以外 → ユーザー名
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        if term.startswith(("http://", "https://")):
+            return queryset.filter(url_hash=url_hash(term)), False
+        if HASH_PATTERN.match(term):
+            return queryset.filter(url_hash=term), False
+        if term.isdigit():
+            return queryset.filter(pk=int(term)), False
+        return queryset.filter(user__username=term), False
+
+    # 標準の削除（確認画面で全件を読み込む）は使わない
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        actions.pop("delete_selected", None)
+        return actions
+
+    @admin.action(description="選択したお気に入りを削除する（1000件ずつ）", permissions=["delete"])
+    def delete_in_batches(self, request, queryset):
+        deleted = 0
+        for batch in iter_pk_batches(queryset):
+            with transaction.atomic():
+                deleted += Article.objects.filter(pk__in=batch).delete()[0]
+        self.message_user(request, f"{deleted}件のお気に入りを削除しました。", messages.SUCCESS)
+
+    @admin.action(description="記事URLのハッシュを計算し直す", permissions=["change"])
+    def refresh_url_hash(self, request, queryset):
+        updated = 0
+        for batch in iter_pk_batches(queryset):
+            articles = list(Article.objects.filter(pk__in=batch).only("pk", "article_url", "url_hash"))
+            changed = []
+            for article in articles:
+                new_hash = url_hash(article.article_url)
+                if article.url_hash != new_hash:
+                    article.url_hash = new_hash
+                    changed.append(article)
+            try:
+                with transaction.atomic():
+                    Article.objects.bulk_update(changed, ["url_hash"])
+            except IntegrityError:
+                # 同じユーザーに、正規化すると同じURLになるお気に入りがある
+                self.message_user(request, f"ID {batch[0]}〜{batch[-1]} のハッシュは、重複があるため更新できませんでした。", messages.WARNING)
+                continue
+            updated += len(changed)
+        self.message_user(request, f"{updated}件のハッシュを更新しました。", messages.SUCCESS)
+
+
+# ソースごと・日ごとの集計（rollup_analytics コマンドで作る。管理画面では変更しない）
+@admin.register(DailySourceStats)
+class DailySourceStatsAdmin(admin.ModelAdmin):
+    list_display = ("date", "source", "kind", "count", "users")
+    list_filter = ("source", "kind", "date")
+    date_hierarchy = "date"
+    ordering = ("-date", "source", "kind")
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -16,10 +16,10 @@ class AddFavoriteForm(forms.ModelForm):
         self.user = kwargs.pop('user', None)
         super().__init__(*args, **kwargs)
 
-    # 記事URLの重複チェック
+    # 記事URLの重複チェック（正規化したURLのハッシュで比べる）
     def clean_article_url(self):
         url = self.cleaned_data.get('article_url')
-        qs = Article.objects.filter(user=self.user, article_url=url)
+        qs = Article.objects.filter(user=self.user).with_url(url)
 
         # 編集中（UpdateViewなど）の場合、自分自身は除外
         # これを書くことで、編集するときに重複チェックを避けられる。
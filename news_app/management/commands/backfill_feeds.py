@@ -0,0 +1,46 @@
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from news_app.services.backfill import BACKFILL_SOURCES, RateLimiter, backfill_source, get_batch_size, get_rate_per_host, get_workers
+
+
+# 日経メディカル・時事メディカルの過去の記事一覧を遡って取り込むコマンド
+# ソースごとに並列に取り込み、中断しても次回は続きから取り込む（登録済みの記事は登録し直さない）。
+# 例：python manage.py backfill_feeds --source zizi_med --max-pages 100 --rate 1
+class Command(BaseCommand):
+    help = "ニュースソースの過去の記事一覧を遡って取り込みます。"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--source", choices=BACKFILL_SOURCES, action="append", help="対象のソース（複数指定可。省略時はすべて）")
+        parser.add_argument("--max-pages", type=int, default=None, help="今回取得するページ数の上限（省略時は最後のページまで）")
+        parser.add_argument("--workers", type=int, default=get_workers(), help="ソースごとに並列に取得するページ数")
+        parser.add_argument("--rate", type=float, default=get_rate_per_host(), help="ホストごとの1秒あたりの取得回数の上限")
+        parser.add_argument("--batch-size", type=int, default=get_batch_size(), help="まとめて登録する記事数")
+        parser.add_argument("--restart", action="store_true", help="前回の続きではなく、1ページ目から取り込み直す")
+
+    def handle(self, *args, **options):
+        for option in ("max_pages", "workers", "batch_size"):
+            if options[option] is not None and options[option] < 1:
+                raise CommandError(f"--{option.replace('_', '-')} には1以上を指定してください。")
+        if options["rate"] <= 0:
+            raise CommandError("--rate には0より大きい値を指定してください。")
+
+        names = options["source"] or BACKFILL_SOURCES
+        limiter = RateLimiter(options["rate"])  # すべてのソースで共有する（ホストごとに数える）
+
+        def run(name):
+            try:
+                return backfill_source(
+                    name,
+                    max_pages=options["max_pages"],
+                    workers=options["workers"],
+                    limiter=limiter,
+                    batch_size=options["batch_size"],
+                    restart=options["restart"],
+                )
+            finally:
+                connections.close_all()  # このスレッドの接続を閉じる
+
+        with ThreadPoolExecutor(max_workers=len(names)) as executor:
+            for name, added in zip(names, executor.map(run, names)):
+                self.stdout.write(f"{name}: {added}件")
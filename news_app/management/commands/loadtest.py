@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+from news_app.simulator.loadgen import DEFAULT_PATHS, run_load_test
+
+
+# ログインしたユーザーとしてページに負荷をかけ、スループットとレイテンシを表示するコマンド
+# 例：python manage.py loadtest --base-url http://127.0.0.1:8000 --username load --password pass --concurrency 20 --duration 60
+class Command(BaseCommand):
+    help = "ニュース一覧・お気に入り一覧に負荷をかけ、スループットとレイテンシのパーセンタイルを表示します。"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+        parser.add_argument("--username", required=True, help="ログインに使うユーザー名（事前に作成しておく）")
+        parser.add_argument("--password", required=True)
+        parser.add_argument("--concurrency", type=int, default=10, help="同時に送るリクエストの数")
+        parser.add_argument("--duration", type=float, default=30, help="負荷をかける時間（秒）")
+        parser.add_argument("--timeout", type=float, default=30, help="1リクエストのタイムアウト（秒）")
+        parser.add_argument("--path", action="append", dest="paths", help="負荷をかけるパス（複数指定可）")
+
+    def handle(self, *args, **options):
+        try:
+            summary = run_load_test(
+                options["base_url"],
+                options["username"],
+                options["password"],
+                concurrency=options["concurrency"],
+                duration=options["duration"],
+                paths=options["paths"] or DEFAULT_PATHS,
+                timeout=options["timeout"],
+            )
+        except RuntimeError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(f"{'パス':<20}{'件数':>8}{'エラー':>8}{'req/s':>10}{'p50(ms)':>10}{'p90(ms)':>10}{'p99(ms)':>10}{'max(ms)':>10}")
+        for path, row in summary.items():
+            self.stdout.write(
+                f"{path:<20}{row['requests']:>8}{row['errors']:>8}{row['throughput']:>10.1f}"
+                + "".join(f"{(row[key] or 0) * 1000:>10.0f}" for key in ("p50", "p90", "p99", "max"))
+            )
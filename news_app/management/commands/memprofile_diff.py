@@ -0,0 +1,52 @@
+import os
+from django.core.management.base import BaseCommand, CommandError
+from news_app.services.memprofile import load_reports, summarize_reports
+
+
+# メモリ使用量のレポート（MEMORY_PROFILE_DIR）を2回分比べ、ビューごとの増減と、増えた箇所を表示するコマンド
+# 例：python manage.py memprofile_diff cache/memprofile-before cache/memprofile
+class Command(BaseCommand):
+    help = "メモリ使用量のレポートを比較し、ビューごとのピーク・増加量と、確保が増えた箇所を表示します。"
+
+    def add_arguments(self, parser):
+        parser.add_argument("before", help="比較元のレポート（ファイルまたはディレクトリ）")
+        parser.add_argument("after", help="比較先のレポート（ファイルまたはディレクトリ）")
+        parser.add_argument("--top", type=int, default=10, help="ビューごとに表示する箇所の数")
+
+    def handle(self, *args, **options):
+        for path in (options["before"], options["after"]):
+            if not os.path.exists(path):
+                raise CommandError(f"{path} が見つかりません。")
+
+        before = summarize_reports(load_reports(options["before"]))
+        after = summarize_reports(load_reports(options["after"]))
+        if not before and not after:
+            raise CommandError("レポートがありません。")
+
+        self.stdout.write(f"{'ビュー':<24}{'件数':>12}{'ピーク(KiB)':>24}{'増加量(KiB)':>24}")
+        for view in sorted(set(before) | set(after)):
+            old = before.get(view)
+            new = after.get(view)
+            self.stdout.write(
+                f"{view:<24}{self.pair(old, new, 'requests', 1, '.0f'):>12}"
+                f"{self.pair(old, new, 'peak_bytes', 1024, '.1f'):>24}"
+                f"{self.pair(old, new, 'size_delta', 1024, '.1f'):>24}"
+            )
+
+            # 増加量が大きく変わった箇所
+            old_sites = old["sites"] if old else {}
+            new_sites = new["sites"] if new else {}
+            changes = sorted(
+                ((site, new_sites.get(site, 0) - old_sites.get(site, 0)) for site in set(old_sites) | set(new_sites)),
+                key=lambda item: abs(item[1]),
+                reverse=True,
+            )
+            for site, change in changes[:options["top"]]:
+                if change:
+                    self.stdout.write(f"    {change / 1024:+10.1f} KiB  {site}")
+
+    # 「比較元 → 比較先」の形式で表示する（どちらかがない場合は -）
+    @staticmethod
+    def pair(old, new, key, unit, fmt):
+        values = [format(row[key] / unit, fmt) if row else "-" for row in (old, new)]
+        return " → ".join(values)
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+from news_app.services.deeplUsage import CALL_RETENTION_DAYS, usage_ledger
+
+
+# DeepL APIの呼び出しの記録（DeeplCall）のうち、保持する期間を過ぎたものを削除するコマンド（cron などで定期的に実行する）
+# 翻訳のたびに削除すると、API呼び出しごとに DELETE が実行されるため、まとめてここで行う。
+# 例：python manage.py prune_deepl_calls --days 40
+class Command(BaseCommand):
+    help = "保持する期間を過ぎた DeepL API の呼び出しの記録を削除します。"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=CALL_RETENTION_DAYS,
+                            help=f"この日数より古い記録を削除する（既定値：{CALL_RETENTION_DAYS}）")
+
+    def handle(self, *args, **options):
+        days = options["days"]
+        if days < 1:
+            raise CommandError("--days には1以上を指定してください。")
+
+        deleted = usage_ledger.prune_calls(days)
+        self.stdout.write(f"{days}日より前の呼び出しの記録を{deleted}件削除しました")
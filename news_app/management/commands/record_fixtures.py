@@ -0,0 +1,47 @@
+import os
+import requests
+from django.core.management.base import BaseCommand, CommandError
+from news_app.services import archive
+from news_app.simulator.recorder import FIXTURE_URLS, write_fixture
+
+
+# 本番のサイトのページを取得し、疑似サーバー・解析処理のテストで使うページ（news_app/simulator/fixtures）として記録するコマンド
+# サイトの構造が変わったときは、記録し直してテストを実行すると、解析処理が対応しているかを確認できる。
+# --from-archive を指定すると、ネットワークには接続せず、保存済みのページ（UPSTREAM_ARCHIVE_DIR）から記録する。
+# 例：python manage.py record_fixtures --fixture nikkei_med.html
+class Command(BaseCommand):
+    help = "本番のサイトのページを取得し、疑似サーバー・テスト用のページとして記録します。"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fixture", choices=sorted(FIXTURE_URLS), action="append", help="記録するページ（複数指定可。省略時はすべて）")
+        parser.add_argument("--from-archive", action="store_true", help="保存済みのページから記録する")
+
+    def handle(self, *args, **options):
+        if options["from_archive"] and not archive.get_archive_dir():
+            raise CommandError("UPSTREAM_ARCHIVE_DIR が設定されていません。")
+
+        for filename in options["fixture"] or sorted(FIXTURE_URLS):
+            url = FIXTURE_URLS[filename]
+            text = archive.replay_text(url) if options["from_archive"] else self.fetch(url)
+            if text is None:
+                self.stderr.write(f"{filename}: 取得できなかったため、記録しませんでした")
+                continue
+            path = write_fixture(filename, url, text)
+            self.stdout.write(f"{filename}: {path} に記録しました")
+
+    # ページを取得する（失敗した場合は None）
+    def fetch(self, url):
+        headers = {}
+        if url.startswith("https://newsapi.org/"):
+            if not os.getenv("X_Api_Key"):
+                self.stderr.write("環境変数 X_Api_Key が設定されていないため、NewsAPI は記録できません。")
+                return None
+            headers["X-Api-Key"] = os.getenv("X_Api_Key")
+
+        try:
+            response = requests.get(url, headers=headers, timeout=10)
+            response.raise_for_status()
+            return response.text
+        except requests.exceptions.RequestException as e:
+            self.stderr.write(f"取得に失敗しました: {e}")
+            return None
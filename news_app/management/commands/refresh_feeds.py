@@ -0,0 +1,21 @@
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand
+from news_app.services.feeds import FEEDS, refresh_feed
+
+
+# すべてのソースの記事を取得し、取り込むコマンド（cron などで定期的に実行する）
+# 前回から変わっていない記事は整形・翻訳をやり直さないので、新しい記事が少なければすぐに終わる。
+# FEED_SNAPSHOT_DIR が設定されている場合は、記事一覧をファイルに書き出し、各ワーカーはそれを読む。
+# 複数のノードで実行しても、外部サービスから取得するのはソースごとに1つのプロセスだけ（他は取得された記事一覧を使う）。
+# 例：python manage.py refresh_feeds --source nikkei_med
+class Command(BaseCommand):
+    help = "ニュースソースの記事を取得し、新しい記事だけを取り込みます。"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--source", choices=sorted(FEEDS), action="append", help="対象のソース（複数指定可。省略時はすべて）")
+
+    def handle(self, *args, **options):
+        names = options["source"] or list(FEEDS)
+        with ThreadPoolExecutor(max_workers=len(names)) as executor:
+            for name, articles in zip(names, executor.map(refresh_feed, names)):
+                self.stdout.write(f"{FEEDS[name]['label']}: {len(articles)}件")
@@ -0,0 +1,40 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from news_app.services import archive
+from news_app.services.sources import SOURCES, get_plan
+
+
+# 保存済みのページ（UPSTREAM_ARCHIVE_DIR）に対して解析処理を実行し、結果と処理時間を表示するコマンド
+# ネットワークに接続せずに、解析処理の変更前後を比較できる。
+# 例：python manage.py replay_archive --source nikkei_med
+class Command(BaseCommand):
+    help = "保存済みのページに対して記事の解析処理を実行し、件数と処理時間を表示します。"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--source", choices=sorted(SOURCES), action="append", help="対象のサイト（複数指定可。省略時はすべて）")
+        parser.add_argument("--all-fetches", action="store_true", help="同じ内容のページも、取得した回数だけ解析する")
+
+    def handle(self, *args, **options):
+        if not archive.get_archive_dir():
+            raise CommandError("UPSTREAM_ARCHIVE_DIR が設定されていません。")
+
+        for name in options["source"] or sorted(SOURCES):
+            plan = get_plan(name)
+            listing_urls = set(SOURCES[name]["listing_urls"]) | set(plan.listing_urls)
+
+            # 対象のページの取得記録（通常は同じ内容のページを1回だけ解析する）
+            entries = [entry for entry in archive.iter_log()
+                       if entry["url"] in listing_urls and entry["status"] == 200]
+            if not options["all_fetches"]:
+                entries = list({entry["hash"]: entry for entry in entries}.values())
+
+            articles = 0
+            elapsed = 0.0
+            for entry in entries:
+                html = archive.load_body(entry["hash"]).decode(entry.get("encoding") or "utf-8", errors="replace")
+                started = time.perf_counter()
+                articles += len(plan.extract(html))
+                elapsed += time.perf_counter() - started
+
+            per_page = elapsed / len(entries) * 1000 if entries else 0.0
+            self.stdout.write(f"{name}: {len(entries)}ページ, {articles}記事, 合計 {elapsed:.3f}秒（1ページあたり {per_page:.1f}ミリ秒）")
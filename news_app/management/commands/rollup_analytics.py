@@ -0,0 +1,31 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from news_app.services.analytics import rollup_day, prune_events
+
+
+# 記録したクリック・ページの表示を、ソースごと・日ごとに集計するコマンド（cron などで定期的に実行する）
+# 同じ日を何度集計しても結果は同じなので、今日の分は実行するたびに最新の件数に更新される。
+# 例：python manage.py rollup_analytics --days 2 --prune-days 30
+class Command(BaseCommand):
+    help = "記録したクリック・ページの表示を、ソースごと・日ごとに集計します。"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=2, help="集計する日数（今日から遡る。既定値：2）")
+        parser.add_argument("--prune-days", type=int, default=None, help="この日数より古い記録を削除する（省略時は削除しない）")
+
+    def handle(self, *args, **options):
+        days, prune_days = options["days"], options["prune_days"]
+        if days < 1:
+            raise CommandError("--days には1以上を指定してください。")
+        if prune_days is not None and prune_days < days:
+            raise CommandError("--prune-days には --days 以上を指定してください（集計前の記録を削除しないため）。")
+
+        today = timezone.localdate()
+        for offset in range(days):
+            day = today - timedelta(days=offset)
+            self.stdout.write(f"{day}: {rollup_day(day)}件の集計を保存しました")
+
+        if prune_days is not None:
+            deleted = prune_events(today - timedelta(days=prune_days))
+            self.stdout.write(f"{prune_days}日より前の記録を{deleted}件削除しました")
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from news_app.simulator.server import SimulatorConfig, make_server
+
+
+# 外部サービスの疑似サーバーを起動するコマンド
+# 例：python manage.py simulate_upstreams --port 8765 --latency 0.3 --jitter 0.2 --error-rate 0.05
+# アプリ側は環境変数 UPSTREAM_SIMULATOR_URL=http://127.0.0.1:8765 を設定して起動する（settings.UPSTREAM_SIMULATOR_URL）。
+class Command(BaseCommand):
+    help = "日経メディカル・時事メディカル・NewsAPI・DeepL の疑似サーバーを起動します。"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--latency", type=float, default=0.0, help="応答までの基本の遅延（秒）")
+        parser.add_argument("--jitter", type=float, default=0.0, help="遅延のばらつき（秒）")
+        parser.add_argument("--error-rate", type=float, default=0.0, help="503エラーを返す割合（0〜1）")
+        parser.add_argument("--slow-body-rate", type=float, default=0.0, help="本文をゆっくり送る割合（0〜1）")
+        parser.add_argument("--slow-body-seconds", type=float, default=2.0, help="本文の送信にかける時間（秒）")
+        parser.add_argument("--seed", type=int, default=None, help="乱数のシード（結果を再現したい場合）")
+
+    def handle(self, *args, **options):
+        config = SimulatorConfig(
+            latency=options["latency"],
+            jitter=options["jitter"],
+            error_rate=options["error_rate"],
+            slow_body_rate=options["slow_body_rate"],
+            slow_body_seconds=options["slow_body_seconds"],
+            seed=options["seed"],
+        )
+        server = make_server(options["host"], options["port"], config)
+        host, port = server.server_address[:2]
+
+        self.stdout.write(f"疑似サーバーを起動しました: http://{host}:{port}")
+        self.stdout.write(f"アプリ側で UPSTREAM_SIMULATOR_URL=http://{host}:{port} を設定してください。")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
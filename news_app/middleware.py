@@ -0,0 +1,112 @@
+# ビューの同時実行数を制限するミドルウェア（アドミッション制御）
+# 外部サービスが遅いと、ニュース一覧のリクエストがワーカーを占有し、
+# DBだけを使うページ（お気に入り一覧など）まで表示できなくなる。
+# そこで、ビューのグループ（admission_group）ごとに同時に処理するリクエスト数の上限を決め、
+# 上限を超えたリクエストは、保存済みの記事一覧で表示するか、すぐに 503 を返す。
+#
+# 上限は設定 ADMISSION_LIMITS で指定する（{グループ名: 上限}）。上限はプロセスごとに数える。
+# admission_group を持たないビューは制限しない。
+
+import logging
+import threading
+from django.conf import settings
+from django.http import HttpResponse
+from .services import memprofile
+
+
+logger = logging.getLogger(__name__)
+
+# グループごとのセマフォ {(グループ名, 上限): セマフォ}
+_slots = {}
+_slots_lock = threading.Lock()
+
+
+# グループのセマフォを返す（上限が設定されていない場合は None）
+def get_slot(group):
+    limit = getattr(settings, "ADMISSION_LIMITS", {}).get(group)
+    if not limit:
+        return None
+    with _slots_lock:
+        slot = _slots.get((group, limit))
+        if slot is None:
+            slot = _slots[(group, limit)] = threading.BoundedSemaphore(limit)
+        return slot
+
+
+# ストリーミングの内容を包み、レスポンスを閉じたときに枠を返す
+# 途中で接続が切れた場合も、Django がレスポンスを閉じるので枠は返される。
+class ReleaseOnClose:
+    def __init__(self, content, release):
+        self.content = content
+        self.release = release
+
+    def __iter__(self):
+        return iter(self.content)
+
+    def close(self):
+        if self.release is not None:
+            self.release()
+            self.release = None
+
+
+class AdmissionControlMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.admission_release = None
+        response = self.get_response(request)
+
+        release = request.admission_release
+        if release is None:
+            return response
+        # ストリーミングの場合は、送信し終わるまで枠を使う（レスポンスを閉じたときに返す）
+        if response.streaming:
+            response.streaming_content = ReleaseOnClose(response.streaming_content, release)
+        else:
+            release()
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, "view_class", None)
+        group = getattr(view_class, "admission_group", None)
+        slot = get_slot(group) if group else None
+        if slot is None:
+            return None
+
+        if slot.acquire(timeout=getattr(settings, "ADMISSION_WAIT_SECONDS", 0)):
+            request.admission_release = slot.release
+            return None
+
+        # 上限を超えた場合：保存済みの記事一覧があれば、外部サービスに接続せずに表示する
+        has_cached_content = getattr(view_class, "has_cached_content", None)
+        if has_cached_content and has_cached_content(request):
+            logger.warning(f"[警告] {group} の同時実行数が上限を超えたため、保存済みの記事一覧で表示します: {request.path}")
+            request.admission_degraded = True
+            return None
+
+        logger.warning(f"[警告] {group} の同時実行数が上限を超えたため、リクエストを断りました: {request.path}")
+        return self.reject()
+
+    # 混雑していることを返す（Retry-After 秒後に再試行させる）
+    def reject(self):
+        response = HttpResponse(
+            "アクセスが集中しています。しばらくしてから再度お試しください。",
+            status=503,
+            content_type="text/plain; charset=utf-8",
+        )
+        response["Retry-After"] = str(getattr(settings, "ADMISSION_RETRY_AFTER", 5))
+        response["Cache-Control"] = "no-store"
+        return response
+
+
+# リクエストごとのメモリ使用量を調べ、レポートを書き出すミドルウェア（services/memprofile.py を参照）
+# ユーザーで有効・無効を判定するので、AuthenticationMiddleware より後に置く。
+class MemoryProfileMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not memprofile.enabled_for(request):
+            return self.get_response(request)
+        return memprofile.profile_request(request, self.get_response)
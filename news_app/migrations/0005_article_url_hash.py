@@ -0,0 +1,18 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("news_app", "0004_alter_article_article_url_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="article",
+            name="url_hash",
+            field=models.CharField(
+                blank=True, editable=False, max_length=32, null=True, verbose_name="記事URLのハッシュ"
+            ),
+        ),
+    ]
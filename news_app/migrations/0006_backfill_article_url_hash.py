@@ -0,0 +1,87 @@
+import hashlib
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from django.db import migrations, transaction
+
+
+# 1回の更新で扱う件数
+BATCH_SIZE = 1000
+
+# 以下は、このマイグレーションを作成した時点の services/utils.py の normalize_url・url_hash の写し
+# （後で services/utils.py を変更しても、このマイグレーションの結果が変わらないようにする）
+TRACKING_PARAMS = {"fbclid", "gclid", "yclid", "mc_cid", "mc_eid", "igshid", "ref", "ref_src"}
+
+
+def normalize_url(url):
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = (parts.hostname or "").lower()
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    if port and (scheme, port) not in (("http", 80), ("https", 443)):
+        netloc += f":{port}"
+    if parts.username:
+        netloc = f"{parts.username}@{netloc}"
+
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    )
+    return urlunsplit((scheme, netloc, parts.path or "/", urlencode(query), ""))
+
+
+def url_hash(url):
+    if not url:
+        return None
+    return hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()[:32]
+
+
+# 既存のお気に入りの url_hash を、主キーの順に BATCH_SIZE 件ずつ計算して保存する
+# 件数が多くてもテーブル全体を長時間ロックしないように、バッチごとにコミットする（atomic = False）。
+# 正規化すると同じURLになるお気に入りが同じユーザーに複数ある場合は、最初に登録したものだけにハッシュを入れる
+# （残りは url_hash を空のままにし、ユニーク制約の対象外にする。0017 で最初に登録したものにまとめる）。
+def backfill_url_hash(apps, schema_editor):
+    Article = apps.get_model("news_app", "Article")
+    articles = Article.objects.using(schema_editor.connection.alias)
+
+    last_pk = 0
+    while True:
+        batch = list(
+            articles.filter(pk__gt=last_pk).order_by("pk").only("pk", "user_id", "article_url", "url_hash")[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        last_pk = batch[-1].pk
+
+        pending = [article for article in batch if article.url_hash is None and article.article_url]
+        hashes = {article.pk: url_hash(article.article_url) for article in pending}
+        # すでにハッシュが入っている（同じユーザー・同じURLの）お気に入り
+        taken = set(
+            articles.filter(user_id__in={article.user_id for article in pending}, url_hash__in=set(hashes.values()))
+            .values_list("user_id", "url_hash")
+        )
+
+        updated = []
+        for article in pending:
+            key = (article.user_id, hashes[article.pk])
+            if key in taken:
+                continue
+            taken.add(key)
+            article.url_hash = key[1]
+            updated.append(article)
+
+        with transaction.atomic(using=schema_editor.connection.alias):
+            articles.bulk_update(updated, ["url_hash"])
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("news_app", "0005_article_url_hash"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_url_hash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.7 on 2026-10-19 00:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("news_app", "0007_article_unique_user_url_hash"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="article",
+            index=models.Index(fields=["user", "-created_at"], name="article_user_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="article",
+            index=models.Index(fields=["published_at"], name="article_published_at_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="article",
+            index=models.Index(fields=["created_at"], name="article_created_at_idx"),
+        ),
+    ]
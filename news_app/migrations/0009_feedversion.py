@@ -0,0 +1,21 @@
+# Generated by Django 5.1.7 on 2026-10-19 00:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("news_app", "0008_article_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FeedVersion",
+            fields=[
+                ("name", models.CharField(max_length=50, primary_key=True, serialize=False, verbose_name="ソース名")),
+                ("version", models.CharField(max_length=32, verbose_name="バージョン")),
+                ("updated_at", models.DateTimeField(auto_now=True, verbose_name="更新日時")),
+            ],
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.7 on 2026-10-19 00:42
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0001_initial"),
+        ("news_app", "0009_feedversion"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FeedItem",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("source", models.CharField(max_length=50, verbose_name="ソース名")),
+                ("url", models.TextField(verbose_name="記事URL")),
+                ("url_hash", models.CharField(max_length=32, unique=True, verbose_name="記事URLのハッシュ")),
+                ("title", models.TextField(blank=True, default="", verbose_name="記事タイトル")),
+                ("created_at", models.DateTimeField(auto_now_add=True, verbose_name="取り込み日時")),
+            ],
+        ),
+        migrations.CreateModel(
+            name="ReadState",
+            fields=[
+                ("user", models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name="read_state", serialize=False, to=settings.AUTH_USER_MODEL, verbose_name="ユーザー")),
+                ("bitmap", models.BinaryField(default=b"", verbose_name="既読の記事")),
+                ("updated_at", models.DateTimeField(auto_now=True, verbose_name="更新日時")),
+            ],
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.1.7 on 2026-10-19 00:47
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("news_app", "0010_feeditem_readstate"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailySourceStats",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("date", models.DateField(verbose_name="日付")),
+                ("source", models.CharField(max_length=50, verbose_name="ソース名")),
+                ("kind", models.CharField(choices=[("click", "記事のクリック"), ("view", "ページの表示")], max_length=10, verbose_name="種類")),
+                ("count", models.PositiveIntegerField(default=0, verbose_name="件数")),
+                ("users", models.PositiveIntegerField(default=0, verbose_name="ユーザー数")),
+                ("updated_at", models.DateTimeField(auto_now=True, verbose_name="更新日時")),
+            ],
+            options={
+                "verbose_name_plural": "daily source stats",
+                "constraints": [models.UniqueConstraint(fields=("date", "source", "kind"), name="unique_daily_source_stats")],
+            },
+        ),
+        migrations.CreateModel(
+            name="AnalyticsEvent",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("kind", models.CharField(choices=[("click", "記事のクリック"), ("view", "ページの表示")], max_length=10, verbose_name="種類")),
+                ("source", models.CharField(max_length=50, verbose_name="ソース名")),
+                ("url", models.TextField(blank=True, default="", verbose_name="記事URL")),
+                ("url_hash", models.CharField(blank=True, max_length=32, null=True, verbose_name="記事URLのハッシュ")),
+                ("created_at", models.DateTimeField(verbose_name="日時")),
+                ("user", models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name="ユーザー")),
+            ],
+            options={
+                "indexes": [models.Index(fields=["created_at"], name="analytics_created_at_idx")],
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.1.7 on 2026-10-19 00:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("news_app", "0011_analytics"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Lease",
+            fields=[
+                ("name", models.CharField(max_length=100, primary_key=True, serialize=False, verbose_name="名前")),
+                ("owner", models.CharField(max_length=100, verbose_name="所有者")),
+                ("expires_at", models.DateTimeField(verbose_name="有効期限")),
+            ],
+        ),
+        migrations.AddField(
+            model_name="feedversion",
+            name="articles",
+            field=models.JSONField(blank=True, default=list, verbose_name="記事一覧"),
+        ),
+    ]
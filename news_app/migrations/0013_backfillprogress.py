@@ -0,0 +1,26 @@
+# Generated by Django 5.1.7 on 2026-10-19 00:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("news_app", "0012_feed_leader"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BackfillProgress",
+            fields=[
+                ("source", models.CharField(max_length=50, primary_key=True, serialize=False, verbose_name="ソース名")),
+                ("next_page", models.PositiveIntegerField(default=1, verbose_name="次に取得するページ")),
+                ("items", models.PositiveIntegerField(default=0, verbose_name="登録した記事数")),
+                ("finished", models.BooleanField(default=False, verbose_name="最後のページまで取り込んだか")),
+                ("updated_at", models.DateTimeField(auto_now=True, verbose_name="更新日時")),
+            ],
+            options={
+                "verbose_name_plural": "backfill progress",
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.7 on 2026-10-19 01:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("news_app", "0013_backfillprogress"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DeeplCall",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("characters", models.PositiveIntegerField(verbose_name="文字数")),
+                ("ok", models.BooleanField(verbose_name="成功したか")),
+                ("created_at", models.DateTimeField(auto_now_add=True, db_index=True, verbose_name="日時")),
+            ],
+        ),
+        migrations.CreateModel(
+            name="DeeplUsage",
+            fields=[
+                ("period", models.CharField(max_length=20, primary_key=True, serialize=False, verbose_name="期間")),
+                ("characters", models.BigIntegerField(default=0, verbose_name="文字数")),
+                ("updated_at", models.DateTimeField(auto_now=True, verbose_name="更新日時")),
+            ],
+            options={
+                "verbose_name_plural": "deepl usage",
+            },
+        ),
+    ]
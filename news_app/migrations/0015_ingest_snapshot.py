@@ -0,0 +1,21 @@
+# Generated by Django 5.1.7 on 2026-10-19 01:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("news_app", "0014_deepl_usage"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IngestSnapshot",
+            fields=[
+                ("name", models.CharField(max_length=50, primary_key=True, serialize=False, verbose_name="ソース名")),
+                ("items", models.JSONField(blank=True, default=dict, verbose_name="取り込み結果")),
+                ("updated_at", models.DateTimeField(auto_now=True, verbose_name="更新日時")),
+            ],
+        ),
+    ]
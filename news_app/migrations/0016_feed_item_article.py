@@ -0,0 +1,27 @@
+# Generated by Django 5.1.7 on 2026-10-19 01:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("news_app", "0015_ingest_snapshot"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="feeditem",
+            name="article",
+            field=models.JSONField(blank=True, default=list, verbose_name="記事"),
+        ),
+        migrations.AddField(
+            model_name="feeditem",
+            name="published_at",
+            field=models.DateTimeField(blank=True, null=True, verbose_name="公開日時"),
+        ),
+        migrations.AddIndex(
+            model_name="feeditem",
+            index=models.Index(fields=["source", "-published_at"], name="feeditem_source_published_idx"),
+        ),
+    ]
@@ -0,0 +1,86 @@
+import hashlib
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from django.db import migrations, transaction
+
+
+# 1回の更新で扱う件数
+BATCH_SIZE = 1000
+
+# 以下は、このマイグレーションを作成した時点の services/utils.py の normalize_url・url_hash の写し
+# （後で services/utils.py を変更しても、このマイグレーションの結果が変わらないようにする）
+TRACKING_PARAMS = {"fbclid", "gclid", "yclid", "mc_cid", "mc_eid", "igshid", "ref", "ref_src"}
+
+
+def normalize_url(url):
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = (parts.hostname or "").lower()
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    if port and (scheme, port) not in (("http", 80), ("https", 443)):
+        netloc += f":{port}"
+    if parts.username:
+        netloc = f"{parts.username}@{netloc}"
+
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    )
+    return urlunsplit((scheme, netloc, parts.path or "/", urlencode(query), ""))
+
+
+def url_hash(url):
+    if not url:
+        return None
+    return hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()[:32]
+
+
+# 0006 で url_hash を空のままにした、同じユーザー・同じ記事URL（正規化したURLが同じ）のお気に入りを、
+# 最初に登録したお気に入り（url_hash が入っているもの）にまとめて削除する。
+# 空のままだと、ユニーク制約・「保存済みか」の判定（saved_article_ids・with_url）の対象外になり、
+# 編集して保存したときには url_hash が計算されてユニーク制約の違反になるため。
+# まとめるときは、最初のお気に入りにないメモ・画像URL・公開日を引き継ぐ（メモが両方にある場合は改行でつなげる）。
+# 重複していないもの（0006 の後に追加されたものなど）は、url_hash を入れるだけにする。
+def merge_duplicate_favorites(apps, schema_editor):
+    Article = apps.get_model("news_app", "Article")
+    articles = Article.objects.using(schema_editor.connection.alias)
+
+    last_pk = 0
+    while True:
+        batch = list(
+            articles.filter(pk__gt=last_pk, url_hash__isnull=True).exclude(article_url__isnull=True)
+            .exclude(article_url="").order_by("pk")[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        last_pk = batch[-1].pk
+
+        with transaction.atomic(using=schema_editor.connection.alias):
+            for article in batch:
+                hash_value = url_hash(article.article_url)
+                kept = articles.filter(user_id=article.user_id, url_hash=hash_value).first()
+                if kept is None:
+                    article.url_hash = hash_value
+                    article.save(update_fields=["url_hash"])
+                    continue
+
+                if article.memo and article.memo != kept.memo:
+                    kept.memo = f"{kept.memo}\n{article.memo}" if kept.memo else article.memo
+                kept.article_img_url = kept.article_img_url or article.article_img_url
+                kept.published_at = kept.published_at or article.published_at
+                kept.save(update_fields=["memo", "article_img_url", "published_at"])
+                article.delete()
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("news_app", "0016_feed_item_article"),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_favorites, migrations.RunPython.noop),
+    ]
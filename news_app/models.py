@@ -1,26 +1,209 @@
 from django.db import models
 from accounts.models import CustomUser
+from .services.utils import url_hash
+
+
+class ArticleQuerySet(models.QuerySet):
+    # 同じ記事URL（正規化したURLが同じもの）のお気に入り
+    def with_url(self, url):
+        return self.filter(url_hash=url_hash(url))
+
 
 class Article(models.Model):
     user = models.ForeignKey(CustomUser, verbose_name="ユーザー", on_delete=models.PROTECT)
 
     article_title = models.CharField(verbose_name="記事タイトル", blank=True, null=True)
     article_url = models.URLField(verbose_name="記事URL", blank=True, null=True)
+    # 正規化した記事URLのハッシュ（保存時に article_url から計算する）
+    url_hash = models.CharField(verbose_name="記事URLのハッシュ", max_length=32, blank=True, null=True, editable=False)
     article_img_url = models.URLField(verbose_name="記事画像URL", blank=True, null=True)
     memo = models.CharField(verbose_name="メモ", blank=True, null=True)
 
     published_at = models.DateField(verbose_name="記事公開日時", blank=True, null=True)
     created_at = models.DateTimeField(verbose_name="作成日時" ,auto_now_add=True)
     updated_at = models.DateTimeField("更新日時", auto_now=True)
-    
+
+    objects = ArticleQuerySet.as_manager()
+
     class Meta:
         verbose_name_plural = "article"
 
-        # ユーザーと記事URLの組み合わせがユニークになるように制約を追加
+        # ユーザーと記事URL（のハッシュ）の組み合わせがユニークになるように制約を追加
         # これにより、同じユーザーが同じURLの記事を複数回登録できないようにする。
+        # クエリパラメータの順番などが違うだけのURLも、同じ記事として扱う（normalize_url を参照）。
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'url_hash'], name='unique_user_url_hash')
+        ]
+
+        # お気に入り一覧（ユーザーごとに新しい順）と、管理画面の日付での絞り込みに使うインデックス
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='article_user_created_idx'),
+            models.Index(fields=['published_at'], name='article_published_at_idx'),
+            models.Index(fields=['created_at'], name='article_created_at_idx'),
+        ]
+
+    def __str__(self):
+        return self.article_title or "(タイトルなし)"
+
+    def save(self, *args, **kwargs):
+        self.url_hash = url_hash(self.article_url)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "article_url" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "url_hash"}
+        super().save(*args, **kwargs)
+
+# ソースごとの記事一覧の最新バージョン（refresh_feeds で取り込んだときに更新する）
+# 各ワーカーはこれを見て、プロセス内にキャッシュした記事一覧を捨てる（services/invalidation.py を参照）。
+# 取り込んだ記事一覧も保存し、他のノードは取得せずにそれを使う（services/leader.py を参照）。
+class FeedVersion(models.Model):
+    name = models.CharField(verbose_name="ソース名", max_length=50, primary_key=True)
+    version = models.CharField(verbose_name="バージョン", max_length=32)
+    articles = models.JSONField(verbose_name="記事一覧", default=list, blank=True)
+    updated_at = models.DateTimeField("更新日時", auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.version}"
+
+
+# ソースごとの前回の取り込み結果（services/ingest.py を参照）
+# 記事URLごとに、内容を表す値・整形済みの記事・公開日時を持ち、次回の取り込みで変わっていない記事の整形を省く。
+# どのプロセス（refresh_feeds コマンドを含む）で取り込んでも、前回の結果を使えるようにデータベースに保存する。
+class IngestSnapshot(models.Model):
+    name = models.CharField(verbose_name="ソース名", max_length=50, primary_key=True)
+    items = models.JSONField(verbose_name="取り込み結果", default=dict, blank=True)
+    updated_at = models.DateTimeField("更新日時", auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: {len(self.items)}件"
+
+
+# 処理を1つのプロセスだけで行うための期限付きのロック（PostgreSQL 以外で使う。services/leader.py を参照）
+# 持っているプロセスが止まっても、期限が過ぎれば他のプロセスが取得できる。
+class Lease(models.Model):
+    name = models.CharField(verbose_name="名前", max_length=100, primary_key=True)
+    owner = models.CharField(verbose_name="所有者", max_length=100)
+    expires_at = models.DateTimeField(verbose_name="有効期限")
+
+    def __str__(self):
+        return f"{self.name}: {self.owner}"
+
+
+# DeepL APIに送った文字数（日別・月別。services/deeplUsage.py を参照）
+# すべてのプロセス（ワーカー・refresh_feeds など）で共有する予算なので、データベースに記録する。
+class DeeplUsage(models.Model):
+    period = models.CharField(verbose_name="期間", max_length=20, primary_key=True)  # 例："day:2025-03-30"、"month:2025-03"
+    characters = models.BigIntegerField(verbose_name="文字数", default=0)
+    updated_at = models.DateTimeField("更新日時", auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "deepl usage"
+
+    def __str__(self):
+        return f"{self.period}: {self.characters}"
+
+
+# DeepL APIの呼び出しの記録（ダッシュボードに直近の呼び出しを表示するため）
+class DeeplCall(models.Model):
+    id = models.BigAutoField(primary_key=True)
+    characters = models.PositiveIntegerField(verbose_name="文字数")
+    ok = models.BooleanField(verbose_name="成功したか")
+    created_at = models.DateTimeField(verbose_name="日時", auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.created_at:%Y-%m-%d %H:%M} {self.characters}"
+
+
+# 過去の記事一覧を遡って取り込む処理（backfill_feeds コマンド）の進み具合（ソースごと）
+# next_page より前のページの記事は登録済みなので、中断しても次回はその続きから取り込む。
+class BackfillProgress(models.Model):
+    source = models.CharField(verbose_name="ソース名", max_length=50, primary_key=True)
+    next_page = models.PositiveIntegerField(verbose_name="次に取得するページ", default=1)
+    items = models.PositiveIntegerField(verbose_name="登録した記事数", default=0)
+    finished = models.BooleanField(verbose_name="最後のページまで取り込んだか", default=False)
+    updated_at = models.DateTimeField("更新日時", auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "backfill progress"
+
+    def __str__(self):
+        return f"{self.source}: {self.next_page}ページ目から"
+
+
+# 取り込んだ記事（ソースの記事一覧に出てきた記事と、backfill_feeds で遡って取り込んだ過去の記事）
+# id は登録した順の連番で、既読の記事の集合（ReadState のビットマップ）の位置に使う。
+# 遡って取り込んだ記事は、それまでに登録した記事より id が大きくなるので、公開日時の順には published_at を使う。
+# 連番に抜けが少ないほどビットマップが小さくなるので、取り込み済みのURLは登録し直さない（services/readstate.py を参照）。
+class FeedItem(models.Model):
+    id = models.BigAutoField(primary_key=True)
+    source = models.CharField(verbose_name="ソース名", max_length=50)
+    url = models.TextField(verbose_name="記事URL")
+    # 正規化した記事URLのハッシュ（services/utils.py の url_hash）
+    url_hash = models.CharField(verbose_name="記事URLのハッシュ", max_length=32, unique=True)
+    title = models.TextField(verbose_name="記事タイトル", blank=True, default="")
+    # 整形済みの記事（記事一覧と同じ形式のリスト。過去の記事の一覧の表示に使う）
+    article = models.JSONField(verbose_name="記事", default=list, blank=True)
+    published_at = models.DateTimeField(verbose_name="公開日時", null=True, blank=True)
+    created_at = models.DateTimeField(verbose_name="取り込み日時", auto_now_add=True)
+
+    class Meta:
+        # 過去の記事の一覧（FeedArchiveView）はソースごとに公開日時の新しい順に読む
+        indexes = [
+            models.Index(fields=["source", "-published_at"], name="feeditem_source_published_idx"),
+        ]
+
+    def __str__(self):
+        return self.title or self.url
+
+
+# ユーザーごとの既読の記事（FeedItem の id の集合）
+# ユーザーと記事の組み合わせごとに1行ではなく、ユーザーごとに1行のビットマップ（services/bitmap.py）で持つ。
+class ReadState(models.Model):
+    user = models.OneToOneField(CustomUser, verbose_name="ユーザー", on_delete=models.CASCADE, primary_key=True, related_name="read_state")
+    bitmap = models.BinaryField(verbose_name="既読の記事", default=b"")
+    updated_at = models.DateTimeField("更新日時", auto_now=True)
+
+    def __str__(self):
+        return f"{self.user}: {len(self.bitmap)}バイト"
+
+
+# 記事のクリック・ページの表示の記録（services/analytics.py のバッファからまとめて書き込む）
+class AnalyticsEvent(models.Model):
+    KIND_CLICK = "click"
+    KIND_VIEW = "view"
+    KIND_CHOICES = [(KIND_CLICK, "記事のクリック"), (KIND_VIEW, "ページの表示")]
+
+    id = models.BigAutoField(primary_key=True)
+    kind = models.CharField(verbose_name="種類", max_length=10, choices=KIND_CHOICES)
+    source = models.CharField(verbose_name="ソース名", max_length=50)
+    user = models.ForeignKey(CustomUser, verbose_name="ユーザー", on_delete=models.SET_NULL, null=True, blank=True)
+    url = models.TextField(verbose_name="記事URL", blank=True, default="")
+    url_hash = models.CharField(verbose_name="記事URLのハッシュ", max_length=32, blank=True, null=True)
+    created_at = models.DateTimeField(verbose_name="日時")
+
+    class Meta:
+        # 日ごとの集計（rollup_analytics）は日時の範囲で読む
+        indexes = [
+            models.Index(fields=["created_at"], name="analytics_created_at_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.source} {self.created_at:%Y-%m-%d %H:%M}"
+
+
+# ソースごと・日ごとの集計（rollup_analytics コマンドで AnalyticsEvent から作る）
+class DailySourceStats(models.Model):
+    date = models.DateField(verbose_name="日付")
+    source = models.CharField(verbose_name="ソース名", max_length=50)
+    kind = models.CharField(verbose_name="種類", max_length=10, choices=AnalyticsEvent.KIND_CHOICES)
+    count = models.PositiveIntegerField(verbose_name="件数", default=0)
+    users = models.PositiveIntegerField(verbose_name="ユーザー数", default=0)
+    updated_at = models.DateTimeField("更新日時", auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "daily source stats"
         constraints = [
-            models.UniqueConstraint(fields=['user', 'article_url'], name='unique_user_article_url')
+            models.UniqueConstraint(fields=["date", "source", "kind"], name="unique_daily_source_stats"),
         ]
 
     def __str__(self):
-        return self.article_title or "(タイトルなし)"
\ No newline at end of file
+        return f"{self.date} {self.source} {self.kind}: {self.count}"
@@ -0,0 +1,44 @@
+# 件数の多いテーブル用のページネーター（管理画面で使う）
+# Paginator は件数を数えるために COUNT(*) を実行するが、数百万件のテーブルでは時間がかかる。
+# PostgreSQL の場合は、実行計画の推定件数（EXPLAIN）を先に調べ、
+# ADMIN_EXACT_COUNT_LIMIT 件を超える場合は推定件数を使う（それ以下なら正確に数える）。
+
+import json
+import logging
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+logger = logging.getLogger(__name__)
+
+
+# クエリの推定件数を返す（推定できない場合は None）
+def estimate_count(queryset):
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+
+    sql, params = queryset.order_by().query.sql_with_params()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+    except Exception as e:
+        logger.error(f"[エラー] 件数を推定できませんでした: {e}")
+        return None
+
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        limit = getattr(settings, "ADMIN_EXACT_COUNT_LIMIT", 100000)
+        estimated = estimate_count(self.object_list) if hasattr(self.object_list, "query") else None
+        if estimated is not None and estimated > limit:
+            return estimated
+        return super().count
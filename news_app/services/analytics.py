@@ -0,0 +1,169 @@
+# 記事のクリック・ページの表示を記録するモジュール
+# リクエストのたびにデータベースへ書き込むと、リクエストの処理時間と書き込みの負荷が増える。
+# そこで、記録はプロセス内のバッファに追加するだけにし、バックグラウンドのスレッドが
+# ANALYTICS_BATCH_SIZE 件たまるか ANALYTICS_FLUSH_SECONDS 秒ごとに bulk_create でまとめて書き込む。
+# ソースごと・日ごとの集計は rollup_analytics コマンドで作る（cron などで定期的に実行する）。
+#
+# 設定 ANALYTICS_ENABLED が False（既定値）の場合は、何も記録しない。
+# バッファが ANALYTICS_MAX_BUFFERED 件を超えた場合（データベースが遅いときなど）は、新しい記録を捨てる。
+
+import atexit
+import logging
+import threading
+from datetime import datetime, time, timedelta
+from django.conf import settings
+from django.core import signing
+from django.db import DatabaseError, connections
+from django.db.models import Count
+from django.urls import reverse
+from django.utils import timezone
+from ..models import AnalyticsEvent, DailySourceStats
+from .utils import url_hash
+
+
+logger = logging.getLogger(__name__)
+
+# 「記事を読む」のリンクに付ける署名の salt
+LINK_SALT = "news_app.analytics.click"
+
+# 古い記録を1回に削除する件数
+PRUNE_BATCH_SIZE = 1000
+
+
+def enabled():
+    return getattr(settings, "ANALYTICS_ENABLED", False)
+
+
+def get_batch_size():
+    return getattr(settings, "ANALYTICS_BATCH_SIZE", 500)
+
+
+def get_flush_seconds():
+    return getattr(settings, "ANALYTICS_FLUSH_SECONDS", 5)
+
+
+def get_max_buffered():
+    return getattr(settings, "ANALYTICS_MAX_BUFFERED", 10000)
+
+
+# 「記事を読む」のリンクのURLを返す（記録しない場合は記事のURLをそのまま返す）
+# 記事のURLとソース名は署名付きで渡すので、このリンクを使って他のサイトへ転送させることはできない。
+def tracked_url(url, source):
+    if not enabled() or not url:
+        return url
+    token = signing.dumps({"u": url, "s": source}, salt=LINK_SALT, compress=True)
+    return f"{reverse('news_app:track_click')}?t={token}"
+
+
+# 署名付きのリンクから (記事のURL, ソース名) を取り出す（不正な場合は None）
+def read_tracked_url(token):
+    try:
+        data = signing.loads(token, salt=LINK_SALT)
+        return data["u"], data["s"]
+    except (signing.BadSignature, KeyError, TypeError):
+        return None
+
+
+# 記録をためておき、バックグラウンドでまとめて書き込むバッファ
+class EventBuffer():
+    def __init__(self):
+        self.events = []
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.flusher = None
+        self.dropped = 0
+
+    # 記録を追加する（データベースには書き込まない）
+    def record(self, kind, source, user=None, url=""):
+        if not enabled():
+            return
+        event = AnalyticsEvent(
+            kind=kind,
+            source=source,
+            user_id=user.pk if user is not None and user.is_authenticated else None,
+            url=url or "",
+            created_at=timezone.now(),
+        )
+        with self.lock:
+            if len(self.events) >= get_max_buffered():
+                self.dropped += 1
+                return
+            self.events.append(event)
+            full = len(self.events) >= get_batch_size()
+        self.ensure_flusher()
+        if full:
+            self.wakeup.set()
+
+    # たまっている記録を書き込み、書き込んだ件数を返す
+    def flush(self):
+        with self.lock:
+            events, self.events = self.events, []
+            dropped, self.dropped = self.dropped, 0
+        if dropped:
+            logger.warning(f"[警告] 記録がたまりすぎたため、{dropped}件の記録を捨てました。")
+        if not events:
+            return 0
+
+        for event in events:
+            event.url_hash = url_hash(event.url)
+        try:
+            AnalyticsEvent.objects.bulk_create(events, batch_size=get_batch_size())
+        except DatabaseError as e:
+            logger.error(f"[エラー] {len(events)}件の記録を書き込めませんでした: {e}")
+            return 0
+        return len(events)
+
+    # バックグラウンドで書き込むスレッドを開始する（プロセスごとに1つ）
+    def ensure_flusher(self):
+        if self.flusher is not None:
+            return
+        with self.lock:
+            if self.flusher is None:
+                self.flusher = threading.Thread(target=self.run, name="analytics-flusher", daemon=True)
+                self.flusher.start()
+                atexit.register(self.flush)  # 終了するときに残りを書き込む
+
+    def run(self):
+        while True:
+            self.wakeup.wait(get_flush_seconds())
+            self.wakeup.clear()
+            try:
+                self.flush()
+            finally:
+                connections.close_all()  # このスレッドの接続は、次に書き込むときに開き直す
+
+
+event_buffer = EventBuffer()
+
+
+# 指定した日（日本時間）の記録を、ソースごと・種類ごとに集計して保存する（何度実行しても同じ結果になる）
+# 戻り値は保存した集計の件数
+def rollup_day(day):
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    end = start + timedelta(days=1)
+    rows = (AnalyticsEvent.objects
+            .filter(created_at__gte=start, created_at__lt=end)
+            .values("source", "kind")
+            .annotate(count=Count("id"), users=Count("user", distinct=True))
+            .order_by())
+
+    stats = [DailySourceStats(date=day, source=row["source"], kind=row["kind"], count=row["count"], users=row["users"])
+             for row in rows]
+    DailySourceStats.objects.bulk_create(
+        stats,
+        update_conflicts=True,
+        unique_fields=["date", "source", "kind"],
+        update_fields=["count", "users", "updated_at"],
+    )
+    return len(stats)
+
+
+# 指定した日（日本時間）より前の記録を、PRUNE_BATCH_SIZE 件ずつ削除する（集計済みの古い記録を消すのに使う）
+def prune_events(before_day):
+    cutoff = timezone.make_aware(datetime.combine(before_day, time.min))
+    deleted = 0
+    while True:
+        pks = list(AnalyticsEvent.objects.filter(created_at__lt=cutoff).values_list("pk", flat=True)[:PRUNE_BATCH_SIZE])
+        if not pks:
+            return deleted
+        deleted += AnalyticsEvent.objects.filter(pk__in=pks).delete()[0]
@@ -0,0 +1,145 @@
+# 外部サービスから取得したレスポンス本文を保存しておくモジュール
+# スクレイピングが壊れたときの調査や、解析処理の変更前後の比較（ベンチマーク）に使う。
+#
+# 設定 UPSTREAM_ARCHIVE_DIR にディレクトリを指定すると有効になる（未設定なら何もしない）。
+#     objects/ab/abcdef...  本文を zlib で圧縮したもの。ファイル名は本文の SHA-256（同じ内容は1回だけ保存）
+#     fetch_log.jsonl       取得の記録（1行1件：url, fetched_at, status, hash, encoding）
+#
+# 設定 UPSTREAM_REPLAY を True にすると、ネットワークには接続せず、
+# 保存済みの本文（そのURLで最後に取得したもの）を返す。
+# URLごとの最後の記録は、プロセスごとに取得の記録を1回だけ読んで索引にしておき、
+# その後に追記された分（他のプロセスが追記したものを含む）だけを読み足す。
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import zlib
+from django.conf import settings
+from django.utils import timezone
+
+
+logger = logging.getLogger(__name__)
+
+LOG_FILENAME = "fetch_log.jsonl"
+
+# 取得の記録への追記は、スレッド間で混ざらないようにロックを取る
+_log_lock = threading.Lock()
+
+# 再生用の索引 {保存先のディレクトリ: (読み込んだバイト数, {URL: そのURLで最後に正常に取得した記録})}
+_replay_index = {}
+_replay_index_lock = threading.Lock()
+
+
+# 保存先のディレクトリ（未設定なら None）
+def get_archive_dir():
+    return getattr(settings, "UPSTREAM_ARCHIVE_DIR", None)
+
+
+# 保存済みの本文を返すモードかどうか
+def replay_enabled():
+    return bool(get_archive_dir()) and getattr(settings, "UPSTREAM_REPLAY", False)
+
+
+def object_path(archive_dir, content_hash):
+    return os.path.join(archive_dir, "objects", content_hash[:2], content_hash)
+
+
+# 本文を保存し、そのハッシュを返す。同じ内容がすでにあれば書き込まない
+def store_body(archive_dir, body):
+    content_hash = hashlib.sha256(body).hexdigest()
+    path = object_path(archive_dir, content_hash)
+    if os.path.exists(path):
+        return content_hash
+
+    # 書き込み途中のファイルを読まれないよう、一時ファイルに書いてから置き換える
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(zlib.compress(body))
+        os.replace(tmp_path, path)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+    return content_hash
+
+
+# 保存済みの本文を読み出す
+def load_body(content_hash, archive_dir=None):
+    with open(object_path(archive_dir or get_archive_dir(), content_hash), "rb") as f:
+        return zlib.decompress(f.read())
+
+
+# 取得したレスポンスを保存する（無効な場合は何もしない）
+# 保存に失敗しても、取得処理自体は続けられるようにログだけ残す。
+def record(url, response):
+    archive_dir = get_archive_dir()
+    if not archive_dir:
+        return
+
+    try:
+        content_hash = store_body(archive_dir, response.content)
+        entry = {
+            "url": url,
+            "fetched_at": timezone.now().isoformat(),
+            "status": response.status_code,
+            "hash": content_hash,
+            "encoding": response.encoding,
+        }
+        with _log_lock:
+            with open(os.path.join(archive_dir, LOG_FILENAME), "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    except Exception as e:
+        logger.error(f"[エラー] 取得したページの保存に失敗しました: {e}")
+
+
+# 取得の記録を古い順に返す
+def iter_log(archive_dir=None):
+    path = os.path.join(archive_dir or get_archive_dir(), LOG_FILENAME)
+    if not os.path.exists(path):
+        return
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+# URLごとの最後に正常に取得した記録を返す（前回から追記された分だけを読む）
+# 記録が前回より短くなっている場合（作り直された場合）は、最初から読み直す。
+def latest_entries(archive_dir=None):
+    archive_dir = archive_dir or get_archive_dir()
+    path = os.path.join(archive_dir, LOG_FILENAME)
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        return {}
+
+    with _replay_index_lock:
+        offset, latest = _replay_index.get(archive_dir, (0, {}))
+        if size < offset:
+            offset, latest = 0, {}
+        if size > offset:
+            with open(path, "rb") as f:
+                f.seek(offset)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # 書き込み途中の行は、次回読む
+                    offset += len(line)
+                    if line.strip():
+                        entry = json.loads(line)
+                        if entry["status"] == 200:
+                            latest[entry["url"]] = entry
+            _replay_index[archive_dir] = (offset, latest)
+        return latest
+
+
+# 保存済みの本文を返す（そのURLで最後に正常に取得したもの。ない場合は None）
+def replay_text(url):
+    latest = latest_entries().get(url)
+    if latest is None:
+        logger.error(f"[エラー] 保存済みのページがありません: {url}")
+        return None
+    return load_body(latest["hash"]).decode(latest.get("encoding") or "utf-8", errors="replace")
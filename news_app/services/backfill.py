@@ -0,0 +1,169 @@
+# 日経メディカル・時事メディカルの過去の記事一覧を遡って取り込むモジュール（backfill_feeds コマンドから使う）
+# 記事一覧のページ（sources.SOURCES の archive_url）を新しい順に取得し、取り込み（ingest）と同じ整形をして、
+# 記事を BACKFILL_BATCH_SIZE 件ずつまとめて登録する（readstate.register_items。登録済みの記事は登録し直さない）。
+# 整形済みの記事（日付・画像を含む）と公開日時も FeedItem に保存し、過去の記事の一覧（FeedArchiveView）に表示する。
+# 各ソースの記事一覧（IngestSnapshot・FeedVersion）は、相手のサイトの現在の一覧を表すので、過去の記事は追加しない。
+#
+# 速く取り込むため
+#     ページの取得は BACKFILL_WORKERS 個のスレッドで並列に行う（解析・登録は取得したページの順に行う）。
+# 相手のサイトに負荷をかけすぎないため
+#     取得の間隔は、ホストごとに BACKFILL_RATE_PER_HOST 回/秒までにする（両方のサイトを同時に取り込んでも、それぞれに適用する）。
+# 中断しても続きから取り込めるように
+#     まとめて登録するたびに、次に取得するページを BackfillProgress に保存する。
+#     記事が1件もないページ（最後のページの次）まで取り込んだら、そのソースは完了とする。
+#
+# 記事は URL のハッシュで一意なので、途中から取り込み直したり、同時に実行したりしても重複しない。
+# 遡って登録した記事の id は、それまでに取り込んだ記事より大きくなる（id は既読の管理に使う。一覧は公開日時の順に並べる）。
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+from django.conf import settings
+from ..models import BackfillProgress
+from .ingest import DATE_INDEX, URL_INDEX, normalize
+from .leader import leader_lease
+from .readstate import register_items
+from .sources import SOURCES, fetch_html, get_plan
+from .utils import parse_datetime_jst, upstream_url, url_hash
+
+
+logger = logging.getLogger(__name__)
+
+# 過去の記事一覧を取り込めるソース（archive_url が設定されているもの）
+BACKFILL_SOURCES = [name for name, config in SOURCES.items() if "archive_url" in config]
+
+
+def get_workers():
+    return getattr(settings, "BACKFILL_WORKERS", 4)
+
+
+def get_rate_per_host():
+    return getattr(settings, "BACKFILL_RATE_PER_HOST", 2.0)
+
+
+def get_batch_size():
+    return getattr(settings, "BACKFILL_BATCH_SIZE", 1000)
+
+
+# ホストごとに、取得の間隔が 1 / per_second 秒以上あくように待つ（複数のスレッドから使える）
+class RateLimiter():
+    def __init__(self, per_second):
+        self.interval = 1 / per_second if per_second > 0 else 0
+        self.lock = threading.Lock()
+        self.next_at = {}  # {ホスト: 次に取得してよい時刻}
+
+    def wait(self, url):
+        if not self.interval:
+            return
+        host = urlsplit(url).netloc
+        with self.lock:
+            now = time.monotonic()
+            at = max(now, self.next_at.get(host, now))
+            self.next_at[host] = at + self.interval
+        if at > now:
+            time.sleep(at - now)
+
+
+# 過去の記事一覧のページのURL
+def archive_page_url(name, page):
+    return SOURCES[name]["archive_url"].format(page=page)
+
+
+# 過去の記事一覧の1ページを取得して記事リストを返す（取得に失敗した場合は None）
+# 取得の間隔は、負荷試験の疑似サーバーに置き換える前の（本来の）ホストごとに数える。
+def fetch_page(name, page, limiter):
+    url = archive_page_url(name, page)
+    limiter.wait(url)
+    html = fetch_html(upstream_url(url))
+    if html is None:
+        return None
+    return get_plan(name).extract(html)
+
+
+# 記事リストを整形し、登録する (記事URL, タイトル, 整形済みの記事, 公開日時) のリストを返す（seen に入っている記事は除く）
+def page_items(name, articles, seen):
+    index = URL_INDEX[name]
+    items = []
+    for article in normalize(name, articles):
+        url = article[index]
+        if not url:
+            continue
+        hash_value = url_hash(url)
+        if hash_value not in seen:
+            seen.add(hash_value)
+            items.append((url, article[0], article, parse_datetime_jst(article[DATE_INDEX])))
+    return items
+
+
+# ソースの過去の記事一覧を、前回の続きから取り込み、新しく登録した記事数を返す
+# max_pages: 今回取得するページ数の上限（省略した場合は最後のページまで）
+# restart: True の場合は、1ページ目から取り込み直す
+def backfill_source(name, max_pages=None, workers=None, limiter=None, batch_size=None, restart=False):
+    workers = workers or get_workers()
+    limiter = limiter or RateLimiter(get_rate_per_host())
+    batch_size = batch_size or get_batch_size()
+
+    with leader_lease(f"backfill:{name}") as leader:
+        if not leader:
+            logger.warning(f"[警告] {name}: 他のプロセスが取り込み中のため、スキップしました。")
+            return 0
+
+        progress, _ = BackfillProgress.objects.get_or_create(source=name)
+        if restart:
+            progress.next_page, progress.finished = 1, False
+        if progress.finished:
+            logger.info(f"[情報] {name}: 最後のページまで取り込み済みです。")
+            return 0
+
+        page = progress.next_page
+        last_page = None if max_pages is None else page + max_pages - 1
+        pending = []    # 登録していない記事 (記事URL, タイトル, 整形済みの記事, 公開日時)
+        seen = set()    # 今回取り込んだ記事URLのハッシュ（1ページ目と同じ内容を返すサイトで、止まらなくなるのを防ぐ）
+        added = 0
+        stopped = False
+
+        # ページ page より前の記事をすべて登録し、次は page から取り込むことを保存する
+        # リースを延ばせなかった場合（他のプロセスに引き継がれた場合）は、登録せずに中断する。
+        def checkpoint():
+            nonlocal added
+            if not leader.renew():
+                return False
+            if pending:
+                created = register_items(name, pending)
+                if created is None:
+                    return False  # 登録に失敗した場合は、進み具合を保存しない（次回はこのページから取り込み直す）
+                added += created
+                progress.items += created
+                pending.clear()
+            progress.next_page = page
+            progress.save()
+            return True
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while not progress.finished and not stopped:
+                end = page + workers if last_page is None else min(page + workers, last_page + 1)
+                pages = range(page, end)
+                if not pages:
+                    break
+
+                for number, articles in zip(pages, executor.map(lambda number: fetch_page(name, number, limiter), pages)):
+                    if articles is None:
+                        logger.error(f"[エラー] {name}: {number}ページ目を取得できなかったため、中断します。")
+                        stopped = True
+                        break
+                    items = page_items(name, articles, seen)
+                    if not items:
+                        progress.finished = True
+                        break
+                    pending.extend(items)
+                    page = number + 1
+                    if len(pending) >= batch_size and not checkpoint():
+                        stopped = True
+                        break
+
+        checkpoint()
+        state = "完了" if progress.finished else f"次回は{progress.next_page}ページ目から"
+        logger.info(f"[情報] {name}: 過去の記事を{added}件登録しました（{state}）")
+        return added
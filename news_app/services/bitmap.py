@@ -0,0 +1,206 @@
+# 整数の集合を小さく保存するためのビットマップ（Roaring Bitmap と同じ考え方の簡易版）
+# 既読の記事ID（FeedItem の連番）の集合を、ユーザーごとに1行で保存するのに使う（services/readstate.py を参照）。
+#
+# 値を上位16ビットでコンテナに分け、コンテナごとに小さくなる形式で持つ。
+#     配列:       下位16ビットの値を並べたもの（要素が ARRAY_MAX 個以下のとき。1要素2バイト）
+#     ビットセット: 65536ビット（8192バイト）のビット列（要素が多いとき）
+#     ラン:       連続した値を (開始, 長さ) で表したもの（保存するときだけ。ページ単位で既読にすると連続した値になりやすい）
+#
+# 保存形式（リトルエンディアン）
+#     ヘッダー: "RB" + 形式のバージョン(1バイト) + コンテナ数(4バイト)
+#     コンテナ: 上位16ビット(2バイト) + 種類(1バイト) + 要素数またはラン数(4バイト) + 本体
+
+import bisect
+import struct
+import sys
+from array import array
+
+
+MAGIC = b"RB"
+FORMAT_VERSION = 1
+
+ARRAY_MAX = 4096        # これを超える要素数の配列はビットセットにする
+BITSET_BYTES = 8192     # 65536ビット
+
+KIND_ARRAY = 1
+KIND_BITSET = 2
+KIND_RUN = 3
+
+HEADER = struct.Struct("<2sBI")
+CONTAINER_HEADER = struct.Struct("<HBI")
+
+BIG_ENDIAN = sys.byteorder == "big"
+
+
+# ビットセットの値を小さい順に返す
+def _bitset_values(bits):
+    for byte_index, byte in enumerate(bits):
+        if not byte:
+            continue
+        base = byte_index << 3
+        for bit in range(8):
+            if byte >> bit & 1:
+                yield base + bit
+
+
+# 小さい順の値を、連続した範囲 (開始, 長さ) にまとめる
+def _runs(values):
+    runs = []
+    for value in values:
+        if runs and runs[-1][0] + runs[-1][1] == value:
+            runs[-1][1] += 1
+        else:
+            runs.append([value, 1])
+    return runs
+
+
+# 配列のコンテナをリトルエンディアンのバイト列と相互に変換する
+def _array_to_bytes(values):
+    if BIG_ENDIAN:
+        values = array("H", values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _array_from_bytes(data):
+    values = array("H")
+    values.frombytes(data)
+    if BIG_ENDIAN:
+        values.byteswap()
+    return values
+
+
+def _to_bitset(values):
+    bits = bytearray(BITSET_BYTES)
+    for value in values:
+        bits[value >> 3] |= 1 << (value & 7)
+    return bits
+
+
+class Bitmap():
+    def __init__(self, values=()):
+        self.containers = {}  # {上位16ビット: array("H")（配列） または bytearray（ビットセット）}
+        self.update(values)
+
+    def __contains__(self, value):
+        if value < 0:
+            return False
+        container = self.containers.get(value >> 16)
+        if container is None:
+            return False
+        low = value & 0xFFFF
+        if isinstance(container, bytearray):
+            return bool(container[low >> 3] >> (low & 7) & 1)
+        index = bisect.bisect_left(container, low)
+        return index < len(container) and container[index] == low
+
+    def __len__(self):
+        return sum(self._cardinality(container) for container in self.containers.values())
+
+    def __iter__(self):
+        for key in sorted(self.containers):
+            base = key << 16
+            for low in self._values(self.containers[key]):
+                yield base + low
+
+    # 値を追加する（追加された場合は True）
+    def add(self, value):
+        if value < 0:
+            raise ValueError("負の値は追加できません。")
+        key, low = value >> 16, value & 0xFFFF
+        container = self.containers.get(key)
+        if container is None:
+            self.containers[key] = array("H", [low])
+            return True
+
+        if isinstance(container, bytearray):
+            mask = 1 << (low & 7)
+            if container[low >> 3] & mask:
+                return False
+            container[low >> 3] |= mask
+            return True
+
+        index = bisect.bisect_left(container, low)
+        if index < len(container) and container[index] == low:
+            return False
+        container.insert(index, low)
+        if len(container) > ARRAY_MAX:
+            self.containers[key] = _to_bitset(container)
+        return True
+
+    # 複数の値を追加し、新しく追加された数を返す
+    def update(self, values):
+        return sum(1 for value in values if self.add(value))
+
+    def to_bytes(self):
+        chunks = [HEADER.pack(MAGIC, FORMAT_VERSION, len(self.containers))]
+        for key in sorted(self.containers):
+            chunks.append(self._pack_container(key, self.containers[key]))
+        return b"".join(chunks)
+
+    @classmethod
+    def from_bytes(cls, data):
+        bitmap = cls()
+        if not data:
+            return bitmap
+        data = bytes(data)
+
+        if len(data) < HEADER.size:
+            raise ValueError("ビットマップのデータが途中で切れています。")
+        magic, version, count = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError("ビットマップの形式が不正です。")
+        offset = HEADER.size
+        for _ in range(count):
+            if offset + CONTAINER_HEADER.size > len(data):
+                raise ValueError("ビットマップのデータが途中で切れています。")
+            key, kind, size = CONTAINER_HEADER.unpack_from(data, offset)
+            offset += CONTAINER_HEADER.size
+            length = {KIND_ARRAY: size * 2, KIND_BITSET: BITSET_BYTES, KIND_RUN: size * 4}.get(kind)
+            if length is None:
+                raise ValueError("ビットマップの形式が不正です。")
+            if offset + length > len(data):
+                raise ValueError("ビットマップのデータが途中で切れています。")
+
+            if kind == KIND_ARRAY:
+                container = _array_from_bytes(data[offset:offset + length])
+            elif kind == KIND_BITSET:
+                container = bytearray(data[offset:offset + length])
+            else:
+                runs = struct.unpack_from(f"<{size * 2}H", data, offset)
+                # ランの長さは「長さ - 1」で保存している（65536個の連続に対応するため）
+                values = [low for start, run_length in zip(runs[::2], runs[1::2]) for low in range(start, start + run_length + 1)]
+                container = array("H", values) if len(values) <= ARRAY_MAX else _to_bitset(values)
+            offset += length
+            bitmap.containers[key] = container
+        return bitmap
+
+    def _values(self, container):
+        if isinstance(container, bytearray):
+            return _bitset_values(container)
+        return iter(container)
+
+    def _cardinality(self, container):
+        if isinstance(container, bytearray):
+            return int.from_bytes(container, "little").bit_count()
+        return len(container)
+
+    # コンテナを、配列・ビットセット・ランのうち一番小さくなる形式で書き出す
+    def _pack_container(self, key, container):
+        cardinality = self._cardinality(container)
+        runs = _runs(self._values(container))
+        sizes = {
+            KIND_ARRAY: cardinality * 2,
+            KIND_BITSET: BITSET_BYTES,
+            KIND_RUN: len(runs) * 4,
+        }
+        kind = min(sizes, key=sizes.get)
+
+        if kind == KIND_RUN:
+            flat = [part for start, length in runs for part in (start, length - 1)]
+            return CONTAINER_HEADER.pack(key, kind, len(runs)) + struct.pack(f"<{len(flat)}H", *flat)
+        if kind == KIND_BITSET:
+            bits = container if isinstance(container, bytearray) else _to_bitset(container)
+            return CONTAINER_HEADER.pack(key, kind, 0) + bytes(bits)
+        values = container if isinstance(container, array) else array("H", self._values(container))
+        return CONTAINER_HEADER.pack(key, kind, cardinality) + _array_to_bytes(values)
@@ -0,0 +1,38 @@
+# リクエスト全体の制限時間（デッドライン）を表すモジュール
+# ビューで作成し、取得 → 解析 → 翻訳 の各処理に渡す。
+# 各処理は残り時間だけを使い（通信のタイムアウトを残り時間に合わせる）、
+# 時間が足りない場合は翻訳などの省略できる処理を行わない。
+
+import time
+
+
+class Deadline():
+    def __init__(self, seconds=None):
+        # seconds が None の場合は制限なし
+        self.expires_at = None if seconds is None else time.monotonic() + seconds
+
+    # 残り時間（秒）。制限なしの場合は None
+    def remaining(self):
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    # 制限時間を過ぎているかどうか
+    def expired(self):
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    # 残り時間が seconds 以上あるかどうか（省略できる処理を行うかの判断に使う）
+    def has(self, seconds):
+        remaining = self.remaining()
+        return remaining is None or remaining >= seconds
+
+    # 通信のタイムアウト（各処理の既定値と残り時間の短い方）
+    def timeout(self, default):
+        remaining = self.remaining()
+        if remaining is None:
+            return default
+        return min(default, remaining)
+
+
+# 制限なしのデッドライン（デッドラインを渡されなかった場合に使う）
+NO_DEADLINE = Deadline()
@@ -0,0 +1,164 @@
+# DeepL APIの文字数（利用量）を記録し、予算を超えないように翻訳を制限するモジュール
+# 1日・1か月の予算と、DeepL側の残り文字数の両方を確認する。
+# 予算を超えそうな場合は翻訳を行わず、呼び出し側は原文またはキャッシュ済みの翻訳を使う。
+#
+# 予算はすべてのプロセス（各ワーカー・refresh_feeds など）で共有するので、使った文字数はデータベースに記録する（DeeplUsage）。
+# プロセス内のキャッシュに記録すると、プロセスごとに別の予算になり、再起動のたびに0に戻ってしまう。
+# データベースに記録できない場合は、予算を確認できないので翻訳しない。
+
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, transaction
+from django.db.models import F
+from django.utils import timezone
+from ..models import DeeplCall, DeeplUsage
+
+
+logger = logging.getLogger(__name__)
+
+
+# DeepLの利用量APIの結果をキャッシュしておく期間（秒）
+USAGE_API_CACHE_SECONDS = 10 * 60
+
+# 記録しておく直近の呼び出し数（ダッシュボード表示用）
+RECENT_CALLS_LIMIT = 100
+
+# 呼び出しの記録を保持する期間（日）。古い記録は prune_deepl_calls コマンドで削除する
+CALL_RETENTION_DAYS = 40
+
+# 古い呼び出しの記録を1回で削除する件数
+PRUNE_BATCH_SIZE = 1000
+
+
+class UsageLedger():
+    key_prefix = "deepl:usage"
+
+    # 1日の予算（文字数）。None の場合は制限しない
+    def get_daily_budget(self):
+        return getattr(settings, "DEEPL_DAILY_CHARACTER_BUDGET", None)
+
+    # 1か月の予算（文字数）。None の場合は制限しない
+    def get_monthly_budget(self):
+        return getattr(settings, "DEEPL_MONTHLY_CHARACTER_BUDGET", None)
+
+    # DeepL側の残り文字数が、この値を下回らないようにする
+    def get_reserve(self):
+        return getattr(settings, "DEEPL_RESERVED_CHARACTERS", 0)
+
+    def day_key(self):
+        return f"day:{timezone.localdate():%Y-%m-%d}"
+
+    def month_key(self):
+        return f"month:{timezone.localdate():%Y-%m}"
+
+    # 記録した文字数を返す（記録がない場合は0）
+    def _get_used(self, period):
+        return DeeplUsage.objects.filter(period=period).values_list("characters", flat=True).first() or 0
+
+    # 今日・今月に使った文字数
+    def get_daily_used(self):
+        return self._get_used(self.day_key())
+
+    def get_monthly_used(self):
+        return self._get_used(self.month_key())
+
+    # DeepLの利用量APIから {"count": 使用済み文字数, "limit": 上限} を取得する
+    # APIキーがない場合やスタブ設定の場合は、ローカルの記録から作った値を返す。
+    def get_account_usage(self, client=None):
+        cached = cache.get(f"{self.key_prefix}:account")
+        if cached is not None:
+            return cached
+
+        usage = None
+        if client is not None and not getattr(settings, "DEEPL_USAGE_STUB", False):
+            try:
+                character = client.get_usage().character
+                # 上限のない契約などでは値が None になる
+                if isinstance(character.count, int) and isinstance(character.limit, int):
+                    usage = {"count": character.count, "limit": character.limit, "stub": False}
+            except Exception as e:
+                logger.error(f"[エラー] DeepLの利用量の取得に失敗しました: {e}")
+                return None
+
+        if usage is None:
+            usage = {"count": self.get_monthly_used(), "limit": self.get_monthly_budget(), "stub": True}
+
+        cache.set(f"{self.key_prefix}:account", usage, USAGE_API_CACHE_SECONDS)
+        return usage
+
+    # DeepL側の残り文字数。分からない場合は None を返す
+    def get_remaining_allowance(self, client=None):
+        usage = self.get_account_usage(client)
+        if not usage or usage["limit"] is None:
+            return None
+        return usage["limit"] - usage["count"]
+
+    # これから送る文字数を予約する。予算を超える場合は予約せずに False を返す
+    # 今日・今月の行をロックしてから確認・加算するので、複数のプロセスから同時に呼ばれても予算を超えて送ることはない。
+    def reserve(self, characters, client=None):
+        remaining = self.get_remaining_allowance(client)
+        if remaining is not None and remaining - characters < self.get_reserve():
+            logger.warning(f"[警告] DeepLの残り文字数が少ないため、翻訳をスキップします（残り: {remaining}）")
+            return False
+
+        day_key, month_key = self.day_key(), self.month_key()
+        daily_budget = self.get_daily_budget()
+        monthly_budget = self.get_monthly_budget()
+        try:
+            with transaction.atomic():
+                DeeplUsage.objects.bulk_create([DeeplUsage(period=day_key), DeeplUsage(period=month_key)], ignore_conflicts=True)
+                used = dict(DeeplUsage.objects.select_for_update().filter(period__in=[day_key, month_key]).values_list("period", "characters"))
+                daily_used, monthly_used = used[day_key], used[month_key]
+                if (daily_budget is not None and daily_used + characters > daily_budget) or \
+                   (monthly_budget is not None and monthly_used + characters > monthly_budget):
+                    logger.warning(f"[警告] DeepLの予算を超えるため、翻訳をスキップします（本日: {daily_used}, 今月: {monthly_used}）")
+                    return False
+                DeeplUsage.objects.filter(period__in=[day_key, month_key]).update(characters=F("characters") + characters)
+        except DatabaseError as e:
+            logger.error(f"[エラー] DeepLの利用量を記録できないため、翻訳をスキップします: {e}")
+            return False
+        return True
+
+    # 予約した文字数を取り消す（翻訳に失敗した場合など）
+    def release(self, characters):
+        try:
+            DeeplUsage.objects.filter(period__in=[self.day_key(), self.month_key()]).update(characters=F("characters") - characters)
+        except DatabaseError as e:
+            logger.error(f"[エラー] DeepLの利用量を取り消せませんでした: {e}")
+
+    # 1回のAPI呼び出しを記録する（古い記録の削除は prune_calls で定期的に行う）
+    def record_call(self, characters, ok):
+        try:
+            DeeplCall.objects.create(characters=characters, ok=ok)
+        except DatabaseError as e:
+            logger.error(f"[エラー] DeepLの呼び出しを記録できませんでした: {e}")
+
+    # days 日より前の呼び出しの記録を、PRUNE_BATCH_SIZE 件ずつ削除し、削除した件数を返す（prune_deepl_calls コマンドで使う）
+    def prune_calls(self, days=CALL_RETENTION_DAYS):
+        cutoff = timezone.now() - timedelta(days=days)
+        deleted = 0
+        while True:
+            pks = list(DeeplCall.objects.filter(created_at__lt=cutoff).values_list("pk", flat=True)[:PRUNE_BATCH_SIZE])
+            if not pks:
+                return deleted
+            deleted += DeeplCall.objects.filter(pk__in=pks).delete()[0]
+
+    # ダッシュボード用の集計結果
+    def summary(self):
+        return {
+            "daily_used": self.get_daily_used(),
+            "daily_budget": self.get_daily_budget(),
+            "monthly_used": self.get_monthly_used(),
+            "monthly_budget": self.get_monthly_budget(),
+            "account": cache.get(f"{self.key_prefix}:account"),
+            "recent_calls": [
+                {"at": call.created_at.isoformat(), "characters": call.characters, "ok": call.ok}
+                for call in reversed(DeeplCall.objects.order_by("-created_at", "-id")[:RECENT_CALLS_LIMIT])
+            ],
+        }
+
+
+# アプリ全体で使う利用量の記録
+usage_ledger = UsageLedger()
@@ -0,0 +1,199 @@
+# ソースのページ（記事一覧とページネーション）を、取り込みのたびにファイルに書き出すモジュール
+# 記事一覧の部分はどのユーザーにも同じ内容なので、リクエストのたびにテンプレートを描画せず、
+# 書き出したHTML（とJSON）を使う。
+# ユーザーごとに違う表示（未読の印・保存済み・既読にするフォーム）は、書き出したHTMLに位置の印だけを入れておき、
+# 表示するときにその位置に差し込む（apply_user_state を参照）。
+#
+# 設定 FEED_EXPORT_DIR にディレクトリを指定すると有効になる（未設定なら使わない）。
+#     {ソース名}-{ページ番号}-{内容のハッシュ}.html / .json   ページごとのファイル
+#     {ソース名}.manifest.json                              ページ番号とファイル名の対応
+
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.template.loader import render_to_string
+from .utils import url_hash
+
+
+logger = logging.getLogger(__name__)
+
+PAGE_TEMPLATE = "partials/feed_page.html"
+
+# ユーザーごとの表示を差し込む位置の印（user_state_marker を参照）
+USER_STATE_BLOCK = re.compile(r"<!-- user-state:saved:(\w+) -->(.*?)<!-- user-state:/saved:\1 -->", re.S)
+USER_STATE_MARKER = re.compile(r"<!-- user-state:(unread|mark_read):(\w*) -->")
+
+CONTENT_TYPES = {
+    "html": "text/html; charset=utf-8",
+    "json": "application/json; charset=utf-8",
+}
+
+
+# 保存先のディレクトリ（未設定なら None）
+def get_export_dir():
+    return getattr(settings, "FEED_EXPORT_DIR", None)
+
+
+def manifest_path(name, export_dir=None):
+    return os.path.join(export_dir or get_export_dir(), f"{name}.manifest.json")
+
+
+# 一時ファイルに書いてから置き換える（書き込み途中のファイルを読ませない）
+def write_atomic(path, data):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.chmod(tmp_path, 0o644)  # Webサーバーからも読めるようにする
+        os.replace(tmp_path, path)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+
+
+# 内容のハッシュを含むファイル名で書き出し、そのファイル名を返す（同じ内容なら書き直さない）
+def write_page_file(export_dir, name, number, ext, data):
+    digest = hashlib.sha256(data).hexdigest()[:12]
+    filename = f"{name}-{number}-{digest}.{ext}"
+    path = os.path.join(export_dir, filename)
+    if not os.path.exists(path):
+        write_atomic(path, data)
+    return filename
+
+
+# 記事一覧をページごとに書き出す
+# template: 記事一覧の部分テンプレート
+# prepare: 書き出す前にページの記事リストを加工する関数（国際ニュースのタイトルの翻訳など）
+# max_pages: 書き出すページ数の上限（先頭のページから。省略した場合はすべてのページ）
+#     書き出していないページは、表示するときにそのページの分だけ描画・加工する（find_exported_page は None を返す）。
+def export_feed(name, articles, version, template, page_size=10, prepare=None, max_pages=None):
+    export_dir = get_export_dir()
+    os.makedirs(export_dir, exist_ok=True)
+
+    paginator = Paginator(articles, page_size)
+    page_range = paginator.page_range if max_pages is None else paginator.page_range[:max_pages]
+    pages = {}
+    for number in page_range:
+        page_obj = paginator.page(number)
+        page_obj.object_list = list(page_obj.object_list)
+        if prepare:
+            page_obj.object_list = prepare(page_obj.object_list)
+
+        html = render_to_string(PAGE_TEMPLATE, {"page_obj": page_obj, "feed_template": template, "user_state_markers": True})
+        data = json.dumps({
+            "source": name,
+            "page": number,
+            "num_pages": paginator.num_pages,
+            "articles": page_obj.object_list,
+        }, ensure_ascii=False)
+
+        pages[str(number)] = {
+            "html": write_page_file(export_dir, name, number, "html", html.encode("utf-8")),
+            "json": write_page_file(export_dir, name, number, "json", data.encode("utf-8")),
+        }
+
+    previous = read_manifest(name)
+    manifest = {"version": version, "num_pages": paginator.num_pages, "pages": pages}
+    write_atomic(manifest_path(name), json.dumps(manifest).encode("utf-8"))
+
+    remove_stale_files(export_dir, name, [manifest, previous])
+    return manifest
+
+
+# ユーザーごとの表示を差し込む位置の印（HTMLのコメント）
+# kind: "unread"（未読の印）、"saved" と "/saved"（お気に入りのボタンの前後）、"mark_read"（既読にするフォーム）
+def user_state_marker(kind, url=""):
+    return f"<!-- user-state:{kind}:{url_hash(url) if url else ''} -->"
+
+
+# 書き出したページのHTMLに、ユーザーの未読の印・保存済みの表示・既読にするフォームを差し込む
+# saved・unread: ビューが1ページ分まとめて調べた {記事URL: ID}（テンプレートに渡すものと同じ）
+# 書き出したHTMLは未読・保存済みの記事がない状態で描画しているので、該当する記事の部分だけを置き換える。
+def apply_user_state(html, saved, unread, request=None):
+    saved_ids = {url_hash(url): pk for url, pk in saved.items()}
+    unread_hashes = {url_hash(url) for url in unread}
+    badge = render_to_string("partials/unread_badge.html") if unread_hashes else ""
+
+    def replace_saved(match):
+        saved_id = saved_ids.get(match.group(1))
+        if saved_id is None:
+            return match.group(2)
+        return render_to_string("partials/saved_actions.html", {"saved_id": saved_id})
+
+    def replace_marker(match):
+        kind, key = match.groups()
+        if kind == "unread":
+            return badge if key in unread_hashes else ""
+        if not unread:
+            return ""
+        return render_to_string("partials/mark_read_form.html", {"unread": unread}, request=request)
+
+    return USER_STATE_MARKER.sub(replace_marker, USER_STATE_BLOCK.sub(replace_saved, html))
+
+
+# 書き出し済みのページの対応表を返す（ない場合は None）
+def read_manifest(name):
+    if not get_export_dir():
+        return None
+    try:
+        with open(manifest_path(name), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.error(f"[エラー] 書き出し済みのページの対応表を読めませんでした（{name}）: {e}")
+        return None
+
+
+# 今回と前回の対応表のどちらにもないファイルを削除する
+# 前回のファイルは、配信中のリクエストがあるかもしれないので次の書き出しまで残す。
+def remove_stale_files(export_dir, name, manifests):
+    keep = {filename for manifest in manifests if manifest
+            for files in manifest["pages"].values() for filename in files.values()}
+    prefix = f"{name}-"
+    for filename in os.listdir(export_dir):
+        if filename.startswith(prefix) and filename.endswith((".html", ".json")) and filename not in keep:
+            try:
+                os.remove(os.path.join(export_dir, filename))
+            except OSError:
+                pass
+
+
+# 書き出し済みのページを探す（ない場合は None）
+# ページ番号の扱いは Paginator.get_page と同じ（数字でない値は1ページ目、範囲外は最後のページ）。
+# 戻り値は {"version": 記事一覧のバージョン, "number": ページ番号, "html": ファイル名, "json": ファイル名}
+def find_exported_page(name, page_number):
+    manifest = read_manifest(name)
+    if manifest is None:
+        return None
+
+    try:
+        number = int(page_number)
+    except (TypeError, ValueError):
+        number = 1
+    if not 1 <= number <= manifest["num_pages"]:
+        number = manifest["num_pages"]
+
+    files = manifest["pages"].get(str(number))
+    if files is None:
+        return None
+    return {"version": manifest["version"], "number": number, **files}
+
+
+def exported_file_path(filename):
+    return os.path.join(get_export_dir(), filename)
+
+
+# 書き出し済みのページの記事リストを、JSONファイルから読み込む（読めない場合は None）
+def read_exported_articles(exported):
+    try:
+        with open(exported_file_path(exported["json"]), encoding="utf-8") as f:
+            return json.load(f)["articles"]
+    except (OSError, ValueError, KeyError) as e:
+        logger.error(f"[エラー] 書き出し済みのページを読めませんでした（{exported['json']}）: {e}")
+        return None
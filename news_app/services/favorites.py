@@ -0,0 +1,24 @@
+# 記事一覧のページに「保存済み」を表示するため、ユーザーのお気に入りを調べるモジュール
+# ページの記事URLのハッシュ（url_hash）でまとめて検索するので、1ページにつきクエリは1回だけ。
+# (user, url_hash) にはインデックス（一意制約）があるため、お気に入りが何千件あっても速い。
+
+from ..models import Article
+from .utils import url_hash
+
+
+# 記事URLのうち、ユーザーが保存済みのものを返す {記事URL: お気に入りのID}
+# 正規化すると同じになるURL（アクセス解析用のパラメータ違いなど）も保存済みとみなす。
+def saved_article_ids(user, urls):
+    if not user.is_authenticated or not urls:
+        return {}
+
+    urls_by_hash = {}
+    for url in urls:
+        urls_by_hash.setdefault(url_hash(url), []).append(url)
+
+    saved = {}
+    rows = Article.objects.filter(user=user, url_hash__in=list(urls_by_hash)).values_list("url_hash", "pk")
+    for hash_value, pk in rows:
+        for url in urls_by_hash[hash_value]:
+            saved[url] = pk
+    return saved
@@ -0,0 +1,271 @@
+# 複数のニュースソースをまとめて扱うモジュール
+# 各ソースの取得処理を並列に実行し、取得できたものから順に結果を返す。
+
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
+import logging
+from django.conf import settings
+from django.db import connections
+from .scrapingNikkeiMed import scraping_NikkeiMed
+from .scrapingZiziMed import scraping_ZiziMed
+from .newsAPI import fetch_news_from_api, translate_article_titles
+from .ingest import FeedList, content_version, ingest, save_snapshot
+from .deadline import NO_DEADLINE
+from .snapshots import get_snapshot_dir, open_snapshot, write_snapshot
+from .export import get_export_dir, export_feed
+from .invalidation import local_feed_cache, publish, load_shared
+from .leader import leader_lease
+
+
+logger = logging.getLogger(__name__)
+
+
+# 最初に表示する記事の数（この分だけ先にタイトルを翻訳する）
+FIRST_PAGE_SIZE = 10
+
+
+# 国際ニュースを取得し、公開日時(article[1])を日本時間に変換する（タイトルは翻訳しない）
+# 日時の変換は新しい記事の分だけ行う（ingest を参照）。
+# deadline: リクエスト全体の制限時間（各処理は残り時間だけを使う）
+def refresh_foreign_news(deadline=None):
+    return ingest("foreign_news", fetch_news_from_api(translate=False, deadline=deadline))
+
+
+# 日経メディカルの記事を取得する
+def refresh_nikkei_med(deadline=None):
+    return ingest("nikkei_med", scraping_NikkeiMed(deadline))
+
+
+# 時事メディカルの記事を取得する
+def refresh_zizi_med(deadline=None):
+    return ingest("zizi_med", scraping_ZiziMed(deadline))
+
+
+# 先頭の記事だけ表示用に加工した記事一覧（list と同じように使える）
+# 残りの記事は元の記事一覧（保存済みのファイルなど）をそのまま参照し、コピーしない。
+class PreparedFeed(Sequence):
+    def __init__(self, prepared, articles):
+        self.prepared = prepared    # 加工した先頭の記事のリスト
+        self.articles = articles    # 元の記事一覧
+
+    def __len__(self):
+        return len(self.articles)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if 0 <= index < len(self.prepared):
+            return self.prepared[index]
+        return self.articles[index]
+
+
+# 国際ニュースの記事一覧を返す。タイトルの翻訳は、最初に表示する記事の分だけ行う
+def fetch_foreign_news(deadline=None):
+    article_list = get_feed("foreign_news", deadline)
+    first_page = translate_article_titles(list(article_list[:FIRST_PAGE_SIZE]), deadline)
+    return PreparedFeed(first_page, article_list)
+
+
+def fetch_nikkei_med(deadline=None):
+    return get_feed("nikkei_med", deadline)
+
+
+def fetch_zizi_med(deadline=None):
+    return get_feed("zizi_med", deadline)
+
+
+# ソースごとの定義
+# label: 表示名
+# refresh: 記事一覧を取得して取り込む関数（保存済みのファイルに書き出す内容）
+# fetch: 表示用の記事一覧を返す関数
+# prepare_page: 表示するページの記事リストを加工する関数（ページを書き出すときに使う）
+# template: 記事一覧を描画する部分テンプレート
+# url_name: ソース単体のページのURL名
+FEEDS = {
+    "foreign_news": {
+        "label": "英語圏の医療ニュース",
+        "refresh": refresh_foreign_news,
+        "fetch": fetch_foreign_news,
+        "prepare_page": translate_article_titles,
+        "template": "partials/foreign_news_articles.html",
+        "url_name": "news_app:foreign_news",
+    },
+    "nikkei_med": {
+        "label": "日経メディカルのニュース",
+        "refresh": refresh_nikkei_med,
+        "fetch": fetch_nikkei_med,
+        "template": "partials/nikkei_med_articles.html",
+        "url_name": "news_app:nikkei_med",
+    },
+    "zizi_med": {
+        "label": "時事メディカルのニュース",
+        "refresh": refresh_zizi_med,
+        "fetch": fetch_zizi_med,
+        "template": "partials/zizi_med_articles.html",
+        "url_name": "news_app:zizi_med",
+    },
+}
+
+
+# 記事一覧を返す。保存済みのファイル（FEED_SNAPSHOT_DIR）があればそれを使い、
+# なければプロセス内のキャッシュ（FEED_LOCAL_CACHE_SECONDS）、refresh_feeds が共有した記事一覧（FeedVersion）の順に使い、
+# どれもなければ取得する（refresh_feeds を動かしていれば、リクエストの処理中に外部サービスへは接続しない）。
+def get_feed(name, deadline=None):
+    snapshot = open_snapshot(name)
+    if snapshot is not None:
+        return snapshot
+
+    articles = local_feed_cache.get(name)
+    if articles is None:
+        articles = load_shared_feed(name)
+    if articles is None:
+        articles = FEEDS[name]["refresh"](deadline)
+        local_feed_cache.set(name, articles)
+    return articles
+
+
+# refresh_feeds が共有した記事一覧（FeedVersion）を読み込み、プロセス内のキャッシュに入れて返す（ない場合は None）
+def load_shared_feed(name):
+    shared = load_shared(name)
+    if shared is None:
+        return None
+    version, articles = shared
+    articles = FeedList(articles, version)
+    local_feed_cache.set(name, articles)
+    return articles
+
+
+def get_refresh_min_seconds():
+    return getattr(settings, "FEED_REFRESH_MIN_SECONDS", 60)
+
+
+def get_leader_wait_seconds():
+    return getattr(settings, "FEED_LEADER_WAIT_SECONDS", 30)
+
+
+# 表示用の加工（タイトルの翻訳など）が必要なソースで、書き出すページ数の上限
+# 取り込むたびにすべてのページを翻訳しないように、先頭のページだけを書き出す（残りは表示するときに翻訳する）。
+def get_export_prepared_pages():
+    return getattr(settings, "FEED_EXPORT_PREPARED_PAGES", 3)
+
+
+# 記事一覧を取得して取り込み、有効な場合はファイルに書き出す（refresh_feeds コマンドで使う）
+#     FEED_SNAPSHOT_DIR: 記事一覧（各ワーカーが共有して読む）
+#     FEED_EXPORT_DIR: 描画済みのページ（ビューはテンプレートを描画せずにそれを使う）
+# 取得に失敗して記事が0件の場合は、前回のファイルをそのまま残す。
+# 取り込んだら、新しいバージョンを全ワーカーに知らせ、プロセス内のキャッシュを捨てさせる（invalidation を参照）。
+#
+# 複数のノードで実行しても、外部サービスから取得するのはソースごとに1つのプロセスだけ（leader を参照）。
+# 他のプロセスが取得中の場合は終わるまで待ち（FEED_LEADER_WAIT_SECONDS 秒まで）、
+# FEED_REFRESH_MIN_SECONDS 秒以内に取得された記事一覧があれば、取得せずにそれを使う。
+# 取得に時間がかかってリースが他のプロセスに引き継がれた場合は、取得した記事一覧を共有せずに、引き継いだプロセスの結果を使う。
+def refresh_feed(name):
+    with leader_lease(f"refresh_feed:{name}", wait=get_leader_wait_seconds()) as leader:
+        if not leader:
+            logger.info(f"[情報] 他のプロセスが {name} を取得しているため、保存済みの記事一覧を使います。")
+            return use_shared_feed(name, load_shared(name))
+
+        shared = load_shared(name, max_age=get_refresh_min_seconds())
+        if shared is not None:
+            logger.info(f"[情報] {name} は他のプロセスが取得したばかりのため、保存済みの記事一覧を使います。")
+            return use_shared_feed(name, shared)
+
+        articles = FEEDS[name]["refresh"]()
+        if not leader.renew():
+            return use_shared_feed(name, load_shared(name))
+
+        save_snapshot(name)  # 次回の取り込み（別のプロセスでも）で、変わっていない記事の整形を省く
+        if not articles:
+            if get_snapshot_dir() or get_export_dir():
+                logger.warning(f"[警告] {name} の記事を取得できなかったため、前回の記事一覧を残します。")
+            return articles
+
+        version = snapshot_version(articles)
+        store_feed(name, articles, version)
+        publish(name, version, articles)
+        return articles
+
+
+# 記事一覧をこのノードのファイルとプロセス内のキャッシュに書き出す
+def store_feed(name, articles, version):
+    if get_snapshot_dir():
+        write_snapshot(name, articles, version, published=getattr(articles, "published", None))
+    if get_export_dir():
+        prepare = FEEDS[name].get("prepare_page")
+        export_feed(name, articles, version, FEEDS[name]["template"], prepare=prepare,
+                    max_pages=get_export_prepared_pages() if prepare else None)
+    # このプロセスのキャッシュは、捨てずに新しい記事一覧に入れ替える
+    local_feed_cache.receive(name, version)
+    local_feed_cache.set(name, articles)
+
+
+# 他のプロセスが取得した記事一覧を、このノードでも使えるようにする（ファイルが同じバージョンなら書き直さない）
+def use_shared_feed(name, shared):
+    if shared is None:
+        logger.warning(f"[警告] {name} の保存済みの記事一覧がないため、前回の記事一覧を残します。")
+        return []
+
+    version, articles = shared
+    articles = FeedList(articles, version)
+    current = open_snapshot(name) if get_snapshot_dir() else None
+    if current is not None and snapshot_version(current) == version:
+        local_feed_cache.receive(name, version)
+        local_feed_cache.set(name, articles)
+    else:
+        store_feed(name, articles, version)
+    return articles
+
+
+# 記事一覧のバージョンを返す（内容が同じなら同じ値になる）
+# ETag など、記事一覧が変わったかどうかの判定に使う。
+# 取り込んだ記事一覧（FeedList）と保存済みのファイルの記事一覧は、取り込んだときのバージョンを持っているのでそれを使う。
+# それ以外（ページの記事リストなど）は、内容のハッシュを計算する。
+def snapshot_version(articles):
+    version = getattr(articles, "version", None)
+    if version:
+        return version
+    return content_version(articles)
+
+
+# 別のスレッドで取得処理を実行する
+# 取り込みで開いたデータベースの接続（スレッドごとに作られる）は、終わったら閉じる。
+def _fetch_in_thread(name, deadline, raw=False):
+    try:
+        return get_feed(name, deadline) if raw else FEEDS[name]["fetch"](deadline)
+    finally:
+        connections.close_all()
+
+
+# 指定したソースを並列に取得し、取得が終わった順に (ソース名, 記事リスト) を返すジェネレータ
+# 遅いソースがあっても、先に終わったソースの結果はすぐに受け取れる。
+# deadline を過ぎても取得が終わっていないソースは、待たずに空リストとして返す。
+# raw=True の場合は、表示用の加工（タイトルの翻訳など）をしていない記事一覧をそのまま返す。
+def iter_feeds_as_completed(names=None, deadline=None, raw=False):
+    names = list(names or FEEDS)
+    if not names:
+        return
+    deadline = deadline or NO_DEADLINE
+
+    # 制限時間を過ぎたら終わっていない取得を待たないので、with 文は使わずに後始末する
+    executor = ThreadPoolExecutor(max_workers=len(names))
+    futures = {executor.submit(_fetch_in_thread, name, deadline, raw): name for name in names}
+    pending = set(names)
+    try:
+        for future in as_completed(futures, timeout=deadline.remaining()):
+            name = futures[future]
+            pending.discard(name)
+            try:
+                articles = future.result()
+            except Exception as e:
+                logger.error(f"[エラー] {name} の取得中に問題が発生しました: {e}")
+                articles = []
+            yield name, articles
+    except FuturesTimeoutError:
+        for name in names:
+            if name in pending:
+                logger.error(f"[エラー] 制限時間を過ぎたため、{name} の記事を表示しません。")
+                yield name, []
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
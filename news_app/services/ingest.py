@@ -0,0 +1,202 @@
+# 取得した記事一覧を取り込むモジュール
+# ソースごとに、前回取り込んだ記事を URL ごとに記録しておき（IngestSnapshot）、
+# 新しい記事・内容が変わった記事だけを整形する。変わっていない記事は前回の整形結果をそのまま使う。
+# これにより、取り込みの処理量は記事一覧の件数ではなく、新しい記事の件数に比例する。
+# 前回の記録は、このプロセスで最後に取り込んだ結果（メモリ）を使い、ない場合はデータベース（IngestSnapshot）から読む。
+# データベースへの保存は、refresh_feeds の取り込み（ソースごとに1つのプロセスだけが行う）で save_snapshot を呼んだときだけ行う。
+# リクエストの処理中の取り込みでは書き込まないので、記事一覧が変わっていなければデータベースに接続しない。
+
+import hashlib
+import json
+import logging
+from datetime import datetime
+from django.db import DatabaseError
+from ..models import IngestSnapshot
+from .utils import convert_utc_to_jst, parse_datetime_jst
+from .memprofile import profiled
+from .readstate import register_items
+
+
+logger = logging.getLogger(__name__)
+
+# 記事リストの中で公開日時が入っている位置（どのソースでも2番目）
+DATE_INDEX = 1
+
+# 記事リストの中で URL が入っている位置（ソースごと）
+URL_INDEX = {
+    "foreign_news": 3,
+    "nikkei_med": 3,
+    "zizi_med": 2,
+}
+
+
+# 記事リストから記事URLを取り出す（形式が違う記事・URLのない記事は除く）
+def page_urls(source, articles):
+    index = URL_INDEX[source]
+    return [article[index] for article in articles
+            if isinstance(article, (list, tuple)) and len(article) > index and article[index]]
+
+
+# 国際ニュースの整形：公開日時(article[1])を日本時間に変換する
+def normalize_foreign_news(articles):
+    for article in articles:
+        article[1] = convert_utc_to_jst(article[1])
+    return articles
+
+
+# ソースごとの整形処理（新しい記事・変わった記事のリストを受け取り、整形したリストを返す）
+# 整形が必要ないソースは登録しない。
+NORMALIZERS = {
+    "foreign_news": normalize_foreign_news,
+}
+
+
+# ソースごとの整形を行う（過去の記事を遡って取り込む backfill でも同じ整形を使う）
+def normalize(name, articles):
+    normalizer = NORMALIZERS.get(name)
+    if normalizer and articles:
+        return normalizer(articles)
+    return articles
+
+
+# 取り込んだ記事一覧（list として使える）
+# 記事一覧のバージョンと記事ごとの公開日時を、取り込むときに1回だけ計算して持っておく。
+# 表示するときは、記事一覧全体のハッシュの計算や日時の変換をしない（feeds.snapshot_version・timeline を参照）。
+#     version: 記事一覧のバージョン（内容が同じなら同じ値）
+#     published: 記事ごとの公開日時（タイムゾーン付き。変換できなかった場合は None。ない場合は表示するときに変換する）
+class FeedList(list):
+    def __init__(self, articles, version, published=None):
+        super().__init__(articles)
+        self.version = version
+        self.published = published
+        self.timeline_items = None  # タイムライン用に並べ替えたリスト（timeline.get_sorted_items で作る）
+
+
+# このプロセスで最後に取り込んだ結果（ソースごと）
+#     items: {URL: (内容を表す値, 整形済みの記事, 公開日時)}
+#     urls: 取得した順の記事URL（記事一覧が変わったかどうかの判定に使う）
+#     articles: 返した記事一覧（FeedList）
+#     dirty: データベースに保存した内容と違うかどうか
+class RecentIngest():
+    def __init__(self, items, urls, articles, dirty):
+        self.items = items
+        self.urls = urls
+        self.articles = articles
+        self.dirty = dirty
+
+
+# {ソース名: RecentIngest}
+_recent = {}
+
+
+# このプロセスで最後に取り込んだ結果を捨てる（次回はデータベースから前回の結果を読む）
+def clear_recent():
+    _recent.clear()
+
+
+# 記事一覧の内容を表すバージョン（内容が同じなら同じ値になる）
+def content_version(articles):
+    raw = json.dumps(articles, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+# 前回の取り込み結果を読み込む {URL: (内容を表す値, 整形済みの記事, 公開日時)}
+# 読み込めなかった場合は、すべての記事を新しい記事として扱う（空の辞書を返す）。
+def load_previous(name):
+    try:
+        stored = IngestSnapshot.objects.filter(name=name).values_list("items", flat=True).first() or {}
+    except DatabaseError as e:
+        logger.error(f"[エラー] {name} の前回の取り込み結果を読み込めませんでした: {e}")
+        return {}
+
+    previous = {}
+    for url, item in stored.items():
+        try:
+            digest, article, published = item
+            previous[url] = (digest, article, datetime.fromisoformat(published) if published else None)
+        except (TypeError, ValueError):
+            continue  # 形式が違う記録は、新しい記事として扱う
+    return previous
+
+
+# このプロセスで最後に取り込んだ結果を、データベースに保存する（前回の保存から変わっていない場合は何もしない）
+# refresh_feeds の取り込み（feeds.refresh_feed）から呼ぶ。
+def save_snapshot(name):
+    recent = _recent.get(name)
+    if recent is None or not recent.dirty:
+        return
+    if save_items(name, recent.items):
+        recent.dirty = False
+
+
+# 取り込み結果を保存する（公開日時は ISO 8601 の文字列にする）。保存できた場合は True を返す
+def save_items(name, items):
+    stored = {
+        url: [digest, article, published.isoformat() if published else None]
+        for url, (digest, article, published) in items.items()
+    }
+    try:
+        IngestSnapshot.objects.update_or_create(name=name, defaults={"items": stored})
+    except DatabaseError as e:
+        logger.error(f"[エラー] {name} の取り込み結果を保存できませんでした: {e}")
+        return False
+    return True
+
+
+# 取得したままの記事の内容を表す値（内容が変わったかどうかの判定に使う）
+def fingerprint(article):
+    raw = json.dumps(article, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+# 取得した記事一覧を取り込み、整形済みの記事一覧（FeedList）を返す（順番は取得したときのまま）
+# 公開日時の変換も、新しい記事・変わった記事の分だけ行う。
+# 前回と同じ記事一覧（新しい記事・変わった記事がなく、順番も同じ）なら、前回返した記事一覧をそのまま返す。
+# 取得に失敗して記事が0件の場合は、前回の記録を残しておく（次回の取り込みで使う）。
+@profiled
+def ingest(name, raw_articles):
+    if not raw_articles:
+        return []
+
+    recent = _recent.get(name)
+    previous = recent.items if recent else load_previous(name)
+    url_index = URL_INDEX[name]
+    urls = [raw[url_index] for raw in raw_articles]
+
+    articles = [None] * len(raw_articles)
+    published = [None] * len(raw_articles)
+    items = {}      # 今回の取り込み結果 {URL: (内容を表す値, 整形済みの記事, 公開日時)}
+    pending = []    # 整形が必要な記事 (位置, URL, 内容を表す値, 記事)
+
+    for i, (url, raw) in enumerate(zip(urls, raw_articles)):
+        digest = fingerprint(raw)
+        carried = previous.get(url)
+        if carried and carried[0] == digest:
+            articles[i] = list(carried[1])
+            published[i] = carried[2]
+            items[url] = carried
+        else:
+            pending.append((i, url, digest, list(raw)))
+
+    if not pending and recent and urls == recent.urls:
+        return recent.articles
+
+    # 新しい記事・変わった記事だけを整形する
+    processed = normalize(name, [raw for _, _, _, raw in pending])
+
+    for (i, url, digest, _), article in zip(pending, processed):
+        articles[i] = article
+        published[i] = parse_datetime_jst(article[DATE_INDEX])
+        items[url] = (digest, list(article), published[i])
+
+    feed = FeedList(articles, content_version(articles), published)
+    changed = bool(pending) or items.keys() != previous.keys()
+    _recent[name] = RecentIngest(items, urls, feed, changed or bool(recent and recent.dirty))
+
+    # 新しい記事に連番の id を振る（既読・未読の管理に使う。services/readstate.py を参照）
+    # 整形済みの記事と公開日時も保存しておく（過去の記事の一覧に表示する）
+    new_items = [(url, articles[i][0], articles[i], published[i]) for i, url, _, _ in pending if url not in previous]
+    if new_items and register_items(name, new_items) is None:
+        _recent.pop(name, None)  # 登録に失敗した記事は、次回の取り込みでもう一度登録する
+    logger.info(f"[情報] {name}: {len(raw_articles)}件を取り込みました（新規・変更: {len(pending)}件）")
+    return feed
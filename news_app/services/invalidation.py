@@ -0,0 +1,196 @@
+# 記事一覧のプロセス内キャッシュと、そのキャッシュを全ワーカーで捨てるための通知（無効化の通知）を扱うモジュール
+# 記事一覧は各プロセスのメモリに長めの期間（FEED_LOCAL_CACHE_SECONDS）キャッシュする。
+# refresh_feeds で取り込んだときは、新しいバージョンを全ワーカーに知らせ、各ワーカーはすぐにキャッシュを捨てる。
+#
+# 通知の方法
+#     PostgreSQL: LISTEN/NOTIFY（各プロセスの受信用スレッドが受け取る。数秒以内に反映される）
+#     それ以外（SQLite など）・受信用スレッドが止まっている場合:
+#         FeedVersion テーブルを FEED_INVALIDATION_POLL_SECONDS ごとに確認する
+#
+# FEED_LOCAL_CACHE_SECONDS が 0（既定値）の場合は、キャッシュも通知の受信も行わない。
+
+import json
+import logging
+import threading
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+from ..models import FeedVersion
+
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "feed_invalidation"
+
+
+def get_cache_seconds():
+    return getattr(settings, "FEED_LOCAL_CACHE_SECONDS", 0)
+
+
+def get_poll_seconds():
+    return getattr(settings, "FEED_INVALIDATION_POLL_SECONDS", 5)
+
+
+# 新しいバージョンの記事一覧を取り込んだことを、全ワーカーに知らせる
+# articles を渡した場合は記事一覧も保存し、他のノードは取得せずにそれを使う（load_shared を参照）。
+# バージョンが前回と同じなら通知しない。
+def publish(name, version, articles=None):
+    values = {"version": version}
+    if articles is not None:
+        values["articles"] = articles
+    try:
+        with transaction.atomic():
+            feed, created = FeedVersion.objects.select_for_update().get_or_create(name=name, defaults=values)
+            changed = created or feed.version != version
+            if not created and (changed or articles is not None):
+                for field, value in values.items():
+                    setattr(feed, field, value)
+                feed.save()  # 同じバージョンでも、取得した日時（updated_at）は更新する
+        if not changed:
+            return
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_notify(%s, %s)", [CHANNEL, json.dumps({"name": name, "version": version})])
+    except DatabaseError as e:
+        logger.error(f"[エラー] 記事一覧の更新を通知できませんでした（{name}）: {e}")
+
+
+# 他のプロセスが保存した記事一覧を返す (バージョン, 記事一覧)。ない場合は None
+# max_age を指定した場合は、その秒数より前に取得したものは返さない。
+def load_shared(name, max_age=None):
+    try:
+        row = FeedVersion.objects.filter(name=name).values_list("version", "articles", "updated_at").first()
+    except DatabaseError as e:
+        logger.error(f"[エラー] 保存済みの記事一覧を読み込めませんでした（{name}）: {e}")
+        return None
+    if row is None or not row[1]:
+        return None
+    if max_age is not None and row[2] < timezone.now() - timedelta(seconds=max_age):
+        return None
+    return row[0], row[1]
+
+
+# プロセス内の記事一覧のキャッシュ
+class LocalFeedCache():
+    def __init__(self):
+        self.entries = {}   # {ソース名: (記事一覧, 有効期限)}
+        self.seen = {}      # 通知で受け取った最新のバージョン {ソース名: バージョン}
+        self.lock = threading.Lock()
+        self.last_poll = None
+        self.listener = None
+
+    def enabled(self):
+        return bool(get_cache_seconds())
+
+    def get(self, name):
+        if not self.enabled():
+            return None
+        self.ensure_listener()
+        # 最初の1回は、キャッシュする前に現在のバージョンを記録しておく
+        if self.last_poll is None or not (self.listener and self.listener.connected):
+            self.poll_if_due()
+
+        with self.lock:
+            entry = self.entries.get(name)
+            if entry is None:
+                return None
+            if entry[1] <= time.monotonic():
+                del self.entries[name]
+                return None
+            return entry[0]
+
+    def set(self, name, articles):
+        if not self.enabled() or not articles:
+            return
+        with self.lock:
+            self.entries[name] = (articles, time.monotonic() + get_cache_seconds())
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.seen.clear()
+            self.last_poll = None
+
+    # 新しいバージョンを受け取ったら、そのソースのキャッシュを捨てる
+    # まだバージョンを受け取っていないソースのキャッシュも捨てる
+    # （バージョンが記録される前、つまり最初の取り込みより前に取得した記事一覧のため）。
+    # 取り込んだプロセス自身のキャッシュは、バージョンを受け取ってから入れ替える（feeds.store_feed を参照）。
+    def receive(self, name, version):
+        with self.lock:
+            previous = self.seen.get(name)
+            self.seen[name] = version
+            if previous != version and self.entries.pop(name, None) is not None:
+                logger.info(f"[情報] {name} の記事一覧が更新されたため、キャッシュを捨てました。")
+
+    # FeedVersion テーブルを確認する（前回の確認から FEED_INVALIDATION_POLL_SECONDS 経っていれば）
+    def poll_if_due(self):
+        now = time.monotonic()
+        with self.lock:
+            if self.last_poll is not None and now - self.last_poll < get_poll_seconds():
+                return
+            self.last_poll = now
+        self.poll()
+
+    def poll(self):
+        try:
+            versions = list(FeedVersion.objects.values_list("name", "version"))
+        except DatabaseError as e:
+            logger.error(f"[エラー] 記事一覧のバージョンを確認できませんでした: {e}")
+            return
+        self.receive_all(versions)
+
+    def receive_all(self, versions):
+        for name, version in versions:
+            self.receive(name, version)
+
+    # PostgreSQL の場合は、通知の受信用スレッドを開始する
+    def ensure_listener(self):
+        if self.listener is not None or connection.vendor != "postgresql":
+            return
+        with self.lock:
+            if self.listener is None:
+                self.listener = NotificationListener(self)
+                self.listener.start()
+
+
+# PostgreSQL の LISTEN で通知を受け取るスレッド
+# Django の接続とは別に、専用の接続を使う。接続が切れた場合は、つなぎ直すまでポーリングで確認する。
+class NotificationListener(threading.Thread):
+    reconnect_seconds = 5
+
+    def __init__(self, cache):
+        super().__init__(name="feed-invalidation-listener", daemon=True)
+        self.cache = cache
+        self.connected = False
+
+    def run(self):
+        import psycopg
+
+        params = connection.get_connection_params()
+        params.pop("cursor_factory", None)
+        params.pop("context", None)
+        while True:
+            try:
+                with psycopg.connect(**params, autocommit=True) as conn:
+                    conn.execute(f"LISTEN {CHANNEL}")
+                    # 接続していなかった間の更新を取り込む
+                    self.cache.receive_all(conn.execute(f"SELECT name, version FROM {FeedVersion._meta.db_table}").fetchall())
+                    self.connected = True
+                    for notify in conn.notifies():
+                        self.handle(notify.payload)
+            except Exception as e:
+                logger.error(f"[エラー] 記事一覧の更新通知を受信できません（{self.reconnect_seconds}秒後に再接続します）: {e}")
+            self.connected = False
+            time.sleep(self.reconnect_seconds)
+
+    def handle(self, payload):
+        try:
+            message = json.loads(payload)
+            self.cache.receive(message["name"], message["version"])
+        except (ValueError, KeyError, TypeError):
+            logger.error(f"[エラー] 記事一覧の更新通知の形式が不正です: {payload}")
+
+
+local_feed_cache = LocalFeedCache()
@@ -0,0 +1,131 @@
+# 複数のノード（アプリケーションサーバー）のうち、1つのプロセスだけが処理を行うためのロック（リーダーのリース）
+# refresh_feeds を各ノードで実行しても、ソースごとに外部サービスから取得するのは1つのプロセスだけにする。
+# 他のプロセスは、取得した記事一覧（FeedVersion に保存される）を使う（services/feeds.py の refresh_feed を参照）。
+#
+# ロックの方法
+#     PostgreSQL: アドバイザリーロック（pg_try_advisory_lock）
+#         接続ごとのロックなので、プロセスが止まって接続が切れると自動的に解放される。
+#     それ以外（SQLite など）: Lease テーブルの期限付きの行
+#         プロセスが止まった場合は、FEED_LEADER_LEASE_SECONDS 秒後に他のプロセスが取得できる。
+#         処理が長くかかる場合は、途中で renew() を呼んで期限を延ばす（延ばせなかった場合は、他のプロセスに引き継がれている）。
+
+import hashlib
+import logging
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.utils import timezone
+from ..models import Lease
+
+
+logger = logging.getLogger(__name__)
+
+# ロックが空くのを待つときの確認の間隔（秒）
+POLL_SECONDS = 0.5
+
+# アドバイザリーロックを取得したことを表す値（接続ごとのロックなので、所有者を区別する必要がない）
+ADVISORY = "advisory"
+
+
+def get_lease_seconds():
+    return getattr(settings, "FEED_LEADER_LEASE_SECONDS", 300)
+
+
+# ロックの名前を、アドバイザリーロックのキー（64ビットの整数）に変換する
+def advisory_key(name):
+    return int.from_bytes(hashlib.sha256(name.encode("utf-8")).digest()[:8], "big", signed=True)
+
+
+# ロックの取得を1回だけ試す（取得できた場合は解放に使う値、できなかった場合は None を返す）
+def try_acquire(name):
+    try:
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_try_advisory_lock(%s)", [advisory_key(name)])
+                return ADVISORY if cursor.fetchone()[0] else None
+
+        token = uuid.uuid4().hex
+        now = timezone.now()
+        expires_at = now + timedelta(seconds=get_lease_seconds())
+        with transaction.atomic():
+            # 期限が過ぎたリース（持っていたプロセスが止まった）は引き継ぐ
+            if Lease.objects.filter(name=name, expires_at__lte=now).update(owner=token, expires_at=expires_at):
+                return token
+            _, created = Lease.objects.get_or_create(name=name, defaults={"owner": token, "expires_at": expires_at})
+        return token if created else None
+    except IntegrityError:
+        return None  # 他のプロセスが同時に取得した
+    except DatabaseError as e:
+        logger.error(f"[エラー] ロックを取得できませんでした（{name}）: {e}")
+        return None
+
+
+# リースの期限を延ばす（延ばせた場合は True。期限が過ぎて他のプロセスに引き継がれていた場合は False）
+def renew(name, token):
+    if token == ADVISORY:
+        return True  # 接続が切れるまで解放されない
+    try:
+        expires_at = timezone.now() + timedelta(seconds=get_lease_seconds())
+        return bool(Lease.objects.filter(name=name, owner=token).update(expires_at=expires_at))
+    except DatabaseError as e:
+        logger.error(f"[エラー] ロックの期限を延ばせませんでした（{name}）: {e}")
+        return False
+
+
+def release(name, token):
+    try:
+        if token == ADVISORY:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_unlock(%s)", [advisory_key(name)])
+        else:
+            Lease.objects.filter(name=name, owner=token).delete()
+    except DatabaseError as e:
+        logger.error(f"[エラー] ロックを解放できませんでした（{name}）: {e}")
+
+
+# ロックを取得する。取得できない場合は、wait 秒まで空くのを待つ
+def acquire(name, wait=0):
+    give_up_at = time.monotonic() + wait
+    while True:
+        token = try_acquire(name)
+        if token is not None or time.monotonic() >= give_up_at:
+            return token
+        time.sleep(POLL_SECONDS)
+
+
+# 取得したロック（真偽値として、ロックを取得できたかどうか（リーダーかどうか）を表す）
+class Leadership():
+    def __init__(self, name, token):
+        self.name = name
+        self.token = token
+
+    def __bool__(self):
+        return self.token is not None
+
+    # まだリーダーかどうかを確認し、リースの期限を延ばす（結果を共有する前や、長い処理の途中で呼ぶ）
+    def renew(self):
+        if self.token is None or not renew(self.name, self.token):
+            logger.warning(f"[警告] ロックの期限が過ぎたため、他のプロセスに引き継がれました（{self.name}）。")
+            self.token = None
+            return False
+        return True
+
+
+# ロックを取得できたかどうか（リーダーかどうか）を返し、終わったら解放する
+# 例：
+#     with leader_lease("refresh_feed:nikkei_med") as leader:
+#         if leader:
+#             ...
+#             if leader.renew():
+#                 （結果を共有する）
+@contextmanager
+def leader_lease(name, wait=0):
+    leader = Leadership(name, acquire(name, wait))
+    try:
+        yield leader
+    finally:
+        if leader.token is not None:
+            release(name, leader.token)
@@ -0,0 +1,250 @@
+# tracemalloc を使ってリクエストごとのメモリ使用量を調べるモジュール
+# ワーカーのメモリが増えていく原因（BeautifulSoup のツリー、pandas の DataFrame、
+# セッションに保存する記事リスト、テンプレートの描画など）を特定するために使う。
+#
+# 有効にする方法（どちらの場合もレポートは MEMORY_PROFILE_DIR に書き出す）
+#     設定 MEMORY_PROFILE = True             すべてのリクエストを調べる
+#     スタッフが URL に ?memprofile=1 を付ける  そのリクエストだけを調べる
+#
+# リクエスト全体（ビュー・テンプレートの描画・セッションの保存）と、
+# @profiled を付けたサービスの呼び出しごとに、増えたメモリ・ピーク・確保の多い箇所を記録する。
+# tracemalloc はプロセス全体で1つなので、同時に処理している他のリクエストの確保も含まれる。
+# また、別スレッドで実行されたサービスの呼び出しは、リクエスト全体の数値にだけ含まれる。
+
+import contextvars
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from django.conf import settings
+from .export import write_atomic
+
+
+logger = logging.getLogger(__name__)
+
+# 実行中のリクエストのプロファイル（調べていない場合は None）
+_current = contextvars.ContextVar("memprofile", default=None)
+
+# 調べている最中のリクエストの数（0になったら、自分で開始した tracemalloc を止める）
+_active = 0
+_active_lock = threading.Lock()
+_started_tracing = False
+
+
+def get_report_dir():
+    return getattr(settings, "MEMORY_PROFILE_DIR", None)
+
+
+def get_top_count():
+    return getattr(settings, "MEMORY_PROFILE_TOP", 15)
+
+
+# このリクエストを調べるかどうか
+def enabled_for(request):
+    if not get_report_dir():
+        return False
+    if getattr(settings, "MEMORY_PROFILE", False):
+        return True
+    user = getattr(request, "user", None)
+    return request.GET.get("memprofile") == "1" and bool(user and user.is_staff)
+
+
+def start_tracing():
+    global _active, _started_tracing
+    with _active_lock:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _started_tracing = True
+        _active += 1
+
+
+def stop_tracing():
+    global _active, _started_tracing
+    with _active_lock:
+        _active -= 1
+        if _active == 0 and _started_tracing:
+            tracemalloc.stop()
+            _started_tracing = False
+
+
+# 2つのスナップショットの差分から、確保が増えた箇所の上位を返す
+def top_sites(before, after, limit):
+    stats = after.compare_to(before, "lineno")
+    return [{
+        "site": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+        "size_diff": stat.size_diff,
+        "count_diff": stat.count_diff,
+    } for stat in stats[:limit] if stat.size_diff > 0]
+
+
+# 処理の区間（リクエスト全体・サービスの呼び出し）のメモリ使用量を測る
+class Section():
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.snapshot = tracemalloc.take_snapshot()
+        self.current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.started
+        current, self.peak = tracemalloc.get_traced_memory()
+        self.result = {
+            "name": self.name,
+            "duration_ms": round(elapsed * 1000, 1),
+            "size_delta": current - self.current,
+            "peak_bytes": self.peak - self.current,
+            "top": top_sites(self.snapshot, tracemalloc.take_snapshot(), get_top_count()),
+        }
+        return False
+
+
+# 1リクエスト分の記録
+class RequestProfile():
+    def __init__(self, request):
+        self.path = request.path
+        self.view = "unknown"  # URLを解決した後に決まる
+        self.started_at = datetime.now().isoformat(timespec="seconds")
+        self.sections = []
+        self.in_section = False
+        # サービスの区間を測るとピークがリセットされるので、それまでのピークを覚えておく
+        self.peak = 0
+
+    # サービスの区間を測る前後に、それまでのピークを記録する
+    def keep_peak(self, peak=None):
+        if peak is None:
+            _, peak = tracemalloc.get_traced_memory()
+        self.peak = max(self.peak, peak)
+
+    def to_report(self, section, session_bytes=None):
+        result = dict(section.result)
+        result["peak_bytes"] = max(section.peak, self.peak) - section.current
+        return {
+            "path": self.path,
+            "view": self.view,
+            "pid": os.getpid(),
+            "started_at": self.started_at,
+            **{key: value for key, value in result.items() if key != "name"},
+            "session_bytes": session_bytes,
+            "sections": self.sections,
+        }
+
+
+# URLに対応するビューの名前（クラスベースビューならクラス名）
+def get_view_name(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unknown"
+    view_class = getattr(match.func, "view_class", None)
+    return view_class.__name__ if view_class else match.view_name
+
+
+# セッションに保存されているデータの大きさ（バイト）。セッションがない場合は None
+def get_session_bytes(request):
+    session = getattr(request, "session", None)
+    if session is None:
+        return None
+    try:
+        return len(session.serializer().dumps(dict(session.items())))
+    except Exception:
+        return None
+
+
+# リクエストの処理を調べ、レスポンスを返す（ミドルウェアから使う）
+# テンプレートの描画は get_response の中で行われるので数値に含まれる（ストリーミングの送信中の分は含まれない）。
+def profile_request(request, get_response):
+    start_tracing()
+    profile = RequestProfile(request)
+    token = _current.set(profile)
+    try:
+        with Section("request") as section:
+            response = get_response(request)
+    finally:
+        _current.reset(token)
+        stop_tracing()
+
+    profile.view = get_view_name(request)
+    request.memprofile_report = write_report(profile.to_report(section, get_session_bytes(request)))
+    return response
+
+
+# サービスの呼び出しを調べるデコレーター（リクエストを調べていない場合は何もしない）
+# 区間の中でさらに区間を測ると、内側のスナップショットの分だけ外側の数値が増えるので、内側の呼び出しは測らない。
+def profiled(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        profile = _current.get()
+        if profile is None or profile.in_section:
+            return func(*args, **kwargs)
+
+        profile.in_section = True
+        profile.keep_peak()
+        section = Section(func.__qualname__)
+        try:
+            with section:
+                return func(*args, **kwargs)
+        finally:
+            profile.in_section = False
+            profile.keep_peak(section.peak)
+            profile.sections.append(section.result)
+    return wrapper
+
+
+# レポートを書き出す（書き出せなかった場合は None を返す）
+def write_report(report):
+    report_dir = get_report_dir()
+    filename = f"{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}-{report['view']}-{time.monotonic_ns() % 10**6:06d}.json"
+    path = os.path.join(report_dir, filename)
+    try:
+        os.makedirs(report_dir, exist_ok=True)
+        write_atomic(path, json.dumps(report, ensure_ascii=False, indent=1).encode("utf-8"))
+    except OSError as e:
+        logger.error(f"[エラー] メモリのレポートを書き出せませんでした（{path}）: {e}")
+        return None
+    return path
+
+
+# レポートを読み込む（ファイルまたはディレクトリ内のすべてのレポート）
+def load_reports(path):
+    if os.path.isdir(path):
+        paths = [os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith(".json")]
+    else:
+        paths = [path]
+
+    reports = []
+    for report_path in paths:
+        try:
+            with open(report_path, encoding="utf-8") as f:
+                reports.append(json.load(f))
+        except (OSError, ValueError) as e:
+            logger.error(f"[エラー] メモリのレポートを読めませんでした（{report_path}）: {e}")
+    return reports
+
+
+# レポートをビューごとにまとめる
+# 戻り値は {ビュー名: {"requests": 件数, "peak_bytes": 平均, "size_delta": 平均, "sites": {箇所: 平均の増加量}}}
+def summarize_reports(reports):
+    grouped = {}
+    for report in reports:
+        grouped.setdefault(report["view"], []).append(report)
+
+    summary = {}
+    for view, items in grouped.items():
+        sites = {}
+        for report in items:
+            for site in report["top"]:
+                sites[site["site"]] = sites.get(site["site"], 0) + site["size_diff"]
+        summary[view] = {
+            "requests": len(items),
+            "peak_bytes": sum(report["peak_bytes"] for report in items) / len(items),
+            "size_delta": sum(report["size_delta"] for report in items) / len(items),
+            "sites": {site: total / len(items) for site, total in sites.items()},
+        }
+    return summary
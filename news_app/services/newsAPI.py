@@ -1,16 +1,30 @@
+import hashlib
+import json
 import requests
+from urllib.parse import urlencode
 import pandas as pd
 from .translateByDeepl import Translator
 import os
 from dotenv import load_dotenv
 import logging
+from django.core.cache import cache
+from .utils import upstream_url
+from . import archive
+from .deadline import NO_DEADLINE
+from .memprofile import profiled
 
 logger = logging.getLogger(__name__)
 
+# 翻訳済みタイトルをキャッシュしておく期間（秒）
+TITLE_MEMO_SECONDS = 7 * 24 * 60 * 60
+
 
 # .env ファイルを読み込む
 load_dotenv()
 
+# 翻訳クラスのインスタンス（DeepLへの接続を使い回すため、モジュールで1つだけ作る）
+translator = Translator()
+
 # sourceフィールドから辞書内の'name'キーを取り出す関数
 # nameキーがないか、sourceが辞書でない場合は空文字を返す
 def extract_source_name(source):
@@ -20,16 +34,30 @@ def extract_source_name(source):
 
 
 # ニュースAPIからデータを取得する関数
-def fetch_news_data():
+# タイムアウトは、リクエスト全体の残り時間（deadline）に合わせる。
+def fetch_news_data(deadline=None):
+    deadline = deadline or NO_DEADLINE
     headers = {'X-Api-Key': os.getenv("X_Api_Key")}
-    url = 'https://newsapi.org/v2/everything'
+    url = upstream_url('https://newsapi.org/v2/everything')
     params = {
         'sortedBy': 'publishedAt',
         'q': 'medical'
     }
 
+    # 保存済みのレスポンスを使う設定の場合は、ネットワークに接続しない
+    # （保存するときのURLは、クエリパラメータを含めたもの）
+    request_url = f"{url}?{urlencode(params)}"
+    if archive.replay_enabled():
+        text = archive.replay_text(request_url)
+        return json.loads(text)['articles'] if text else []
+
+    if deadline.expired():
+        logger.error("[エラー] 制限時間を過ぎたため、ニュースデータの取得をスキップしました。")
+        return []
+
     try:
-        response = requests.get(url, headers=headers, params=params)
+        response = requests.get(url, headers=headers, params=params, timeout=deadline.timeout(10))
+        archive.record(request_url, response)  # 設定されていれば、取得したレスポンスを保存する
         response.raise_for_status()
         data = response.json()
         return data['articles']
@@ -58,15 +86,20 @@ def clean_and_format_data(articles):
 
 
 # titleカラムだけを翻訳する関数
-def translate_titles(df):
+# 翻訳は省略できる処理なので、リクエストの残り時間が少ない場合は原文のまま返す。
+def translate_titles(df, deadline=None):
+    deadline = deadline or NO_DEADLINE
     if 'title' not in df.columns:
         logger.error("[情報] タイトルカラムが存在しません。翻訳処理をスキップします。")
         return df
-    
+
+    if not deadline.has(translator.min_seconds):
+        logger.warning("[警告] 残り時間が少ないため、タイトルの翻訳をスキップします。")
+        return df
+
     try:
         title_list = df['title'].tolist()        # タイトルをリスト化
-        translator = Translator()                # 翻訳クラスのインスタンスを生成
-        translated_title = translator.translate_text(title_list)  # タイトルを翻訳
+        translated_title = translator.translate_text(title_list, deadline=deadline)  # タイトルを翻訳
         df['title'] = translated_title  # 翻訳後のタイトルをDataFrameに反映
         return df
     except Exception as e:
@@ -76,12 +109,50 @@ def translate_titles(df):
 
 
 
+# 記事リスト（[タイトル, 公開日時, ソース, URL, 画像URL] のリスト）のタイトルを翻訳したコピーを返す
+# ページに表示する記事だけを翻訳するために使う。
+# 翻訳結果はタイトルごとにキャッシュするので、記事一覧に新しい記事が加わっても、
+# 以前からある記事のタイトルは翻訳し直さない（翻訳するのは新しいタイトルだけ）。
+# リクエストの残り時間が少ない場合は、翻訳済みのタイトルだけを使う。
+@profiled
+def translate_article_titles(articles, deadline=None):
+    deadline = deadline or NO_DEADLINE
+    keys = {title: title_memo_key(title) for title in dict.fromkeys(article[0] for article in articles) if title}
+    cached = cache.get_many(keys.values())
+    memo = {title: cached[key] for title, key in keys.items() if key in cached}
+
+    # まだ翻訳していないタイトルだけを翻訳する
+    missing = [title for title in keys if title not in memo]
+    if missing and not deadline.has(translator.min_seconds):
+        logger.warning("[警告] 残り時間が少ないため、タイトルの翻訳をスキップします。")
+    elif missing:
+        try:
+            # 翻訳できたタイトルだけが返る（訳文が原文と同じタイトルも記録する）
+            # 翻訳に失敗したタイトル・時間内に終わらなかったタイトルは記録せず、次回もう一度翻訳する
+            new_memo = translator.translate_many(missing, deadline=deadline)
+            cache.set_many({keys[title]: result for title, result in new_memo.items()}, TITLE_MEMO_SECONDS)
+            memo.update(new_memo)
+        except Exception as e:
+            logger.error(f"[エラー] タイトル翻訳中に問題が発生しました: {e}")
+
+    return [[memo.get(article[0], article[0]), *article[1:]] for article in articles]
+
+
+# タイトルの翻訳結果を保存するキャッシュのキー（タイトルは長さも文字も様々なので、ハッシュにする）
+def title_memo_key(title):
+    return f"news_api:title:{hashlib.sha256(title.encode('utf-8')).hexdigest()[:32]}"
+
+
 # 処理のメイン関数 戻り値は他のスクレイピングと合わせてリスト化。
-def fetch_news_from_api():
+# translate=False の場合はタイトルを翻訳せずに返す（表示するときに translate_article_titles で翻訳する）。
+# deadline: リクエスト全体の制限時間（各処理は残り時間だけを使う）
+@profiled
+def fetch_news_from_api(translate=True, deadline=None):
     try:
-        articles = fetch_news_data()             # APIから記事を取得
+        articles = fetch_news_data(deadline)     # APIから記事を取得
         df = clean_and_format_data(articles)     # 整形
-        df = translate_titles(df)                # タイトルのみ翻訳
+        if translate:
+            df = translate_titles(df, deadline)  # タイトルのみ翻訳
         df = df[['title', 'publishedAt', 'source', 'url', 'urlToImage']]  # 必要なカラムだけ抽出
         df = df.sort_values('publishedAt', ascending=False)  # 新しい順にソート
         return df.values.tolist()  # リスト化して返す
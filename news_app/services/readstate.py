@@ -0,0 +1,94 @@
+# 記事の既読・未読を扱うモジュール
+# 取り込んだ記事には連番の id（FeedItem）を振り、ユーザーごとの既読の id の集合をビットマップで保存する（ReadState）。
+# ユーザーと記事の組み合わせごとに行を作らないので、ユーザー・記事が増えても保存量と検索の回数は小さいまま。
+# 1ページ分の未読の確認は、記事の id の検索とビットマップの読み込みの2回のクエリで済む。
+
+import logging
+from django.db import DatabaseError, transaction
+from ..models import FeedItem, ReadState
+from .bitmap import Bitmap
+from .utils import url_hash
+
+
+logger = logging.getLogger(__name__)
+
+
+# 取り込んだ記事を登録し、連番の id を振る（登録済みの記事はそのまま）
+# items: (記事URL, タイトル) か (記事URL, タイトル, 整形済みの記事, 公開日時) のリスト（記事一覧と同じ新しい順）
+# 1回の登録の中では古い記事から順に登録するので、新しい記事ほど id が大きくなる。
+# （backfill で遡って登録した記事は、それまでに登録した記事より id が大きくなる。公開日時の順は published_at で並べる）
+# 戻り値は新しく登録した件数（登録に失敗した場合は None）
+def register_items(source, items):
+    new_items = {}
+    for url, title, *record in reversed(items):
+        if url:
+            article, published = record if record else ([], None)
+            new_items.setdefault(url_hash(url), (url, title or "", article, published))
+    if not new_items:
+        return 0
+
+    try:
+        # 先に登録済みのものを除いておく（重複で挿入に失敗した分も連番が進み、抜けができるため）
+        existing = set(FeedItem.objects.filter(url_hash__in=list(new_items)).values_list("url_hash", flat=True))
+        created = FeedItem.objects.bulk_create([
+            FeedItem(source=source, url=url, url_hash=hash_value, title=title, article=article, published_at=published)
+            for hash_value, (url, title, article, published) in new_items.items() if hash_value not in existing
+        ], ignore_conflicts=True)
+    except DatabaseError as e:
+        logger.error(f"[エラー] 取り込んだ記事を登録できませんでした（{source}）: {e}")
+        return None
+    return len(created)
+
+
+# 記事URLに対応する記事の id を返す {記事URL: id}（登録されていない記事は含まない）
+def item_ids(urls):
+    urls_by_hash = {}
+    for url in urls:
+        urls_by_hash.setdefault(url_hash(url), []).append(url)
+
+    ids = {}
+    for hash_value, pk in FeedItem.objects.filter(url_hash__in=list(urls_by_hash)).values_list("url_hash", "pk"):
+        for url in urls_by_hash[hash_value]:
+            ids[url] = pk
+    return ids
+
+
+# ユーザーの既読の記事の集合を返す
+def load_bitmap(user):
+    data = ReadState.objects.filter(user=user).values_list("bitmap", flat=True).first()
+    try:
+        return Bitmap.from_bytes(data)
+    except (ValueError, TypeError) as e:
+        logger.error(f"[エラー] 既読の記事を読み込めませんでした（ユーザー {user.pk}）: {e}")
+        return Bitmap()
+
+
+# 記事URLのうち、ユーザーがまだ読んでいないものを返す {記事URL: 記事の id}
+def unread_item_ids(user, urls):
+    if not user.is_authenticated or not urls:
+        return {}
+    ids = item_ids(urls)
+    if not ids:
+        return {}
+    read = load_bitmap(user)
+    return {url: pk for url, pk in ids.items() if pk not in read}
+
+
+# 記事を既読にし、新しく既読になった件数を返す
+# 同じユーザーが同時に既読にしても取りこぼさないよう、行をロックしてから書き換える。
+def mark_read(user, ids):
+    ids = list(ids)
+    if not ids:
+        return 0
+    with transaction.atomic():
+        state, _ = ReadState.objects.select_for_update().get_or_create(user=user)
+        try:
+            read = Bitmap.from_bytes(state.bitmap)
+        except ValueError as e:
+            logger.error(f"[エラー] 既読の記事を読み込めなかったため、作り直します（ユーザー {user.pk}）: {e}")
+            read = Bitmap()
+        added = read.update(ids)
+        if added:
+            state.bitmap = read.to_bytes()
+            state.save(update_fields=["bitmap", "updated_at"])
+    return added
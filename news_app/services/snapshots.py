@@ -0,0 +1,173 @@
+# 記事一覧をバイナリ形式のファイルに保存し、複数のワーカープロセスから共有して読むモジュール
+# 記事一覧は取り込み（refresh_feeds）のたびに1回だけ書き出し、各プロセスはファイルを mmap して、
+# 必要な記事だけをその場で取り出す（記事一覧全体を読み込んだり、プロセスごとに作り直したりしない）。
+# ファイルの内容はOSのページキャッシュで共有されるので、プロセスごとのメモリ使用量はほとんど増えない。
+#
+# 設定 FEED_SNAPSHOT_DIR にディレクトリを指定すると有効になる（未設定なら使わない）。
+#
+# ファイルの形式（数値はすべてリトルエンディアン）
+#     ヘッダー       マジック "NFS1"(4) | 形式のバージョン u16 | 項目数 u16 | 記事数 u32 | 記事一覧のバージョン(16)
+#     オフセット表   記事数 × 項目数 個の (文字列の位置 u32, 長さ u32)
+#     公開日時順の表 記事数 個の (記事の位置 u32, 並べ替えのキー f64)。公開日時の新しい順（タイムラインで使う）
+#                    キーは -(公開日時の UNIX 時刻)。公開日時がない記事は +inf（最後になる）
+#     文字列表       UTF-8 の文字列を連結したもの（同じ文字列は1回だけ入れる）
+
+import logging
+import math
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from collections.abc import Sequence
+from datetime import datetime
+from django.conf import settings
+from .ingest import DATE_INDEX
+from .utils import JST, parse_datetime_jst
+
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"NFS1"
+FORMAT_VERSION = 2
+HEADER = struct.Struct("<4sHHI16s")
+SLOT = struct.Struct("<II")
+ORDER = struct.Struct("<Id")
+
+# 開いているファイル {ソース名: (ファイルの識別情報, FeedSnapshot)}
+_opened = {}
+_opened_lock = threading.Lock()
+
+
+# 保存先のディレクトリ（未設定なら None）
+def get_snapshot_dir():
+    return getattr(settings, "FEED_SNAPSHOT_DIR", None)
+
+
+def snapshot_path(name, snapshot_dir=None):
+    return os.path.join(snapshot_dir or get_snapshot_dir(), f"{name}.feed")
+
+
+# 公開日時の新しい順に並べるためのキー（公開日時がない記事は最後にする）
+def order_key(published_at):
+    if published_at is None:
+        return math.inf
+    return -published_at.timestamp()
+
+
+# 記事一覧をバイナリ形式に変換する
+# published: 取り込むときに変換した公開日時（ない場合はここで変換する）
+def encode_snapshot(articles, version, published=None):
+    if published is None:
+        published = [parse_datetime_jst(article[DATE_INDEX]) if len(article) > DATE_INDEX else None for article in articles]
+    keys = [order_key(published_at) for published_at in published]
+    order = bytearray()
+    for position in sorted(range(len(articles)), key=keys.__getitem__):
+        order += ORDER.pack(position, keys[position])
+
+    field_count = max((len(article) for article in articles), default=0)
+
+    strings = {}        # 文字列表に入れた文字列 {文字列: (位置, 長さ)}
+    table = bytearray()
+    slots = bytearray()
+    for article in articles:
+        for i in range(field_count):
+            value = article[i] if i < len(article) else ""
+            value = "" if value is None else str(value)
+            if value not in strings:
+                data = value.encode("utf-8")
+                strings[value] = (len(table), len(data))
+                table += data
+            slots += SLOT.pack(*strings[value])
+
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, field_count, len(articles), version.encode("ascii")[:16].ljust(16))
+    return header + bytes(slots) + bytes(order) + bytes(table)
+
+
+# 記事一覧をファイルに書き出す
+# 一時ファイルに書いてから置き換えるので、読み込み中のプロセスが書き込み途中の内容を見ることはない。
+def write_snapshot(name, articles, version, snapshot_dir=None, published=None):
+    path = snapshot_path(name, snapshot_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(encode_snapshot(articles, version, published))
+        os.replace(tmp_path, path)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+    return path
+
+
+# mmap したファイルを、記事リストのリストのように扱うクラス
+# 記事は取り出すときに1件ずつ文字列に変換する。
+class FeedSnapshot(Sequence):
+    def __init__(self, buffer):
+        magic, format_version, self.field_count, self.item_count, version = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            raise ValueError("記事一覧のファイルの形式が不正です。")
+
+        self.buffer = buffer
+        self.version = version.decode("ascii").strip()
+        self.item_struct = struct.Struct(f"<{self.field_count * 2}I")
+        self.order_offset = HEADER.size + self.item_count * self.item_struct.size
+        self.table_offset = self.order_offset + self.item_count * ORDER.size
+
+    def __len__(self):
+        return self.item_count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.get_item(i) for i in range(*index.indices(self.item_count))]
+
+        if index < 0:
+            index += self.item_count
+        if not 0 <= index < self.item_count:
+            raise IndexError("記事の位置が範囲外です。")
+        return self.get_item(index)
+
+    # index 番目の記事を取り出す
+    def get_item(self, index):
+        slots = self.item_struct.unpack_from(self.buffer, HEADER.size + index * self.item_struct.size)
+        article = []
+        for i in range(0, len(slots), 2):
+            start = self.table_offset + slots[i]
+            article.append(self.buffer[start:start + slots[i + 1]].decode("utf-8"))
+        return article
+
+    # 公開日時の新しい順で rank 番目の記事の (記事の位置, 公開日時) を返す（公開日時がない場合は None）
+    def get_ordered(self, rank):
+        position, key = ORDER.unpack_from(self.buffer, self.order_offset + rank * ORDER.size)
+        return position, None if math.isinf(key) else datetime.fromtimestamp(-key, JST)
+
+
+# 保存済みの記事一覧を返す（ファイルがない場合や、無効な場合は None）
+# ファイルが置き換えられていれば、新しいファイルを開き直す。
+def open_snapshot(name):
+    if not get_snapshot_dir():
+        return None
+
+    path = snapshot_path(name)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    with _opened_lock:
+        opened = _opened.get(name)
+        if opened and opened[0] == identity:
+            return opened[1]
+
+        try:
+            with open(path, "rb") as f:
+                snapshot = FeedSnapshot(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        except (OSError, ValueError, struct.error) as e:
+            logger.error(f"[エラー] 記事一覧のファイルを開けませんでした（{path}）: {e}")
+            return None
+
+        # 古いファイルの mmap は、参照がなくなった時点で解放される
+        _opened[name] = (identity, snapshot)
+        return snapshot
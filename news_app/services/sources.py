@@ -0,0 +1,171 @@
+# スクレイピングするニュースサイトの定義と、その定義に従って記事を抽出する共通の処理
+# サイトごとに、記事一覧のURL・記事1件を囲む要素のセレクタ・各項目のセレクタを設定として書く。
+# 設定は最初に使うときに1回だけ「抽出プラン」（コンパイル済みのCSSセレクタ）に変換し、
+# 以降はそれを使い回して、記事1件ごとにその中だけを探して項目を取り出す。
+#
+# 新しいサイトを追加する場合は、SOURCES に設定を追加するだけでよい。
+
+import copy
+import functools
+import logging
+import requests
+import soupsieve
+from bs4 import BeautifulSoup
+from .utils import upstream_url
+from . import archive
+from .deadline import NO_DEADLINE
+
+
+logger = logging.getLogger(__name__)
+
+
+# サイトごとの設定
+# listing_urls: 記事一覧のURL（複数ある場合は、順番に取得して結果をつなげる）
+# archive_url: 過去の記事一覧のURL（{page} にページ番号が入る。1ページ目が最新。backfill_feeds コマンドで使う）
+# base_url: 相対URLの前に付けるURL
+# item_selector: 記事1件を囲む要素のセレクタ
+# item_split: 記事を囲む要素がなく、複数の記事が同じ要素の直下に並んでいる場合に、記事の先頭になる要素のセレクタ（省略可）
+#     item_selector で見つけた要素の直下にこの要素が2つ以上ある場合は、その要素から次のその要素の手前までを記事1件として扱う。
+# fields: 記事リストの各項目（この順番で記事リストの要素になる）
+#     name: 項目名（ログ用）
+#     selector: 記事1件の要素から見たセレクタ（":scope > a" のように直下の要素も指定できる）
+#     attr: 取り出す属性名（省略した場合はテキスト）
+#     join: True の場合、相対URLの前に base_url を付ける
+#     default: 要素がない場合の値（省略した場合は必須の項目で、ない記事はスキップする）
+SOURCES = {
+    "nikkei_med": {
+        "listing_urls": ["https://medical.nikkeibp.co.jp/inc/all/article/"],
+        "archive_url": "https://medical.nikkeibp.co.jp/inc/all/article/?page={page}",
+        "base_url": "https://medical.nikkeibp.co.jp",
+        "item_selector": "*:has(> div.detail-inner)",
+        "item_split": "div.detail-inner",  # 記事ごとに囲まれていない古い形式のページ
+        "fields": [
+            {"name": "title", "selector": "p.article-list-article-title"},
+            {"name": "date", "selector": "p.article-list-date"},
+            {"name": "tag", "selector": "a.article-list-tag"},
+            {"name": "url", "selector": "div.detail-inner > a", "attr": "href", "join": True},
+            {"name": "img", "selector": "div.article-list-thumb > img", "attr": "src", "join": True},
+        ],
+    },
+    "zizi_med": {
+        "listing_urls": ["https://medical.jiji.com/news/?c=medical"],
+        "archive_url": "https://medical.jiji.com/news/?c=medical&pageNo={page}",
+        "base_url": "https://medical.jiji.com",
+        "item_selector": "li.articleTextList__item",
+        "fields": [
+            {"name": "title", "selector": "p.articleTextList__title"},
+            {"name": "date", "selector": "span.articleTextList__date"},
+            {"name": "url", "selector": ":scope > a", "attr": "href", "join": True},
+            {"name": "img", "selector": "a > p > img", "attr": "src", "join": True, "default": ""},
+        ],
+    },
+}
+
+
+# 記事の項目が見つからなかったことを表す例外
+class MissingFieldError(Exception):
+    pass
+
+
+# 1つの項目の抽出方法（コンパイル済み）
+class FieldPlan():
+    def __init__(self, config, base_url):
+        self.name = config["name"]
+        self.selector = soupsieve.compile(config["selector"])
+        self.attr = config.get("attr")
+        self.base_url = base_url if config.get("join") else None
+        self.required = "default" not in config
+        self.default = config.get("default")
+
+    # 記事1件の要素から、この項目の値を取り出す
+    def extract(self, item):
+        tag = self.selector.select_one(item)
+        value = None
+        if tag is not None:
+            value = tag.get(self.attr) if self.attr else tag.text
+
+        if value is None:
+            if self.required:
+                raise MissingFieldError(self.name)
+            return self.default
+
+        if self.base_url is not None and not value.startswith(("http://", "https://")):
+            value = self.base_url + value
+        return value
+
+
+# サイト1つ分の抽出方法（コンパイル済み）
+class ExtractionPlan():
+    def __init__(self, name, config):
+        self.name = name
+        self.listing_urls = [upstream_url(url) for url in config["listing_urls"]]
+        base_url = upstream_url(config["base_url"])
+        self.item_selector = soupsieve.compile(config["item_selector"])
+        self.item_split = soupsieve.compile(config["item_split"]) if config.get("item_split") else None
+        self.fields = [FieldPlan(field, base_url) for field in config["fields"]]
+
+    # item_selector で見つけた要素を、記事1件ずつの要素にする（item_split を参照）
+    def split_items(self, soup, container):
+        children = [child for child in container.children if child.name]
+        if self.item_split is None or sum(1 for child in children if self.item_split.match(child)) < 2:
+            return [container]
+
+        items = []
+        for child in children:
+            if self.item_split.match(child):
+                items.append(soup.new_tag("div"))
+            if items:
+                items[-1].append(copy.copy(child))  # 元の文書は変更しない
+        return items
+
+    # HTMLから記事リストを取り出す。必須の項目が欠けている記事は、ログに残してスキップする
+    def extract(self, html):
+        soup = BeautifulSoup(html, 'html.parser')
+
+        articles = []
+        for item in (item for container in self.item_selector.select(soup) for item in self.split_items(soup, container)):
+            try:
+                articles.append([field.extract(item) for field in self.fields])
+            except MissingFieldError as e:
+                logger.warning(f"[警告] {self.name}: 項目 '{e}' がない記事をスキップしました")
+        return articles
+
+
+# サイトの抽出プランを返す（初回だけコンパイルする）
+# 負荷試験では接続先が環境変数で変わるため、プロセスの起動後、最初に使うときに作る。
+@functools.lru_cache(maxsize=None)
+def get_plan(name):
+    return ExtractionPlan(name, SOURCES[name])
+
+
+# HTMLを取得する（失敗した場合は None）
+def fetch_html(url, deadline=None):
+    deadline = deadline or NO_DEADLINE
+    if deadline.expired():
+        logger.error(f"[エラー] 制限時間を過ぎたため、HTMLの取得をスキップしました: {url}")
+        return None
+
+    if archive.replay_enabled():
+        return archive.replay_text(url)
+
+    try:
+        response = requests.get(url, timeout=deadline.timeout(10))
+        archive.record(url, response)
+        response.raise_for_status()
+        return response.text
+    except requests.exceptions.RequestException as e:
+        logger.error(f"[エラー] HTMLの取得に失敗しました: {e}")
+        return None
+
+
+# 設定に従ってサイトをスクレイピングし、記事リストを返す
+def scrape_source(name, deadline=None):
+    plan = get_plan(name)
+
+    articles = []
+    for url in plan.listing_urls:
+        html = fetch_html(url, deadline)
+        if html is None:
+            continue
+        articles.extend(plan.extract(html))
+    return articles
@@ -0,0 +1,294 @@
+# 記事のサムネイル画像を取得・縮小して、ディスクにキャッシュするモジュール
+# 外部サイトの画像を毎回ブラウザに読み込ませるのではなく、
+# 一度だけ取得して縮小・再圧縮したものを配信する。
+
+import functools
+import hashlib
+import io
+import ipaddress
+import logging
+import os
+import socket
+import tempfile
+import threading
+from urllib.parse import urljoin, urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+from django.core.cache import cache
+from PIL import Image, ImageOps
+
+
+logger = logging.getLogger(__name__)
+
+
+# 許可するサムネイルの幅（任意の幅を許すとキャッシュが無制限に増えるため）
+THUMB_WIDTHS = (120, 240, 480)
+DEFAULT_THUMB_WIDTH = 240
+
+# 取得する元画像の最大サイズ（バイト）
+MAX_SOURCE_BYTES = 10 * 1024 * 1024
+
+JPEG_QUALITY = 80
+
+# 作成に失敗した画像を再取得しない期間（秒）
+FAILURE_CACHE_SECONDS = 10 * 60
+
+# 元画像のリダイレクトをたどる回数の上限
+MAX_REDIRECTS = 3
+
+# キャッシュの合計サイズを調べ直す間隔（書き込みの回数。他のプロセスが書き込んだ分を反映するため）
+EVICT_CHECK_WRITES = 100
+
+
+# キャッシュの保存先ディレクトリ
+def get_cache_dir():
+    return getattr(settings, "THUMB_CACHE_DIR", os.path.join(settings.BASE_DIR, "cache", "thumbs"))
+
+
+# キャッシュ全体の上限サイズ（バイト）
+def get_cache_max_bytes():
+    return getattr(settings, "THUMB_CACHE_MAX_BYTES", 200 * 1024 * 1024)
+
+
+# 要求された幅を、許可された幅のうち最も近いものに丸める
+def normalize_width(width):
+    try:
+        width = int(width)
+    except (TypeError, ValueError):
+        return DEFAULT_THUMB_WIDTH
+    return min(THUMB_WIDTHS, key=lambda w: abs(w - width))
+
+
+# 画像URLと幅からキャッシュのキーを作る
+def make_cache_key(url, width):
+    return hashlib.sha256(f"{width}:{url}".encode("utf-8")).hexdigest()
+
+
+# 画像データからETagを作る
+def make_etag(data):
+    return hashlib.sha256(data).hexdigest()[:32]
+
+
+# ホスト名を名前解決し、接続してよいアドレスを返す（許可されないアドレスが含まれる場合は None）
+# サーバー内部（localhost・プライベートIP・リンクローカルなど）のアドレスは拒否する。
+def resolve_allowed_address(hostname):
+    try:
+        infos = socket.getaddrinfo(hostname, None)
+    except (socket.gaierror, UnicodeError):
+        return None
+
+    addresses = [ipaddress.ip_address(info[4][0].split("%")[0]) for info in infos]
+    if not addresses:
+        return None
+    if not getattr(settings, "THUMB_ALLOW_PRIVATE_HOSTS", False) and not all(address.is_global for address in addresses):
+        return None
+    return addresses[0]
+
+
+# 確認したアドレスに接続するためのアダプタ
+# URL のホスト名の代わりにアドレスへ接続するので、確認した後に名前解決の結果が変わっても（DNS リバインディング）
+# 別のアドレスには接続しない。HTTPS の SNI と証明書の確認には、元のホスト名を使う。
+class PinnedAddressAdapter(HTTPAdapter):
+    def __init__(self, hostname, **kwargs):
+        self.hostname = hostname
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs["server_hostname"] = self.hostname
+        kwargs["assert_hostname"] = self.hostname
+        super().init_poolmanager(*args, **kwargs)
+
+
+# 確認したアドレスに接続するためのリクエストの内容 (スキーム, ホスト名, アドレスに置き換えたURL, Host ヘッダー) を返す
+# プロキシしてはいけないURL（http(s) 以外や、サーバー内部へのアクセス）の場合は None を返す
+def pinned_target(url):
+    try:
+        parsed = urlparse(url)
+        port = parsed.port
+    except ValueError:
+        return None
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        return None
+    address = resolve_allowed_address(parsed.hostname)
+    if address is None:
+        return None
+
+    host = f"[{address}]" if address.version == 6 else str(address)
+    target = parsed._replace(netloc=f"{host}:{port}" if port else host, fragment="").geturl()
+    host_header = parsed.hostname if port is None else f"{parsed.hostname}:{port}"
+    return parsed.scheme, parsed.hostname, target, host_header
+
+
+# 元画像を取得する。サイズが上限を超える場合や取得に失敗した場合は None を返す
+# リダイレクトは自動ではたどらず、転送先のURLも1回ごとに確認してから、確認したアドレスに接続する。
+def fetch_image(url):
+    try:
+        for _ in range(MAX_REDIRECTS + 1):
+            pinned = pinned_target(url)
+            if pinned is None:
+                logger.error(f"[警告] 許可されていない画像URLです: {url}")
+                return None
+            scheme, hostname, target, host_header = pinned
+
+            with requests.Session() as session:
+                session.mount(f"{scheme}://", PinnedAddressAdapter(hostname))
+                with session.get(target, headers={"Host": host_header}, timeout=10, stream=True, allow_redirects=False) as response:
+                    if response.is_redirect:
+                        url = urljoin(url, response.headers["Location"])
+                        continue
+                    response.raise_for_status()
+
+                    chunks = []
+                    total = 0
+                    for chunk in response.iter_content(chunk_size=64 * 1024):
+                        total += len(chunk)
+                        if total > MAX_SOURCE_BYTES:
+                            logger.error(f"[警告] 画像サイズが上限を超えています: {url}")
+                            return None
+                        chunks.append(chunk)
+                    return b"".join(chunks)
+
+        logger.error(f"[警告] 画像のリダイレクトが多すぎます: {url}")
+        return None
+    except requests.exceptions.RequestException as e:
+        logger.error(f"[エラー] 画像の取得に失敗しました: {e}")
+        return None
+
+
+# 画像を指定した幅に縮小し、JPEGで再圧縮する。画像として読めない場合は None を返す
+def resize_image(data, width):
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image = ImageOps.exif_transpose(image)
+            image = image.convert("RGB")
+            # 縦横比を保ったまま、幅が width 以下になるように縮小する（拡大はしない）
+            image.thumbnail((width, width * 4))
+
+            output = io.BytesIO()
+            image.save(output, format="JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+            return output.getvalue()
+    except Exception as e:
+        logger.error(f"[エラー] 画像の変換に失敗しました: {e}")
+        return None
+
+
+# キャッシュから読み込む。ヒットした場合は最終利用日時を更新する（LRUのため）
+def read_cache(key):
+    path = os.path.join(get_cache_dir(), f"{key}.jpg")
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        os.utime(path)
+        return data
+    except OSError:
+        return None
+
+
+# キャッシュに書き込み、上限を超えた分は古いものから削除する
+def write_cache(key, data):
+    cache_dir = get_cache_dir()
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+
+        # 書き込み途中のファイルを読まれないよう、一時ファイルに書いてから置き換える
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, os.path.join(cache_dir, f"{key}.jpg"))
+
+        cache_usage.add(cache_dir, len(data), get_cache_max_bytes())
+    except OSError as e:
+        logger.error(f"[エラー] サムネイルのキャッシュ保存に失敗しました: {e}")
+
+
+# キャッシュの合計サイズ（プロセスごと・ディレクトリごとに数える）
+# 書き込むたびにディレクトリ全体を調べないように、最初の1回だけ調べ（evict_cache）、その後は書き込んだ分を足していく。
+# 上限を超えたときと、他のプロセスが書き込んだ分を反映するために EVICT_CHECK_WRITES 回書き込むごとに、調べ直して削除する。
+class CacheUsage():
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.totals = {}    # {ディレクトリ: 合計サイズ}
+        self.writes = {}    # {ディレクトリ: 前回調べてからの書き込みの回数}
+
+    # 書き込んだサイズを足し、必要な場合は古いファイルを削除する
+    def add(self, cache_dir, size, max_bytes):
+        with self.lock:
+            total = self.totals.get(cache_dir)
+            writes = self.writes.get(cache_dir, 0) + 1
+            if total is not None and total + size <= max_bytes and writes < EVICT_CHECK_WRITES:
+                self.totals[cache_dir] = total + size
+                self.writes[cache_dir] = writes
+                return
+            self.writes[cache_dir] = 0
+
+        total = evict_cache(cache_dir, max_bytes)
+        with self.lock:
+            self.totals[cache_dir] = total
+
+
+cache_usage = CacheUsage()
+
+
+# 合計サイズが上限以下になるまで、最終利用日時が古いファイルから削除し、残ったファイルの合計サイズを返す
+def evict_cache(cache_dir, max_bytes):
+    entries = []
+    total = 0
+    with os.scandir(cache_dir) as it:
+        for entry in it:
+            if entry.is_file() and entry.name.endswith(".jpg"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+    if total <= max_bytes:
+        return total
+
+    entries.sort()
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            continue
+    return total
+
+
+# サムネイルを取得する（キャッシュになければ元画像を取得して作成する）
+# 戻り値は JPEG のバイト列。作成できなかった場合は None を返す。
+def get_thumbnail(url, width):
+    width = normalize_width(width)
+    key = make_cache_key(url, width)
+
+    data = read_cache(key)
+    if data is not None:
+        return data
+
+    # 直近で失敗した画像は、しばらく取得し直さない
+    failure_key = f"thumb:failed:{key}"
+    if cache.get(failure_key):
+        return None
+
+    source = fetch_image(url)
+    data = resize_image(source, width) if source is not None else None
+    if data is None:
+        cache.set(failure_key, True, FAILURE_CACHE_SECONDS)
+        return None
+
+    write_cache(key, data)
+    return data
+
+
+# サムネイルを作成できなかった場合に返す画像（許可された幅ごとに1回だけ作る）
+def placeholder_image(width):
+    return _placeholder_image(normalize_width(width))
+
+
+@functools.lru_cache(maxsize=None)
+def _placeholder_image(width):
+    output = io.BytesIO()
+    Image.new("RGB", (width, width * 3 // 4), (230, 230, 230)).save(output, format="JPEG", quality=JPEG_QUALITY)
+    return output.getvalue()
@@ -0,0 +1,152 @@
+# すべてのソースの記事を、公開日時の新しい順に1つのタイムラインとして扱うモジュール
+# ソースごとに日付の形式が違うため、取り込むときに1回だけタイムゾーン付きの datetime に変換しておき（ingest.FeedList）、
+# 記事一覧ごとに1回だけ、新しい順に並べたリストを作って記事一覧に持たせる。
+# 保存済みのファイルの記事一覧（snapshots.FeedSnapshot）は、書き出すときに新しい順の表も書いておき、
+# リストを作らずにその表から必要な記事だけを取り出す（プロセスごとに記事一覧のコピーを持たない）。
+# タイムラインの1ページは、これらのリストをヒープでマージして作る（全体を並べ直さない）。
+# リクエストごとの処理は、1ページ分のマージだけになる。
+
+from collections import namedtuple
+from collections.abc import Sequence
+import heapq
+import threading
+from .feeds import FEEDS
+from .ingest import DATE_INDEX, FeedList
+from .snapshots import FeedSnapshot
+from .utils import parse_datetime_jst
+
+
+# タイムラインの1件
+# published_at: タイムゾーン付きの公開日時（変換できなかった場合は None）
+# source: ソース名（feeds.FEEDS のキー）
+# article: 元の記事データ（ソースごとの形式のリスト）
+TimelineItem = namedtuple("TimelineItem", ["published_at", "source", "article"])
+
+# バージョンを持つ記事一覧（FeedList・FeedSnapshot 以外）の並べ替え済みリスト {ソース名: (バージョン, リスト)}
+_sorted_items = {}
+_sorted_items_lock = threading.Lock()
+
+
+# 並べ替えに使うキー（新しい順。日時がない記事は最後にする）
+def sort_key(item):
+    if item.published_at is None:
+        return float("inf")
+    return -item.published_at.timestamp()
+
+
+# 1つのソースの記事を、公開日時の新しい順に並べた TimelineItem のリストにする
+# published: 取り込むときに変換した公開日時（ない場合はここで変換する）
+def build_timeline_items(source, articles, published=None):
+    if published is None:
+        published = [parse_datetime_jst(article[DATE_INDEX]) for article in articles]
+    items = [TimelineItem(published_at, source, article) for published_at, article in zip(published, articles)]
+    items.sort(key=sort_key)
+    return items
+
+
+# 保存済みのファイルの記事一覧を、公開日時の新しい順の TimelineItem の列として扱うクラス
+# ファイルの新しい順の表（FeedSnapshot.get_ordered）を読むだけで、リストは作らない。
+# 記事は取り出すときに1件ずつ作るので、マージで読んだ記事（1ページ分と、ソースごとに1件）の分しか作らない。
+class SnapshotTimeline(Sequence):
+    def __init__(self, source, snapshot):
+        self.source = source
+        self.snapshot = snapshot
+
+    def __len__(self):
+        return len(self.snapshot)
+
+    def __getitem__(self, rank):
+        if isinstance(rank, slice):
+            return [self[i] for i in range(*rank.indices(len(self)))]
+        if rank < 0:
+            rank += len(self)
+        if not 0 <= rank < len(self):
+            raise IndexError("記事の位置が範囲外です。")
+        position, published_at = self.snapshot.get_ordered(rank)
+        return TimelineItem(published_at, self.source, self.snapshot[position])
+
+
+# ソースの並べ替え済みリストを返す（記事一覧ごとに1回だけ作る）
+# 取り込んだ記事一覧（FeedList）は、作ったリストを記事一覧に持たせる。
+# 保存済みのファイルの記事一覧（FeedSnapshot）は、リストを作らずにファイルの新しい順の表を使う。
+# それ以外のバージョンを持つ記事一覧は、バージョンが同じなら前回作ったものを使い回す。
+def get_sorted_items(source, articles):
+    if isinstance(articles, FeedSnapshot):
+        return SnapshotTimeline(source, articles)
+
+    if isinstance(articles, FeedList):
+        if articles.timeline_items is None:
+            articles.timeline_items = build_timeline_items(source, articles, articles.published)
+        return articles.timeline_items
+
+    version = getattr(articles, "version", None)
+    if version is None:
+        return build_timeline_items(source, articles)
+
+    with _sorted_items_lock:
+        cached = _sorted_items.get(source)
+        if cached and cached[0] == version:
+            return cached[1]
+
+    items = build_timeline_items(source, articles)
+    with _sorted_items_lock:
+        _sorted_items[source] = (version, items)
+    return items
+
+
+# 並べ替え済みのリストをヒープでマージし、cursor の位置から size 件を取り出す
+# sorted_lists: {ソース名: 新しい順に並んだ TimelineItem のリスト}
+# cursor: {ソース名: そのソースで次に読む位置}（最初のページは空の辞書）
+# 戻り値は (そのページの TimelineItem のリスト, 次のページの cursor)
+# 1ページの計算量は O(ソース数 + size × log ソース数) で、ページ番号が大きくなっても増えない。
+def merge_page(sorted_lists, cursor, size):
+    cursor = {source: cursor.get(source, 0) for source in sorted_lists}
+
+    heap = []
+    for order, (source, items) in enumerate(sorted_lists.items()):
+        position = cursor[source]
+        if position < len(items):
+            heap.append((sort_key(items[position]), order, source))
+    heapq.heapify(heap)
+
+    page = []
+    while heap and len(page) < size:
+        _, order, source = heapq.heappop(heap)
+        items = sorted_lists[source]
+        page.append(items[cursor[source]])
+        cursor[source] += 1
+
+        if cursor[source] < len(items):
+            heapq.heappush(heap, (sort_key(items[cursor[source]]), order, source))
+
+    return page, cursor
+
+
+# タイムラインの1ページの記事を、ソースごとに表示用に加工する（feeds.FEEDS の prepare_page。タイトルの翻訳など）
+# 並べ替え済みのリストは加工していない記事一覧から作るので、加工はそのページの記事の分だけ行う。
+def prepare_timeline_page(items, deadline=None):
+    items = list(items)
+    for source, config in FEEDS.items():
+        prepare = config.get("prepare_page")
+        positions = [i for i, item in enumerate(items) if item.source == source]
+        if not prepare or not positions:
+            continue
+        prepared = prepare([list(items[i].article) for i in positions], deadline)
+        for i, article in zip(positions, prepared):
+            items[i] = items[i]._replace(article=article)
+    return items
+
+
+# cursor を URL のクエリ用の文字列にする。例：{"nikkei_med": 3, "zizi_med": 7} → "nikkei_med:3,zizi_med:7"
+def encode_cursor(cursor):
+    return ",".join(f"{source}:{position}" for source, position in cursor.items() if position)
+
+
+# URL のクエリの文字列を cursor に戻す。不正な値は無視する
+def decode_cursor(raw):
+    cursor = {}
+    for part in (raw or "").split(","):
+        source, _, position = part.partition(":")
+        if source and position.isdigit():
+            cursor[source] = int(position)
+    return cursor
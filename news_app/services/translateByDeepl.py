@@ -1,8 +1,14 @@
 import deepl
 import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
 import pandas as pd
 from dotenv import load_dotenv
 import logging
+from .deeplUsage import usage_ledger
+from .utils import get_simulator_url, upstream_url
+from .deadline import NO_DEADLINE
 
 
 logger = logging.getLogger(__name__)
@@ -12,9 +18,45 @@ logger = logging.getLogger(__name__)
 load_dotenv()
 
 class Translator():
+    max_chunk_size = 50        # 1回のAPI呼び出しで送る最大件数（DeepL APIの上限が50件）
+    max_chunk_chars = 20000    # 1回のAPI呼び出しで送る最大文字数（リクエストサイズの上限対策）
+    max_workers = 4            # 同時に送るAPI呼び出しの数
+    max_retries = 2            # 混雑・通信エラー時に再試行する回数
+    backoff_seconds = 1.0      # 再試行までの待ち時間（再試行のたびに2倍にする）
+    min_seconds = 1.0          # 翻訳を始めるのに必要な残り時間（これより少なければ翻訳しない）
+
+    # 再試行しても成功する見込みがあるエラー
+    retryable_exceptions = (deepl.TooManyRequestsException, deepl.ConnectionException)
+
+    def __init__(self, ledger=None):
+        # DeepLのクライアントは接続を使い回せるように、インスタンスごとに1つだけ作る
+        self._client = None
+        self._client_lock = threading.Lock()
+
+        # 送信した文字数の記録（予算を超える翻訳はここで止める）
+        self.ledger = ledger or usage_ledger
+
+    # DeepLのクライアントを取得する（初回だけ作成する）
+    def get_client(self):
+        with self._client_lock:
+            if self._client is None:
+                #環境変数からAPIキーを取得
+                auth_key = os.getenv("DEEPL_AUTH_KEY")
+                if not auth_key:
+                    raise ValueError("環境変数DEEPL_AUTH_KEYが設定されていません。")
+                # 疑似サーバーを使う場合は、DeepLの接続先を置き換える
+                options = {}
+                if get_simulator_url():
+                    options["server_url"] = upstream_url("https://api.deepl.com/")
+                self._client = deepl.Translator(auth_key, **options)
+            return self._client
 
     # 英語のリスト型のデータを日本語に翻訳して、そのリストを返す。
-    def translate_text(self, data:list):
+    # 同じ文は1回だけ翻訳し、件数・文字数で分割したものを並列に翻訳して、元の順番に並べ直す。
+    # deadline を過ぎても翻訳が終わっていない文は、待たずに原文のまま返す。
+    def translate_text(self, data:list, deadline=None):
+        deadline = deadline or NO_DEADLINE
+
         if not isinstance(data, list):
             logger.error("[警告] 入力がリストではありません。翻訳をスキップします。")
             return []
@@ -23,25 +65,96 @@ class Translator():
             logger.error("[情報] 空のリストが渡されました。翻訳をスキップします。")
             return []
 
-        values = []
-
         try:
-            #環境変数からAPIキーを取得
-            auth_key = os.getenv("DEEPL_AUTH_KEY")
-            if not auth_key:
-                raise ValueError("環境変数DEEPL_AUTH_KEYが設定されていません。")
-            translator = deepl.Translator(auth_key)
-
-            # dataを翻訳し、リストに格納
-            results = translator.translate_text(data, target_lang="JA")
+            client = self.get_client()
+        except Exception as e:
+            logger.error(f"[エラー] 翻訳処理中に問題が発生しました: {e}")
+            return []
 
-            for result in results:
-                values.append(result.text)
+        # 元の順番で翻訳結果を返す（翻訳できなかった文・空文字はそのまま）
+        translations = self.translate_with_client(client, data, deadline)
+        return [translations.get(text, text) for text in data]
 
-        except deepl.DeepLException as e:
-            logger.error(f"[エラー] DeepL APIでエラーが発生しました: {e}")
+    # 翻訳できた文だけを {原文: 訳文} の辞書で返す（失敗した文・制限時間内に終わらなかった文は含まない）
+    # 訳文が原文と同じ文（日本語の文・固有名詞など）も含まれるので、翻訳できたかどうかはキーがあるかで判定する。
+    def translate_many(self, data, deadline=None):
+        if not data:
+            return {}
+        try:
+            client = self.get_client()
         except Exception as e:
             logger.error(f"[エラー] 翻訳処理中に問題が発生しました: {e}")
-        
-        return values # 翻訳結果のリストを返す。例外が発生した場合は空のリストを返す。
+            return {}
+        return self.translate_with_client(client, data, deadline or NO_DEADLINE)
+
+    # 同じ文は1回だけ翻訳し、件数・文字数で分割したものを並列に翻訳して、翻訳できた文を {原文: 訳文} で返す
+    # 利用量の予約・記録（データベース）は、呼び出し元のスレッドで行う。
+    # 制限時間内に終わらなかったまとまりは、送信済みかもしれないので予約を取り消さない（予算を超えないように多めに数える）。
+    def translate_with_client(self, client, data, deadline):
+        # 重複と空文字を除いた、翻訳が必要な文のリスト（順番は保つ）
+        unique_texts = [text for text in dict.fromkeys(data) if text]
+        chunks = [chunk for chunk in self.split_into_chunks(unique_texts)
+                  if self.ledger.reserve(sum(len(text) for text in chunk), client)]
+
+        translations = {}
+        if chunks:
+            # 制限時間を過ぎたら終わっていない翻訳を待たないので、with 文は使わずに後始末する
+            executor = ThreadPoolExecutor(max_workers=min(self.max_workers, len(chunks)))
+            futures = {executor.submit(self.translate_chunk, client, chunk, deadline): chunk for chunk in chunks}
+            try:
+                for future in as_completed(futures, timeout=deadline.remaining()):
+                    chunk = futures[future]
+                    characters = sum(len(text) for text in chunk)
+                    results = future.result()
+                    if results is None:
+                        # 翻訳できなかった分は利用量に数えない
+                        self.ledger.release(characters)
+                        self.ledger.record_call(characters, ok=False)
+                    else:
+                        self.ledger.record_call(characters, ok=True)
+                        translations.update(zip(chunk, results))
+            except FuturesTimeoutError:
+                logger.warning("[警告] 制限時間を過ぎたため、翻訳の終わっていない文は原文のまま返します。")
+            finally:
+                executor.shutdown(wait=False, cancel_futures=True)
+        return translations
+
+    # 翻訳する文のリストを、件数と文字数の上限を超えないように分割する
+    def split_into_chunks(self, texts):
+        chunks = []
+        chunk = []
+        chunk_chars = 0
+
+        for text in texts:
+            if chunk and (len(chunk) >= self.max_chunk_size or chunk_chars + len(text) > self.max_chunk_chars):
+                chunks.append(chunk)
+                chunk = []
+                chunk_chars = 0
+            chunk.append(text)
+            chunk_chars += len(text)
+
+        if chunk:
+            chunks.append(chunk)
+        return chunks
 
+    # 1つのまとまりを翻訳する（利用量は予約済み）。失敗した場合や制限時間を過ぎた場合は None を返す（そのまとまりだけ原文のままになる）。
+    def translate_chunk(self, client, chunk, deadline=NO_DEADLINE):
+        for attempt in range(self.max_retries + 1):
+            if deadline.expired():
+                break
+            try:
+                results = client.translate_text(chunk, target_lang="JA")
+                return [result.text for result in results]
+            except self.retryable_exceptions as e:
+                wait = self.backoff_seconds * (2 ** attempt)
+                if attempt == self.max_retries or not deadline.has(wait + self.min_seconds):
+                    logger.error(f"[エラー] DeepL APIでエラーが発生しました（再試行の上限）: {e}")
+                    break
+                time.sleep(wait)
+            except deepl.DeepLException as e:
+                logger.error(f"[エラー] DeepL APIでエラーが発生しました: {e}")
+                break
+            except Exception as e:
+                logger.error(f"[エラー] 翻訳処理中に問題が発生しました: {e}")
+                break
+        return None
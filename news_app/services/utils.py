@@ -1,5 +1,8 @@
 from datetime import datetime, timezone, timedelta
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+import hashlib
 import logging
+from django.conf import settings
 
 
 
@@ -37,4 +40,90 @@ def parse_date(raw_date):
             continue  # 次のフォーマットで試す
 
     logger.error(f"日付のパースに失敗しました（入力: '{raw_date}'）")
-    return None
\ No newline at end of file
+    return None
+
+
+
+# 日本時間
+JST = timezone(timedelta(hours=9))
+
+
+# 各ソースの日付文字列を、タイムゾーン付きの datetime に変換する。
+# 例：
+#     - "2025-03-29T12:00:00Z" (NewsAPIの形式、UTC)
+#     - "2025/03/29 21:00"     (時事メディカル・日本時間に変換済みのNewsAPIの形式、日本時間)
+#     - "2025/03/29"           (日経メディカルの形式、日本時間の0時とみなす)
+# 変換できない場合は None を返す。
+def parse_datetime_jst(raw_date):
+    if not raw_date:
+        return None
+
+    try:
+        return datetime.strptime(raw_date, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+    except (TypeError, ValueError):
+        pass
+
+    for fmt in ["%Y/%m/%d %H:%M", "%Y/%m/%d"]:  # 時刻あり → なし の順に試す
+        try:
+            return datetime.strptime(raw_date, fmt).replace(tzinfo=JST)
+        except (TypeError, ValueError):
+            continue
+
+    logger.error(f"日時のパースに失敗しました（入力: '{raw_date}'）")
+    return None
+
+
+# 負荷試験用の疑似サーバー（python manage.py simulate_upstreams）のURL（未設定なら None）
+def get_simulator_url():
+    return getattr(settings, "UPSTREAM_SIMULATOR_URL", None)
+
+
+# 外部サービス（ニュースサイト・NewsAPI・DeepL）のURLを返す。
+# 設定 UPSTREAM_SIMULATOR_URL がある場合は、ローカルの疑似サーバーのURLに置き換える。ホスト名はパスの先頭に入れる。
+# 例：https://medical.jiji.com/news/?c=medical → http://127.0.0.1:8765/medical.jiji.com/news/?c=medical
+def upstream_url(url):
+    simulator_url = get_simulator_url()
+    if not simulator_url:
+        return url
+
+    parts = urlsplit(url)
+    replaced = f"{simulator_url.rstrip('/')}/{parts.netloc}{parts.path}"
+    if parts.query:
+        replaced += f"?{parts.query}"
+    return replaced
+
+
+# 記事の同一性に関係しないクエリパラメータ（広告・アクセス解析用）
+TRACKING_PARAMS = {"fbclid", "gclid", "yclid", "mc_cid", "mc_eid", "igshid", "ref", "ref_src"}
+
+
+# 記事URLを正規化する（同じ記事を指すURLが同じ文字列になるようにする）
+# スキームとホスト名の小文字化、既定のポート・フラグメント・アクセス解析用のパラメータの削除、
+# 残りのクエリパラメータの並べ替えを行う。
+# 例：HTTPS://Example.com:443/news/1?utm_source=x&b=2&a=1#top → https://example.com/news/1?a=1&b=2
+def normalize_url(url):
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = (parts.hostname or "").lower()
+    try:
+        port = parts.port
+    except ValueError:  # ポート番号が不正な場合は、ポートなしとして扱う
+        port = None
+    if port and (scheme, port) not in (("http", 80), ("https", 443)):
+        netloc += f":{port}"
+    if parts.username:
+        netloc = f"{parts.username}@{netloc}"
+
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    )
+    return urlunsplit((scheme, netloc, parts.path or "/", urlencode(query), ""))
+
+
+# 正規化した記事URLのハッシュ（32文字の16進数）。URLがない場合は None
+# お気に入りの重複チェックや「保存済みか」の判定に使う（URLの長さに関係なく、小さなインデックスで検索できる）。
+def url_hash(url):
+    if not url:
+        return None
+    return hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()[:32]
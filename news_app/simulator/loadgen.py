@@ -0,0 +1,106 @@
+# 負荷試験用のリクエスト生成
+# ログインしたユーザーとして、ニュース一覧・お気に入り一覧のページに指定した並列数でリクエストを送り、
+# スループットとレイテンシのパーセンタイルを集計する。
+
+import logging
+import math
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import cycle
+
+import requests
+
+
+logger = logging.getLogger(__name__)
+
+# 負荷をかけるページ（ニュース一覧とお気に入り一覧）
+DEFAULT_PATHS = ["/foreign_news/", "/nikkei_med/", "/zizi_med/", "/favorite_list/"]
+
+
+# ソート済みのリストから、p パーセンタイルの値を返す（最近傍法）
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    index = max(0, math.ceil(p / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+# ログイン済みのセッションを作る（django-allauth のログインフォームを使う）
+def login(base_url, username, password, timeout=10):
+    session = requests.Session()
+    login_url = f"{base_url}/accounts/login/"
+
+    session.get(login_url, timeout=timeout)
+    response = session.post(login_url, data={
+        "login": username,
+        "password": password,
+        "csrfmiddlewaretoken": session.cookies.get("csrftoken", ""),
+    }, headers={"Referer": login_url}, timeout=timeout)
+
+    if "sessionid" not in session.cookies:
+        raise RuntimeError(f"ログインに失敗しました（ステータス: {response.status_code}）")
+    return session
+
+
+# 1つのワーカーの処理：終了時刻まで、ページを順番にリクエストし続ける
+def run_worker(base_url, session, paths, deadline, results, lock, timeout):
+    for path in cycle(paths):
+        if time.monotonic() >= deadline:
+            break
+
+        started = time.perf_counter()
+        try:
+            status = session.get(f"{base_url}{path}", timeout=timeout).status_code
+        except requests.exceptions.RequestException:
+            status = None  # タイムアウトや接続エラー
+        elapsed = time.perf_counter() - started
+
+        with lock:
+            results.append((path, status, elapsed))
+
+
+# 負荷試験を実行し、結果の集計を返す
+def run_load_test(base_url, username, password, concurrency=10, duration=30, paths=None, timeout=30):
+    base_url = base_url.rstrip("/")
+    paths = paths or DEFAULT_PATHS
+
+    # ワーカーごとにログイン済みのセッションを用意する
+    sessions = [login(base_url, username, password) for _ in range(concurrency)]
+
+    results = []
+    lock = threading.Lock()
+    started = time.monotonic()
+    deadline = started + duration
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for i, session in enumerate(sessions):
+            # ワーカーごとに開始するページをずらす
+            worker_paths = paths[i % len(paths):] + paths[:i % len(paths)]
+            executor.submit(run_worker, base_url, session, worker_paths, deadline, results, lock, timeout)
+
+    return summarize(results, time.monotonic() - started)
+
+
+# 結果を全体・ページごとに集計する
+def summarize(results, elapsed):
+    by_path = defaultdict(list)
+    for path, status, latency in results:
+        by_path[path].append((status, latency))
+        by_path["全体"].append((status, latency))
+
+    summary = {}
+    for path, rows in by_path.items():
+        latencies = sorted(latency for _, latency in rows)
+        errors = sum(1 for status, _ in rows if status is None or status >= 500)
+        summary[path] = {
+            "requests": len(rows),
+            "errors": errors,
+            "throughput": len(rows) / elapsed if elapsed else 0.0,
+            "p50": percentile(latencies, 50),
+            "p90": percentile(latencies, 90),
+            "p99": percentile(latencies, 99),
+            "max": latencies[-1] if latencies else None,
+        }
+    return summary
@@ -0,0 +1,57 @@
+# 疑似サーバー・解析処理のテストで使うページ（fixtures）を、本番のサイトから取得して記録するモジュール
+# record_fixtures コマンドから使う。記録したページは、解析に関係しない要素（script・style・コメントなど）を
+# 取り除いて小さくしてから保存する。記事一覧の構造（タグ・クラス名・入れ子）はそのまま残す。
+
+import json
+import os
+from bs4 import BeautifulSoup, Comment
+from django.utils import timezone
+from .server import FIXTURES_DIR
+
+
+# 記録するページ {ファイル名: 取得するURL}
+FIXTURE_URLS = {
+    "nikkei_med.html": "https://medical.nikkeibp.co.jp/inc/all/article/",
+    "zizi_med.html": "https://medical.jiji.com/news/?c=medical",
+    "newsapi_everything.json": "https://newsapi.org/v2/everything?sortedBy=publishedAt&q=medical",
+}
+
+# 記録するときに取り除く要素（解析に使わないもの）
+REMOVED_TAGS = ("script", "style", "noscript", "iframe", "svg", "link", "form")
+
+# NewsAPI のレスポンスに残す記事数
+MAX_NEWS_ARTICLES = 50
+
+
+# HTMLから解析に関係しない要素を取り除く
+def trim_html(html):
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup.find_all(REMOVED_TAGS):
+        tag.decompose()
+    for comment in soup.find_all(string=lambda text: isinstance(text, Comment)):
+        comment.extract()
+    for meta in soup.find_all("meta"):
+        if not meta.get("charset"):
+            meta.decompose()
+    return str(soup)
+
+
+# NewsAPI のレスポンスを、先頭の MAX_NEWS_ARTICLES 件だけにする
+def trim_json(text):
+    data = json.loads(text)
+    data["articles"] = data.get("articles", [])[:MAX_NEWS_ARTICLES]
+    return json.dumps(data, ensure_ascii=False, indent=2)
+
+
+# 取得した本文を小さくして、記録したURL・日時を付けて保存する（保存したパスを返す）
+def write_fixture(filename, url, text, fixtures_dir=FIXTURES_DIR):
+    if filename.endswith(".json"):
+        body = trim_json(text)
+    else:
+        body = f"<!-- 記録: {url} ({timezone.now():%Y-%m-%d}) -->\n{trim_html(text)}"
+
+    path = os.path.join(fixtures_dir, filename)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(body)
+    return path
+
@@ -0,0 +1,154 @@
+# 外部サービス（日経メディカル・時事メディカル・NewsAPI・DeepL）の代わりをするローカルの疑似サーバー
+# 本番のサービスに負荷をかけずに負荷試験をするために使う。
+# 設定 UPSTREAM_SIMULATOR_URL（環境変数で指定する）にこのサーバーのURLを設定すると、各サービスの接続先が置き換わる。
+# （services.utils.upstream_url を参照。ホスト名がパスの先頭に入る）
+#
+# 遅延・エラー・遅いレスポンス本文を、設定した割合で発生させることができる。
+
+import json
+import logging
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+
+logger = logging.getLogger(__name__)
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+# パスの先頭（＝元のホスト名）と、返すファイルの対応
+# ファイルは record_fixtures コマンドで本番のサイトから記録する（解析処理のテストでも使う）
+# 同梱しているファイルは、記事一覧の構造だけを再現した疑似ページ（各ファイルの先頭のコメントを参照）。
+# サイトの構造が変わっていないかを確かめるときは、本番のサイトに接続できる環境で record_fixtures を実行して置き換える。
+FIXTURES = {
+    "medical.nikkeibp.co.jp": ("nikkei_med.html", "text/html; charset=utf-8"),
+    "medical.jiji.com": ("zizi_med.html", "text/html; charset=utf-8"),
+    "newsapi.org": ("newsapi_everything.json", "application/json; charset=utf-8"),
+}
+
+# DeepLのホスト名（無料版・有料版）
+DEEPL_HOSTS = ("api.deepl.com", "api-free.deepl.com")
+
+# 疑似DeepLの月間の上限文字数
+DEEPL_CHARACTER_LIMIT = 500000
+
+
+# 疑似サーバーの動作設定
+class SimulatorConfig():
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, slow_body_rate=0.0,
+                 slow_body_seconds=2.0, fixtures_dir=FIXTURES_DIR, seed=None):
+        self.latency = latency                      # 応答までの基本の遅延（秒）
+        self.jitter = jitter                        # 遅延のばらつき（秒、0〜jitterの乱数を加える）
+        self.error_rate = error_rate                # 503エラーを返す割合（0〜1）
+        self.slow_body_rate = slow_body_rate        # 本文をゆっくり送る割合（0〜1）
+        self.slow_body_seconds = slow_body_seconds  # ゆっくり送る場合に本文の送信にかける時間（秒）
+        self.fixtures_dir = fixtures_dir
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+
+    # 乱数は複数のスレッドから使うので、ロックを取ってから使う
+    def roll(self):
+        with self.lock:
+            return self.random.random()
+
+    def delay(self):
+        with self.lock:
+            return self.latency + self.random.uniform(0, self.jitter)
+
+
+class UpstreamHandler(BaseHTTPRequestHandler):
+    server_version = "UpstreamSimulator/1.0"
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def config(self):
+        return self.server.config
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+    def do_GET(self):
+        self.handle_request()
+
+    def do_POST(self):
+        self.handle_request()
+
+    def handle_request(self):
+        parts = urlsplit(self.path)
+        host, _, path = parts.path.lstrip("/").partition("/")
+
+        # POSTの本文は、エラーを返す場合でも読み切っておく（接続を使い回すため）
+        body = b""
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            body = self.rfile.read(length)
+
+        time.sleep(self.config.delay())
+
+        if self.config.roll() < self.config.error_rate:
+            self.send_body(503, b'{"message": "simulated error"}', "application/json")
+            return
+
+        if host in DEEPL_HOSTS:
+            self.handle_deepl("/" + path, body)
+        elif host in FIXTURES:
+            filename, content_type = FIXTURES[host]
+            with open(os.path.join(self.config.fixtures_dir, filename), "rb") as f:
+                self.send_body(200, f.read(), content_type)
+        else:
+            self.send_body(404, b"not found", "text/plain")
+
+    # 疑似DeepL：翻訳結果は原文の先頭に [JA] を付けたものを返す
+    def handle_deepl(self, path, body):
+        if path == "/v2/usage":
+            payload = {"character_count": self.server.deepl_characters, "character_limit": DEEPL_CHARACTER_LIMIT}
+        elif path == "/v2/translate":
+            texts = self.parse_texts(body)
+            with self.server.lock:
+                self.server.deepl_characters += sum(len(text) for text in texts)
+            payload = {"translations": [
+                {"detected_source_language": "EN", "text": f"[JA] {text}", "billed_characters": len(text)}
+                for text in texts
+            ]}
+        else:
+            self.send_body(404, b'{"message": "not found"}', "application/json")
+            return
+        self.send_body(200, json.dumps(payload, ensure_ascii=False).encode("utf-8"), "application/json")
+
+    # 翻訳するテキストを取り出す（JSON・フォーム形式のどちらにも対応する）
+    def parse_texts(self, body):
+        if "json" in (self.headers.get("Content-Type") or ""):
+            texts = json.loads(body or b"{}").get("text", [])
+        else:
+            texts = parse_qs(body.decode("utf-8")).get("text", [])
+        return [texts] if isinstance(texts, str) else list(texts)
+
+    # レスポンスを送る。設定した割合で、本文を少しずつゆっくり送る
+    def send_body(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+
+        if status == 200 and self.config.roll() < self.config.slow_body_rate:
+            pieces = 10
+            size = max(1, len(body) // pieces)
+            for start in range(0, len(body), size):
+                self.wfile.write(body[start:start + size])
+                self.wfile.flush()
+                time.sleep(self.config.slow_body_seconds / pieces)
+        else:
+            self.wfile.write(body)
+
+
+# 疑似サーバーを作る（port=0 の場合は空いているポートを使う）
+def make_server(host="127.0.0.1", port=8765, config=None):
+    server = ThreadingHTTPServer((host, port), UpstreamHandler)
+    server.daemon_threads = True
+    server.config = config or SimulatorConfig()
+    server.deepl_characters = 0
+    server.lock = threading.Lock()
+    return server
@@ -0,0 +1,45 @@
+from django import template
+from django.utils.safestring import mark_safe
+from ..services.analytics import tracked_url
+from ..services.export import user_state_marker as export_user_state_marker
+
+
+register = template.Library()
+
+
+# ビューが1ページ分まとめて調べた {記事URL: ID} から、記事URLの ID を返す（ない場合は None）
+def lookup(mapping, url):
+    if not isinstance(mapping, dict) or not url:
+        return None
+    return mapping.get(url)
+
+
+# 記事URLが保存済みなら、そのお気に入りのIDを返す（services/favorites.py を参照）
+# 例：{% saved_article_id saved article.3 as saved_id %}
+@register.simple_tag
+def saved_article_id(saved, url):
+    return lookup(saved, url)
+
+
+# 記事URLが未読なら、その記事の id を返す（services/readstate.py を参照）
+# 例：{% unread_item_id unread article.3 as unread_id %}
+@register.simple_tag
+def unread_item_id(unread, url):
+    return lookup(unread, url)
+
+
+# 「記事を読む」のリンク（クリックを記録する転送用のURL。services/analytics.py を参照）
+# 例：<a href="{% read_article_url article.3 "nikkei_med" %}">
+@register.simple_tag
+def read_article_url(url, source):
+    return tracked_url(url, source)
+
+
+# 書き出すページで、ユーザーごとの表示（未読・保存済み）を後から差し込む位置の印（services/export.py を参照）
+# ページを書き出すとき（user_state_markers が True）だけ出力する。
+# 例：{% user_state_marker "unread" article.3 %}
+@register.simple_tag(takes_context=True)
+def user_state_marker(context, kind, url=""):
+    if not context.get("user_state_markers"):
+        return ""
+    return mark_safe(export_user_state_marker(kind, url))
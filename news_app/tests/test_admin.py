@@ -0,0 +1,108 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from unittest.mock import patch
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from news_app.models import Article
+from news_app.paginators import EstimatedCountPaginator
+
+
+# お気に入り（Article）の管理画面のテスト
+class ArticleAdminTests(TestCase):
+    def setUp(self):
+        self.admin_user = get_user_model().objects.create_superuser(username="admin", password="pass", email="admin@example.com")
+        self.user = get_user_model().objects.create_user(username="user", password="pass")
+        self.client.login(username="admin", password="pass")
+        self.article = Article.objects.create(user=self.user, article_title="記事1", article_url="https://example.com/news?a=1&b=2")
+        Article.objects.create(user=self.user, article_title="記事2", article_url="https://example.com/other")
+
+    # 正常系：一覧が表示され、ユーザーはまとめて読み込まれるか（件数によってクエリ数が増えない）
+    def test_changelist_uses_select_related(self):
+        url = reverse("admin:news_app_article_changelist")
+        self.client.get(url)  # セッション等の初回の読み込みを済ませる
+        with self.assertNumQueries(4):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "記事1")
+
+        for i in range(5):
+            Article.objects.create(user=self.user, article_title=f"追加{i}", article_url=f"https://example.com/{i}")
+        with self.assertNumQueries(4):
+            self.client.get(url)
+
+    # 正常系：ユーザー名のリンク（user__id__exact）で、そのユーザーのお気に入りだけに絞り込め、件数を数え直さないか
+    @override_settings(ADMIN_EXACT_COUNT_LIMIT=100)
+    @patch("news_app.paginators.estimate_count", return_value=5000000)
+    def test_changelist_filtered_by_user(self, mock_estimate):
+        other = get_user_model().objects.create_user(username="other", password="pass")
+        Article.objects.create(user=other, article_title="他のユーザーの記事", article_url="https://example.com/o")
+
+        changelist = self.client.get(reverse("admin:news_app_article_changelist"))
+        link = reverse("admin:news_app_article_changelist") + f"?user__id__exact={self.user.pk}"
+        self.assertContains(changelist, link.replace("&", "&amp;"))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(link)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({article.user_id for article in response.context["cl"].result_list}, {self.user.pk})
+        self.assertEqual(len(response.context["cl"].result_list), 2)
+        self.assertFalse([query["sql"] for query in queries if "COUNT(" in query["sql"].upper()])
+
+    # 正常系：URLの表記が違っても、正規化したURLのハッシュで検索できるか
+    def test_search_by_url(self):
+        response = self.client.get(reverse("admin:news_app_article_changelist"), {"q": "https://EXAMPLE.com/news?b=2&a=1&utm_source=x"})
+        self.assertEqual(list(response.context["cl"].result_list), [self.article])
+
+    # 正常系：ユーザー名・IDで検索できるか
+    def test_search_by_username_and_id(self):
+        response = self.client.get(reverse("admin:news_app_article_changelist"), {"q": "user"})
+        self.assertEqual(len(response.context["cl"].result_list), 2)
+
+        response = self.client.get(reverse("admin:news_app_article_changelist"), {"q": str(self.article.pk)})
+        self.assertEqual(list(response.context["cl"].result_list), [self.article])
+
+    # 正常系：一括削除が、指定した件数ずつ行われるか
+    @patch("news_app.admin.ACTION_BATCH_SIZE", 1)
+    def test_delete_in_batches(self):
+        response = self.client.post(reverse("admin:news_app_article_changelist"), {
+            "action": "delete_in_batches",
+            "_selected_action": list(Article.objects.values_list("pk", flat=True)),
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Article.objects.exists())
+
+    # 正常系：標準の削除（全件を読み込む確認画面）は使えないか
+    def test_default_delete_action_is_removed(self):
+        response = self.client.get(reverse("admin:news_app_article_changelist"))
+        self.assertNotIn("delete_selected", [name for name, _ in response.context["action_form"].fields["action"].choices])
+
+    # 正常系：ユーザーの管理画面が表示され、ユーザー名の完全一致で検索できるか
+    def test_user_changelist_search(self):
+        response = self.client.get(reverse("admin:accounts_customuser_changelist"), {"q": "user"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context["cl"].result_list), [self.user])
+        self.assertFalse(response.context["cl"].has_filters)  # インデックスのない列での絞り込みは表示しない
+
+
+# EstimatedCountPaginator のテスト
+class EstimatedCountPaginatorTests(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user(username="user", password="pass")
+        for i in range(3):
+            Article.objects.create(user=user, article_url=f"https://example.com/{i}")
+
+    # 正常系：推定件数が上限を超える場合は、推定件数を使うか
+    @override_settings(ADMIN_EXACT_COUNT_LIMIT=100)
+    @patch("news_app.paginators.estimate_count", return_value=5000000)
+    def test_uses_estimate_for_large_tables(self, mock_estimate):
+        paginator = EstimatedCountPaginator(Article.objects.order_by("pk"), 50)
+        self.assertEqual(paginator.count, 5000000)
+
+    # 正常系：推定件数が少ない場合や、推定できない場合は正確に数えるか
+    @override_settings(ADMIN_EXACT_COUNT_LIMIT=100)
+    def test_counts_exactly_for_small_tables(self):
+        with patch("news_app.paginators.estimate_count", return_value=50):
+            self.assertEqual(EstimatedCountPaginator(Article.objects.order_by("pk"), 50).count, 3)
+        # SQLite では推定できないので、正確に数える
+        self.assertEqual(EstimatedCountPaginator(Article.objects.order_by("pk"), 50).count, 3)
@@ -43,6 +43,18 @@ class AddFavoriteFormTest(TestCase):
         self.assertIn('article_url', form.errors)
         self.assertEqual(form.errors['article_url'][0], "この記事はすでに登録されています。")
 
+    # 異常系：アクセス解析用のパラメータなどが違うだけの同じURLもエラー
+    def test_duplicate_url_variant_same_user_invalid(self):
+        form_data = {
+            'article_title': 'ダブり',
+            'article_url': 'https://EXAMPLE.com/article?utm_source=mail#top',
+            'published_at': '2025-03-30',
+            'memo': 'test'
+        }
+        form = AddFavoriteForm(data=form_data, user=self.user)
+        self.assertFalse(form.is_valid())
+        self.assertEqual(form.errors['article_url'][0], "この記事はすでに登録されています。")
+
     # 正常系：他のユーザーが同じURLなら登録できる
     def test_same_url_different_user_valid(self):
         form_data = {
@@ -0,0 +1,111 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from unittest.mock import patch
+from news_app.middleware import get_slot
+from news_app.services.snapshots import write_snapshot
+import json
+import os
+import tempfile
+from news_app.services.ingest import clear_recent
+
+
+# AdmissionControlMiddleware のテスト
+@override_settings(ADMISSION_LIMITS={"feeds": 1, "favorites": 1}, ADMISSION_WAIT_SECONDS=0, ADMISSION_RETRY_AFTER=7)
+class AdmissionControlMiddlewareTests(TestCase):
+    def setUp(self):
+        clear_recent()  # 前のテストで取り込んだ結果を使わない
+        self.user = get_user_model().objects.create_user(username="user", password="pass")
+        self.client.login(username="user", password="pass")
+
+    # 外部サービスから記事を取得するビューの枠をすべて使う
+    def hold_feeds_slot(self):
+        slot = get_slot("feeds")
+        self.assertTrue(slot.acquire(blocking=False))
+        self.addCleanup(slot.release)
+
+    # 異常系：上限を超え、保存済みの記事一覧もない場合は、すぐに 503 と Retry-After を返すか
+    @patch('news_app.views.scraping_NikkeiMed')
+    def test_rejects_when_limit_is_reached(self, mock_scraping):
+        self.hold_feeds_slot()
+
+        response = self.client.get(reverse('news_app:nikkei_med'))
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "7")
+        mock_scraping.assert_not_called()
+
+    # 正常系：記事取得のビューが上限に達していても、お気に入り一覧は表示できるか
+    def test_favorites_are_not_affected(self):
+        self.hold_feeds_slot()
+
+        response = self.client.get(reverse('news_app:favorite_list'))
+
+        self.assertEqual(response.status_code, 200)
+
+    # 正常系：上限を超えても、保存済みの記事一覧があれば、取得せずにそれで表示するか
+    @patch('news_app.views.scraping_NikkeiMed')
+    def test_serves_snapshot_when_limit_is_reached(self, mock_scraping):
+        self.hold_feeds_slot()
+        articles = [["保存済みの記事", "2025/03/30", "タグ", "https://example.com/1", ""]]
+
+        with tempfile.TemporaryDirectory() as snapshot_dir:
+            with override_settings(FEED_SNAPSHOT_DIR=snapshot_dir):
+                write_snapshot("nikkei_med", articles, "v1")
+                response = self.client.get(reverse('news_app:nikkei_med'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "保存済みの記事")
+        mock_scraping.assert_not_called()
+
+    # 正常系：リクエストが終わると枠が返されるか
+    @patch('news_app.views.scraping_NikkeiMed', return_value=[])
+    def test_releases_slot_after_response(self, mock_scraping):
+        self.client.get(reverse('news_app:nikkei_med'))
+        response = self.client.get(reverse('news_app:nikkei_med'))
+
+        self.assertEqual(response.status_code, 200)
+        self.hold_feeds_slot()  # 枠が空いていれば取得できる
+
+    # 正常系：ストリーミングの場合は、送信し終わるまで枠を使うか
+    @patch("news_app.services.feeds.fetch_news_from_api", return_value=[])
+    @patch("news_app.services.feeds.scraping_ZiziMed", return_value=[])
+    @patch("news_app.services.feeds.scraping_NikkeiMed", return_value=[])
+    def test_streaming_holds_slot_until_sent(self, mock_nikkei, mock_zizi, mock_api):
+        response = self.client.get(reverse("news_app:feed_stream"))
+        self.assertFalse(get_slot("feeds").acquire(blocking=False))  # 送信中は枠が埋まっている
+
+        b"".join(response.streaming_content)
+        self.hold_feeds_slot()
+
+
+# MemoryProfileMiddleware のテスト
+class MemoryProfileMiddlewareTests(TestCase):
+    def setUp(self):
+        clear_recent()  # 前のテストで取り込んだ結果を使わない
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.report_dir = tmp.name
+        self.user = get_user_model().objects.create_user(username="user", password="pass")
+        self.client.login(username="user", password="pass")
+
+    # 正常系：スタッフが memprofile=1 を付けると、レポートが書き出されるか
+    def test_staff_query_flag_writes_report(self):
+        self.user.is_staff = True
+        self.user.save()
+
+        with override_settings(MEMORY_PROFILE_DIR=self.report_dir):
+            response = self.client.get(reverse('news_app:favorite_list'), {"memprofile": "1"})
+
+        self.assertEqual(response.status_code, 200)
+        reports = os.listdir(self.report_dir)
+        self.assertEqual(len(reports), 1)
+        with open(os.path.join(self.report_dir, reports[0]), encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["view"], "FavoriteListView")
+
+    # 異常系：スタッフでない場合は、memprofile=1 を付けてもレポートは書き出されないか
+    def test_non_staff_is_not_profiled(self):
+        with override_settings(MEMORY_PROFILE_DIR=self.report_dir):
+            self.client.get(reverse('news_app:favorite_list'), {"memprofile": "1"})
+
+        self.assertEqual(os.listdir(self.report_dir), [])
@@ -4,6 +4,12 @@ from django.utils.timezone import now
 from accounts.models import CustomUser
 from news_app.models import Article
 from datetime import date
+from django.apps import apps
+from django.db import connection
+from types import SimpleNamespace
+from news_app.services.utils import url_hash
+import importlib
+from unittest.mock import patch
 
 
 class ArticleModelTest(TestCase):
@@ -72,3 +78,64 @@ class ArticleModelTest(TestCase):
             )
         except IntegrityError:
             self.fail("別のユーザーなのに、ユニーク制約エラー（IntegrityError）が予期せず発生しました。")
+
+    # 正常系：保存時に、正規化したURLのハッシュが計算されるか
+    def test_url_hash_is_computed_on_save(self):
+        article = Article.objects.create(user=self.user, article_url="https://example.com/a?utm_source=x")
+        self.assertEqual(article.url_hash, url_hash("https://example.com/a"))
+
+        article.article_url = "https://example.com/b"
+        article.save(update_fields=["article_url"])
+        article.refresh_from_db()
+        self.assertEqual(article.url_hash, url_hash("https://example.com/b"))
+        self.assertTrue(Article.objects.with_url("https://example.com/b#top").filter(pk=article.pk).exists())
+
+    # 異常系2：クエリパラメータの順番が違うだけの同じURLも保存できない
+    def test_duplicate_url_variant_for_same_user_raises_integrity_error(self):
+        Article.objects.create(user=self.user, article_url="https://example.com/news?a=1&b=2")
+
+        with self.assertRaises(IntegrityError):
+            Article.objects.create(user=self.user, article_url="https://example.com/news?b=2&a=1")
+
+
+# url_hash を埋めるデータ移行のテスト
+class BackfillUrlHashTest(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='testuser', password='testpass')
+        self.migration = importlib.import_module("news_app.migrations.0006_backfill_article_url_hash")
+
+    # 正常系：ハッシュが埋められ、正規化すると重複するお気に入りは最初のものだけにハッシュが入るか
+    def test_backfill(self):
+        first = Article.objects.create(user=self.user, article_url="https://example.com/news?a=1&b=2")
+        other = Article.objects.create(user=self.user, article_url="https://example.com/other")
+        # 移行前の状態（ハッシュなし・URLの表記だけが違う重複あり）を作る
+        duplicate = Article.objects.create(user=self.user, article_url="https://example.com/placeholder")
+        Article.objects.filter(pk=duplicate.pk).update(article_url="https://example.com/news?b=2&a=1")
+        Article.objects.update(url_hash=None)
+
+        with patch.object(self.migration, "BATCH_SIZE", 2):  # 複数のバッチに分かれるようにする
+            self.migration.backfill_url_hash(apps, SimpleNamespace(connection=connection))
+
+        hashes = dict(Article.objects.values_list("pk", "url_hash"))
+        self.assertEqual(hashes[first.pk], url_hash("https://example.com/news?a=1&b=2"))
+        self.assertEqual(hashes[other.pk], url_hash("https://example.com/other"))
+        self.assertIsNone(hashes[duplicate.pk])
+
+    # 正常系：url_hash が空のままの重複は、最初のお気に入りにメモなどを引き継いでまとめられるか
+    def test_merge_duplicates(self):
+        first = Article.objects.create(user=self.user, article_url="https://example.com/news?a=1&b=2", memo="最初のメモ")
+        duplicate = Article.objects.create(user=self.user, article_url="https://example.com/placeholder",
+                                           memo="重複のメモ", article_img_url="https://example.com/img.jpg")
+        other = Article.objects.create(user=self.user, article_url="https://example.com/other")
+        Article.objects.filter(pk=duplicate.pk).update(article_url="https://example.com/news?b=2&a=1", url_hash=None)
+        Article.objects.filter(pk=other.pk).update(url_hash=None)
+
+        merge = importlib.import_module("news_app.migrations.0017_merge_duplicate_favorites")
+        merge.merge_duplicate_favorites(apps, SimpleNamespace(connection=connection))
+
+        self.assertFalse(Article.objects.filter(pk=duplicate.pk).exists())
+        first.refresh_from_db()
+        self.assertEqual(first.memo, "最初のメモ\n重複のメモ")
+        self.assertEqual(first.article_img_url, "https://example.com/img.jpg")
+        self.assertEqual(Article.objects.get(pk=other.pk).url_hash, url_hash("https://example.com/other"))
+        self.assertFalse(Article.objects.filter(url_hash__isnull=True).exists())
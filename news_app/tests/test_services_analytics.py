@@ -0,0 +1,116 @@
+from datetime import datetime, timedelta
+from io import StringIO
+from unittest.mock import patch
+from django.contrib.auth import get_user_model
+from django.core.management import call_command, CommandError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from news_app.models import AnalyticsEvent, DailySourceStats
+from news_app.services.analytics import EventBuffer, tracked_url, read_tracked_url, rollup_day, prune_events
+from news_app.services.utils import url_hash
+
+
+# EventBufferクラスのテスト
+@override_settings(ANALYTICS_ENABLED=True, ANALYTICS_BATCH_SIZE=3, ANALYTICS_MAX_BUFFERED=5)
+class EventBufferTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="user", password="pass")
+        self.buffer = EventBuffer()
+        # バックグラウンドのスレッドは開始せず、flush を直接呼ぶ
+        patcher = patch.object(self.buffer, "ensure_flusher")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    # 正常系：記録はバッファに追加されるだけで、flush でまとめて書き込まれるか
+    def test_record_then_flush(self):
+        with self.assertNumQueries(0):
+            self.buffer.record("click", "nikkei_med", self.user, "https://example.com/1?utm_source=x")
+            self.buffer.record("view", "nikkei_med", self.user)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.buffer.flush(), 2)
+
+        click = AnalyticsEvent.objects.get(kind="click")
+        self.assertEqual((click.source, click.user, click.url_hash), ("nikkei_med", self.user, url_hash("https://example.com/1")))
+        self.assertEqual(self.buffer.flush(), 0)  # 書き込んだ記録は残らない
+
+    # 正常系：ANALYTICS_BATCH_SIZE 件たまると、書き込むスレッドを起こすか
+    def test_wakes_flusher_when_batch_is_full(self):
+        for _ in range(2):
+            self.buffer.record("view", "zizi_med")
+        self.assertFalse(self.buffer.wakeup.is_set())
+
+        self.buffer.record("view", "zizi_med")
+        self.assertTrue(self.buffer.wakeup.is_set())
+
+    # 異常系：上限を超えた記録は捨てるか
+    def test_drops_events_over_limit(self):
+        for _ in range(7):
+            self.buffer.record("view", "zizi_med")
+
+        with self.assertLogs("news_app.services.analytics", level="WARNING"):
+            self.assertEqual(self.buffer.flush(), 5)
+
+    # 異常系：記録しない設定の場合は、何もしないか
+    @override_settings(ANALYTICS_ENABLED=False)
+    def test_disabled(self):
+        self.buffer.record("view", "zizi_med")
+        self.assertEqual(self.buffer.flush(), 0)
+
+
+# 「記事を読む」のリンクのテスト
+class TrackedUrlTests(TestCase):
+    # 正常系：署名付きのリンクから、記事のURLとソース名を取り出せるか
+    @override_settings(ANALYTICS_ENABLED=True)
+    def test_round_trip(self):
+        url = tracked_url("https://example.com/1", "nikkei_med")
+        token = url.split("?t=", 1)[1]
+
+        self.assertTrue(url.startswith("/go/?t="))
+        self.assertEqual(read_tracked_url(token), ("https://example.com/1", "nikkei_med"))
+        self.assertIsNone(read_tracked_url(token + "x"))  # 改ざんされたリンク
+
+    # 正常系：記録しない設定の場合は、記事のURLをそのまま返すか
+    def test_disabled_returns_article_url(self):
+        self.assertEqual(tracked_url("https://example.com/1", "nikkei_med"), "https://example.com/1")
+
+
+# 日ごとの集計のテスト
+class RollupTests(TestCase):
+    def setUp(self):
+        self.users = [get_user_model().objects.create_user(username=f"user{i}", password="pass") for i in range(2)]
+        self.today = timezone.localdate()
+        noon = timezone.make_aware(datetime.combine(self.today, datetime.min.time())) + timedelta(hours=12)
+        AnalyticsEvent.objects.bulk_create([
+            AnalyticsEvent(kind="click", source="nikkei_med", user=self.users[0], created_at=noon),
+            AnalyticsEvent(kind="click", source="nikkei_med", user=self.users[0], created_at=noon),
+            AnalyticsEvent(kind="click", source="nikkei_med", user=self.users[1], created_at=noon),
+            AnalyticsEvent(kind="view", source="zizi_med", user=self.users[1], created_at=noon),
+            AnalyticsEvent(kind="view", source="zizi_med", user=self.users[1], created_at=noon - timedelta(days=3)),
+        ])
+
+    # 正常系：ソースごと・種類ごとに件数とユーザー数が集計され、2回目は上書きされるか
+    def test_rollup_day(self):
+        self.assertEqual(rollup_day(self.today), 2)
+        self.assertEqual(rollup_day(self.today), 2)
+
+        stats = DailySourceStats.objects.get(date=self.today, source="nikkei_med", kind="click")
+        self.assertEqual((stats.count, stats.users), (3, 2))
+        self.assertEqual(DailySourceStats.objects.count(), 2)
+
+    # 正常系：指定した日より前の記録だけが削除されるか
+    def test_prune_events(self):
+        with patch("news_app.services.analytics.PRUNE_BATCH_SIZE", 1):
+            self.assertEqual(prune_events(self.today - timedelta(days=1)), 1)
+        self.assertEqual(AnalyticsEvent.objects.count(), 4)
+
+    # 正常系：コマンドで集計と古い記録の削除ができ、集計前の記録は削除させないか
+    def test_command(self):
+        out = StringIO()
+        call_command("rollup_analytics", "--days", "2", "--prune-days", "2", stdout=out)
+
+        self.assertIn("2件の集計を保存しました", out.getvalue())
+        self.assertEqual(AnalyticsEvent.objects.count(), 4)
+
+        with self.assertRaises(CommandError):
+            call_command("rollup_analytics", "--days", "3", "--prune-days", "1", stdout=out)
@@ -0,0 +1,100 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+from django.test import override_settings
+from ..services import archive
+from ..services.sources import fetch_html
+from ..services.newsAPI import fetch_news_data
+
+
+def make_response(body, status=200):
+    response = MagicMock()
+    response.content = body
+    response.status_code = status
+    response.encoding = "utf-8"
+    return response
+
+
+class ArchiveTestCase(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.archive_dir = tmp.name
+
+
+# record関数・replay_text関数のテスト
+class TestRecordAndReplay(ArchiveTestCase):
+    # 正常系：同じ内容は1回だけ保存され、取得の記録は毎回残るか
+    def test_same_content_stored_once(self):
+        with override_settings(UPSTREAM_ARCHIVE_DIR=self.archive_dir):
+            archive.record("https://example.com/a", make_response("本文".encode("utf-8")))
+            archive.record("https://example.com/a", make_response("本文".encode("utf-8")))
+            log = list(archive.iter_log())
+
+        self.assertEqual(len(log), 2)
+        self.assertEqual(log[0]["hash"], log[1]["hash"])
+        objects = [f for _, _, files in os.walk(os.path.join(self.archive_dir, "objects")) for f in files]
+        self.assertEqual(objects, [log[0]["hash"]])
+
+    # 正常系：そのURLで最後に正常に取得した本文が返されるか
+    def test_replay_latest_successful_body(self):
+        with override_settings(UPSTREAM_ARCHIVE_DIR=self.archive_dir):
+            archive.record("https://example.com/a", make_response(b"old"))
+            archive.record("https://example.com/a", make_response(b"new"))
+            archive.record("https://example.com/a", make_response(b"error", status=503))
+            self.assertEqual(archive.replay_text("https://example.com/a"), "new")
+            self.assertIsNone(archive.replay_text("https://example.com/unknown"))
+
+    # 正常系：取得の記録は1回だけ読み、その後に追記された記録も再生に使われるか
+    def test_replay_reads_log_once(self):
+        with override_settings(UPSTREAM_ARCHIVE_DIR=self.archive_dir):
+            archive.record("https://example.com/a", make_response(b"a"))
+            archive.record("https://example.com/b", make_response(b"b"))
+
+            with patch("news_app.services.archive.open", side_effect=open) as mock_open:
+                self.assertEqual(archive.replay_text("https://example.com/a"), "a")
+                self.assertEqual(archive.replay_text("https://example.com/b"), "b")
+            log_reads = [c for c in mock_open.call_args_list if c.args[0].endswith(archive.LOG_FILENAME)]
+            self.assertEqual(len(log_reads), 1)
+
+            archive.record("https://example.com/a", make_response(b"a2"))
+            self.assertEqual(archive.replay_text("https://example.com/a"), "a2")
+            self.assertEqual(archive.replay_text("https://example.com/b"), "b")
+
+    # 正常系：保存先が未設定なら何もしないか
+    def test_disabled_without_archive_dir(self):
+        with override_settings(UPSTREAM_ARCHIVE_DIR=None):
+            archive.record("https://example.com/a", make_response(b"body"))
+            self.assertFalse(archive.replay_enabled())
+        self.assertEqual(os.listdir(self.archive_dir), [])
+
+
+# 各サービスの取得処理との組み合わせのテスト
+class TestFetchWithArchive(ArchiveTestCase):
+    # 正常系：取得したページが保存され、再生モードではネットワークに接続せずに同じ内容が返されるか
+    @patch('news_app.services.sources.requests.get')
+    def test_fetch_html_record_then_replay(self, mock_get):
+        mock_get.return_value = make_response("<html>記事</html>".encode("utf-8"))
+        mock_get.return_value.text = "<html>記事</html>"
+
+        with override_settings(UPSTREAM_ARCHIVE_DIR=self.archive_dir):
+            self.assertEqual(fetch_html("https://medical.jiji.com/news/"), "<html>記事</html>")
+        with override_settings(UPSTREAM_ARCHIVE_DIR=self.archive_dir, UPSTREAM_REPLAY=True):
+            self.assertEqual(fetch_html("https://medical.jiji.com/news/"), "<html>記事</html>")
+
+        self.assertEqual(mock_get.call_count, 1)
+
+    # 正常系：NewsAPIのレスポンスも、クエリパラメータを含めたURLで保存・再生されるか
+    @patch('news_app.services.newsAPI.requests.get')
+    def test_fetch_news_data_record_then_replay(self, mock_get):
+        mock_get.return_value = make_response(b'{"articles": [{"title": "Title"}]}')
+        mock_get.return_value.json.return_value = {"articles": [{"title": "Title"}]}
+
+        with override_settings(UPSTREAM_ARCHIVE_DIR=self.archive_dir):
+            fetch_news_data()
+            self.assertIn("q=medical", next(archive.iter_log())["url"])
+        with override_settings(UPSTREAM_ARCHIVE_DIR=self.archive_dir, UPSTREAM_REPLAY=True):
+            self.assertEqual(fetch_news_data(), [{"title": "Title"}])
+
+        self.assertEqual(mock_get.call_count, 1)
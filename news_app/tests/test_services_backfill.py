@@ -0,0 +1,176 @@
+from datetime import datetime
+from io import StringIO
+from unittest.mock import patch
+from django.contrib.auth import get_user_model
+from django.core.management import call_command, CommandError
+from django.test import TestCase
+from django.urls import reverse
+from news_app.models import BackfillProgress, FeedItem
+from news_app.services.backfill import RateLimiter, archive_page_url, backfill_source, fetch_page
+from news_app.services.utils import JST, url_hash
+
+
+# 過去の記事一覧のページ（時事メディカルの形式 [タイトル, 日付, URL, 画像]）
+def make_page(page, count=2):
+    return [[f"記事{page}-{i}", "2025/03/30", f"https://medical.jiji.com/news/?id={page}-{i}", ""] for i in range(count)]
+
+
+# backfill_source関数のテスト
+class BackfillSourceTests(TestCase):
+    def run_backfill(self, pages, **kwargs):
+        calls = []
+
+        def fake_fetch_page(name, page, limiter):
+            calls.append(page)
+            return pages(page)
+
+        with patch("news_app.services.backfill.fetch_page", side_effect=fake_fetch_page):
+            added = backfill_source("zizi_med", workers=2, limiter=RateLimiter(0), **kwargs)
+        return added, sorted(calls)
+
+    # 正常系：記事がないページまで取り込み、まとめて登録して完了になるか
+    def test_backfills_until_empty_page(self):
+        added, _ = self.run_backfill(lambda page: make_page(page) if page <= 3 else [], batch_size=3)
+
+        self.assertEqual(added, 6)
+        self.assertEqual(FeedItem.objects.filter(source="zizi_med").count(), 6)
+        progress = BackfillProgress.objects.get(source="zizi_med")
+        self.assertTrue(progress.finished)
+        self.assertEqual((progress.next_page, progress.items), (4, 6))
+
+        # 完了したソースは取得しない
+        added, calls = self.run_backfill(make_page)
+        self.assertEqual((added, calls), (0, []))
+
+    # 正常系：中断したところから続きを取り込み、重複して登録しないか
+    def test_resumes_from_checkpoint(self):
+        pages = lambda page: make_page(page) if page <= 4 else []
+
+        added, calls = self.run_backfill(pages, max_pages=2)
+        self.assertEqual((added, calls), (4, [1, 2]))
+        self.assertEqual(BackfillProgress.objects.get(source="zizi_med").next_page, 3)
+
+        added, calls = self.run_backfill(pages)
+        self.assertEqual(added, 4)
+        self.assertEqual(calls[0], 3)
+        self.assertEqual(FeedItem.objects.count(), 8)
+
+        # 1ページ目から取り込み直しても重複しない
+        added, _ = self.run_backfill(pages, restart=True)
+        self.assertEqual(added, 0)
+        self.assertEqual(FeedItem.objects.count(), 8)
+
+    # 異常系：取得に失敗した場合は、そこまでの記事を登録して中断し、次回はそのページから取り込むか
+    def test_stops_on_fetch_failure(self):
+        added, _ = self.run_backfill(lambda page: None if page == 2 else make_page(page))
+
+        self.assertEqual(added, 2)
+        progress = BackfillProgress.objects.get(source="zizi_med")
+        self.assertFalse(progress.finished)
+        self.assertEqual(progress.next_page, 2)
+
+    # 異常系：ページ番号に関係なく同じ記事一覧を返すサイトでも、止まらなくならないか
+    def test_repeated_page_finishes(self):
+        added, _ = self.run_backfill(lambda page: make_page(1))
+
+        self.assertEqual(added, 2)
+        self.assertTrue(BackfillProgress.objects.get(source="zizi_med").finished)
+
+    # 正常系：通常の取り込みで登録済みの記事は、登録し直さないか
+    def test_skips_registered_items(self):
+        url = "https://medical.jiji.com/news/?id=1-0"
+        FeedItem.objects.create(source="zizi_med", url=url, url_hash=url_hash(url))
+        added, _ = self.run_backfill(lambda page: make_page(1, count=1) if page == 1 else [])
+
+        self.assertEqual(added, 0)
+        self.assertEqual(FeedItem.objects.count(), 1)
+
+    # 異常系：他のプロセスが取り込み中の場合は、何もしないか
+    def test_skips_when_not_leader(self):
+        with patch("news_app.services.backfill.leader_lease") as mock_lease:
+            mock_lease.return_value.__enter__.return_value = False
+            added, calls = self.run_backfill(make_page)
+
+        self.assertEqual((added, calls), (0, []))
+        self.assertFalse(BackfillProgress.objects.exists())
+
+
+# 過去の記事の一覧（FeedArchiveView）のテスト
+class FeedArchiveViewTests(TestCase):
+    def setUp(self):
+        get_user_model().objects.create_user(username="user", password="pass")
+        self.client.login(username="user", password="pass")
+
+    # 正常系：遡って取り込んだ記事が、日付・画像も含めて公開日時の新しい順に表示されるか
+    def test_backfilled_items_are_listed(self):
+        pages = {
+            1: [["新しい記事", "2025/03/30", "https://medical.jiji.com/news/?id=2", "https://medical.jiji.com/img/2.jpg"]],
+            2: [["古い記事", "2025/01/15", "https://medical.jiji.com/news/?id=1", ""]],
+        }
+        with patch("news_app.services.backfill.fetch_page", side_effect=lambda name, page, limiter: pages.get(page, [])):
+            backfill_source("zizi_med", workers=1, limiter=RateLimiter(0))
+
+        item = FeedItem.objects.get(url="https://medical.jiji.com/news/?id=2")
+        self.assertEqual(item.article, pages[1][0])
+        self.assertEqual(item.published_at, datetime(2025, 3, 30, tzinfo=JST))
+
+        response = self.client.get(reverse("news_app:feed_archive", args=["zizi_med"]))
+        self.assertEqual(response.status_code, 200)
+        content = response.content.decode()
+        self.assertIn("2025/01/15", content)
+        self.assertIn("https%3A//medical.jiji.com/img/2.jpg", content)
+        self.assertLess(content.index("新しい記事"), content.index("古い記事"))
+
+    # 異常系：過去の記事を取り込まないソースは 404 を返すか
+    def test_unknown_source(self):
+        response = self.client.get(reverse("news_app:feed_archive", args=["foreign_news"]))
+        self.assertEqual(response.status_code, 404)
+
+
+# fetch_page関数のテスト
+class FetchPageTests(TestCase):
+    # 異常系：取得に失敗した場合は None を返すか
+    @patch("news_app.services.backfill.fetch_html", return_value=None)
+    def test_fetch_failure(self, mock_fetch):
+        self.assertIsNone(fetch_page("zizi_med", 3, RateLimiter(0)))
+        mock_fetch.assert_called_once_with(archive_page_url("zizi_med", 3))
+
+    # 正常系：ページ番号がURLに入るか
+    def test_archive_page_url(self):
+        self.assertEqual(archive_page_url("zizi_med", 3), "https://medical.jiji.com/news/?c=medical&pageNo=3")
+
+
+# RateLimiterクラスのテスト
+class RateLimiterTests(TestCase):
+    # 正常系：同じホストは間隔をあけ、違うホストは待たないか
+    @patch("news_app.services.backfill.time.sleep")
+    @patch("news_app.services.backfill.time.monotonic", return_value=100.0)
+    def test_waits_per_host(self, mock_monotonic, mock_sleep):
+        limiter = RateLimiter(2)
+        limiter.wait("https://medical.jiji.com/news/?pageNo=1")
+        limiter.wait("https://medical.nikkeibp.co.jp/inc/all/article/?page=1")
+        mock_sleep.assert_not_called()
+
+        limiter.wait("https://medical.jiji.com/news/?pageNo=2")
+        limiter.wait("https://medical.jiji.com/news/?pageNo=3")
+        self.assertEqual([call.args[0] for call in mock_sleep.call_args_list], [0.5, 1.0])
+
+
+# backfill_feedsコマンドのテスト
+class BackfillCommandTests(TestCase):
+    # 正常系：指定したソースを取り込み、件数を表示するか
+    @patch("news_app.management.commands.backfill_feeds.connections")
+    @patch("news_app.management.commands.backfill_feeds.backfill_source", return_value=5)
+    def test_command(self, mock_backfill, mock_connections):
+        out = StringIO()
+        call_command("backfill_feeds", "--source", "zizi_med", "--max-pages", "10", stdout=out)
+
+        self.assertIn("zizi_med: 5件", out.getvalue())
+        self.assertEqual(mock_backfill.call_args.kwargs["max_pages"], 10)
+
+    # 異常系：不正な引数はエラーになるか
+    def test_invalid_arguments(self):
+        with self.assertRaises(CommandError):
+            call_command("backfill_feeds", "--workers", "0")
+        with self.assertRaises(CommandError):
+            call_command("backfill_feeds", "--rate", "0")
@@ -0,0 +1,48 @@
+import random
+import unittest
+from ..services.bitmap import Bitmap, ARRAY_MAX, BITSET_BYTES
+
+
+# Bitmapクラスのテスト
+class TestBitmap(unittest.TestCase):
+
+    # 正常系：追加した値だけが含まれ、同じ値は2回追加されないか
+    def test_add_and_contains(self):
+        bitmap = Bitmap([3, 70000, 5])
+
+        self.assertIn(3, bitmap)
+        self.assertIn(70000, bitmap)
+        self.assertNotIn(4, bitmap)
+        self.assertNotIn(-1, bitmap)
+        self.assertEqual(bitmap.update([3, 6]), 1)
+        self.assertEqual(list(bitmap), [3, 5, 6, 70000])
+        self.assertEqual(len(bitmap), 4)
+
+    # 正常系：要素が多いコンテナはビットセットになり、保存・読み込みで同じ集合に戻るか
+    def test_round_trip_with_all_container_kinds(self):
+        values = set(range(100, 20000))                                  # ラン
+        values |= set(random.Random(0).sample(range(65536, 131072), ARRAY_MAX + 1))  # ビットセット
+        values |= {200000, 200005, 300000}                               # 配列
+        bitmap = Bitmap(values)
+
+        restored = Bitmap.from_bytes(bitmap.to_bytes())
+
+        self.assertEqual(list(restored), sorted(values))
+        self.assertIsInstance(bitmap.containers[1], bytearray)
+
+    # 正常系：連続した値は、件数に関係なく小さく保存されるか
+    def test_runs_are_compact(self):
+        bitmap = Bitmap(range(0, 65536 * 3))
+        self.assertLess(len(bitmap.to_bytes()), 64)
+
+        sparse = Bitmap(range(0, 65536 * 3, 2))  # 連続しない値はビットセット（1コンテナ 8192 バイト）
+        self.assertLess(len(sparse.to_bytes()), BITSET_BYTES * 3 + 64)
+
+    # 異常系：空のデータは空の集合になり、不正なデータはエラーになるか
+    def test_from_bytes_invalid(self):
+        self.assertEqual(len(Bitmap.from_bytes(b"")), 0)
+        self.assertEqual(len(Bitmap.from_bytes(None)), 0)
+        with self.assertRaises(ValueError):
+            Bitmap.from_bytes(b"XX\x01\x00\x00\x00\x00")
+        with self.assertRaises(ValueError):
+            Bitmap.from_bytes(Bitmap(range(10000)).to_bytes()[:-1])  # 途中で切れている
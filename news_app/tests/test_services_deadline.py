@@ -0,0 +1,38 @@
+import unittest
+from unittest.mock import patch
+from ..services.deadline import Deadline, NO_DEADLINE
+
+
+# Deadlineクラスのテスト
+class TestDeadline(unittest.TestCase):
+    # 正常系：制限なしの場合は、残り時間がNoneで、期限切れにならないか
+    def test_no_deadline(self):
+        self.assertIsNone(NO_DEADLINE.remaining())
+        self.assertFalse(NO_DEADLINE.expired())
+        self.assertTrue(NO_DEADLINE.has(1000))
+        self.assertEqual(NO_DEADLINE.timeout(10), 10)
+
+    # 正常系：残り時間に応じて判定されるか
+    @patch('news_app.services.deadline.time.monotonic')
+    def test_remaining_time(self, mock_monotonic):
+        mock_monotonic.return_value = 100.0
+        deadline = Deadline(5)
+
+        mock_monotonic.return_value = 102.0
+        self.assertEqual(deadline.remaining(), 3.0)
+        self.assertTrue(deadline.has(3))
+        self.assertFalse(deadline.has(4))
+        self.assertEqual(deadline.timeout(10), 3.0)  # 残り時間の方が短い
+        self.assertEqual(deadline.timeout(1), 1)     # 既定値の方が短い
+        self.assertFalse(deadline.expired())
+
+    # 異常系：制限時間を過ぎると、残り時間が0になり期限切れになるか
+    @patch('news_app.services.deadline.time.monotonic')
+    def test_expired(self, mock_monotonic):
+        mock_monotonic.return_value = 100.0
+        deadline = Deadline(5)
+
+        mock_monotonic.return_value = 106.0
+        self.assertEqual(deadline.remaining(), 0.0)
+        self.assertTrue(deadline.expired())
+        self.assertFalse(deadline.has(1))
@@ -0,0 +1,141 @@
+import unittest
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch, MagicMock
+from django.core.cache import cache
+from django.core.management import call_command, CommandError
+from django.db import DatabaseError
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.utils import timezone
+from ..models import DeeplCall, DeeplUsage
+from ..services.deeplUsage import UsageLedger
+from ..services.translateByDeepl import Translator
+
+
+# UsageLedgerクラスのテスト
+class TestUsageLedger(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.settings = override_settings(
+            DEEPL_DAILY_CHARACTER_BUDGET=100,
+            DEEPL_MONTHLY_CHARACTER_BUDGET=1000,
+            DEEPL_RESERVED_CHARACTERS=0,
+            DEEPL_USAGE_STUB=False,
+        )
+        self.settings.enable()
+        self.ledger = UsageLedger()
+
+    def tearDown(self):
+        self.settings.disable()
+        cache.clear()
+
+    # 正常系：予算内なら予約でき、使った文字数が記録されるか
+    def test_reserve_within_budget(self):
+        self.assertTrue(self.ledger.reserve(60))
+        self.assertEqual(self.ledger.get_daily_used(), 60)
+        self.assertEqual(self.ledger.get_monthly_used(), 60)
+
+    # 異常系：1日の予算を超える場合は予約できず、記録も増えないか
+    def test_reserve_over_daily_budget(self):
+        self.assertTrue(self.ledger.reserve(60))
+        self.assertFalse(self.ledger.reserve(60))
+        self.assertEqual(self.ledger.get_daily_used(), 60)
+
+    # 正常系：使った文字数はデータベースに記録され、他のプロセス（別のインスタンス）と予算を共有するか
+    def test_budget_is_shared_between_processes(self):
+        self.assertTrue(self.ledger.reserve(60))
+        cache.clear()  # プロセス内のキャッシュは使わない
+
+        other = UsageLedger()
+        self.assertEqual(other.get_daily_used(), 60)
+        self.assertFalse(other.reserve(60))
+        self.assertEqual(DeeplUsage.objects.get(period=self.ledger.day_key()).characters, 60)
+
+    # 異常系：データベースに記録できない場合は、予約しない（翻訳しない）か
+    @patch("news_app.services.deeplUsage.DeeplUsage.objects.bulk_create", side_effect=DatabaseError("down"))
+    def test_fails_closed_without_database(self, mock_create):
+        self.assertFalse(self.ledger.reserve(10))
+
+    # 正常系：取り消した文字数は記録から引かれるか
+    def test_release(self):
+        self.ledger.reserve(60)
+        self.ledger.release(60)
+        self.assertEqual(self.ledger.get_daily_used(), 0)
+
+    # 異常系：DeepL側の残り文字数が足りない場合は予約できないか
+    def test_reserve_respects_remaining_allowance(self):
+        client = MagicMock()
+        client.get_usage.return_value.character.count = 490000
+        client.get_usage.return_value.character.limit = 490050
+
+        self.assertFalse(self.ledger.reserve(60, client))
+        self.assertEqual(self.ledger.get_remaining_allowance(client), 50)
+        client.get_usage.assert_called_once()  # 利用量APIの結果はキャッシュされる
+
+    # 正常系：ダッシュボード用の集計に呼び出し履歴が含まれるか
+    def test_summary(self):
+        self.ledger.reserve(10)
+        self.ledger.record_call(10, ok=True)
+
+        summary = self.ledger.summary()
+        self.assertEqual(summary["daily_used"], 10)
+        self.assertEqual(summary["daily_budget"], 100)
+        self.assertEqual(summary["recent_calls"][0]["characters"], 10)
+
+
+    # 正常系：呼び出しの記録では古い記録を削除せず、prune_calls・コマンドで保持する期間を過ぎたものだけを削除するか
+    def test_prune_calls(self):
+        self.ledger.record_call(10, ok=True)
+        DeeplCall.objects.update(created_at=timezone.now() - timedelta(days=50))
+        self.ledger.record_call(20, ok=True)
+        self.assertEqual(DeeplCall.objects.count(), 2)
+
+        with patch("news_app.services.deeplUsage.PRUNE_BATCH_SIZE", 1):
+            self.assertEqual(self.ledger.prune_calls(40), 1)
+        self.assertEqual(list(DeeplCall.objects.values_list("characters", flat=True)), [20])
+
+        out = StringIO()
+        call_command("prune_deepl_calls", "--days", "1", stdout=out)
+        self.assertIn("0件削除しました", out.getvalue())
+        with self.assertRaises(CommandError):
+            call_command("prune_deepl_calls", "--days", "0")
+
+
+# 予算を超えた場合の Translator の動作のテスト
+class TestTranslatorBudget(unittest.TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+    # 異常系：予算を超える場合はDeepLを呼ばずに原文を返すか
+    @patch('news_app.services.translateByDeepl.os.getenv', return_value='dummy_auth_key')
+    @patch('news_app.services.translateByDeepl.deepl.Translator')
+    def test_returns_original_when_over_budget(self, mock_translator_class, mock_getenv):
+        mock_translator = MagicMock()
+        mock_translator_class.return_value = mock_translator
+        ledger = MagicMock()
+        ledger.reserve.return_value = False
+
+        translator = Translator(ledger=ledger)
+        result = translator.translate_text(['Hello'])
+
+        self.assertEqual(result, ['Hello'])
+        mock_translator.translate_text.assert_not_called()
+
+    # 異常系：翻訳に失敗した場合は予約した文字数が取り消されるか
+    @patch('news_app.services.translateByDeepl.os.getenv', return_value='dummy_auth_key')
+    @patch('news_app.services.translateByDeepl.deepl.Translator')
+    def test_releases_reservation_on_failure(self, mock_translator_class, mock_getenv):
+        mock_translator = MagicMock()
+        mock_translator.translate_text.side_effect = Exception("error")
+        mock_translator_class.return_value = mock_translator
+        ledger = MagicMock()
+        ledger.reserve.return_value = True
+
+        translator = Translator(ledger=ledger)
+        translator.translate_text(['Hello'])
+
+        ledger.release.assert_called_once_with(5)
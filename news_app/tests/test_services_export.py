@@ -0,0 +1,92 @@
+import json
+import os
+import tempfile
+import unittest
+from django.test import override_settings
+from django.urls import reverse
+from ..services.export import apply_user_state, export_feed, find_exported_page, exported_file_path
+
+
+ARTICLES = [[f"記事{i}", "2025/03/30", "タグ", f"https://example.com/{i}", ""] for i in range(15)]
+TEMPLATE = "partials/nikkei_med_articles.html"
+
+
+# export_feed関数・find_exported_page関数のテスト
+class TestExportFeed(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        override = override_settings(FEED_EXPORT_DIR=tmp.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.export_dir = tmp.name
+
+    # 正常系：ページごとに記事一覧のHTMLとJSONが書き出されるか
+    def test_exports_every_page(self):
+        manifest = export_feed("nikkei_med", ARTICLES, "v1", TEMPLATE)
+        self.assertEqual(manifest["num_pages"], 2)
+
+        page = find_exported_page("nikkei_med", "2")
+        with open(exported_file_path(page["html"]), encoding="utf-8") as f:
+            html = f.read()
+        with open(exported_file_path(page["json"]), encoding="utf-8") as f:
+            data = json.load(f)
+
+        self.assertIn("記事10", html)
+        self.assertNotIn("記事9<", html)
+        self.assertIn("ページ 2 / 2", html)
+        self.assertEqual(data["articles"], ARTICLES[10:])
+
+    # 正常系：ページ番号の扱いが Paginator.get_page と同じか
+    def test_page_number_fallback(self):
+        export_feed("nikkei_med", ARTICLES, "v1", TEMPLATE)
+        self.assertEqual(find_exported_page("nikkei_med", None)["number"], 1)
+        self.assertEqual(find_exported_page("nikkei_med", "abc")["number"], 1)
+        self.assertEqual(find_exported_page("nikkei_med", "99")["number"], 2)
+        self.assertIsNone(find_exported_page("zizi_med", "1"))
+
+    # 正常系：ページを加工する関数が適用されるか
+    def test_prepare_page(self):
+        export_feed("foreign_news", ARTICLES[:3], "v1", "partials/foreign_news_articles.html",
+                    prepare=lambda articles: [["JA:" + a[0], *a[1:]] for a in articles])
+        page = find_exported_page("foreign_news", "1")
+        with open(exported_file_path(page["json"]), encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["articles"][0][0], "JA:記事0")
+
+    # 正常系：書き出すページ数の上限を指定すると、先頭のページだけを加工して書き出すか
+    def test_max_pages(self):
+        prepared = []
+        manifest = export_feed("foreign_news", ARTICLES, "v1", "partials/foreign_news_articles.html",
+                               page_size=5, prepare=lambda articles: prepared.extend(articles) or articles, max_pages=2)
+
+        self.assertEqual(manifest["num_pages"], 3)
+        self.assertEqual(len(prepared), 10)
+        self.assertEqual(find_exported_page("foreign_news", "2")["number"], 2)
+        self.assertIsNone(find_exported_page("foreign_news", "3"))  # 表示するときに描画する
+
+    # 正常系：書き出したページに、ユーザーの未読の印・保存済みの表示が差し込まれるか
+    def test_apply_user_state(self):
+        export_feed("nikkei_med", ARTICLES, "v1", TEMPLATE)
+        with open(exported_file_path(find_exported_page("nikkei_med", "1")["html"]), encoding="utf-8") as f:
+            html = f.read()
+
+        plain = apply_user_state(html, {}, {})
+        self.assertNotIn("user-state:", plain)
+        self.assertNotIn("unread-badge", plain)
+        self.assertEqual(plain.count("お気に入りに登録"), 10)
+
+        html = apply_user_state(html, {"https://example.com/1": 7}, {"https://example.com/2": 3})
+        self.assertEqual(html.count("unread-badge"), 1)
+        self.assertIn(reverse("news_app:update_favorite", args=[7]), html)
+        self.assertEqual(html.count("お気に入りに登録"), 9)
+        self.assertIn('name="item" value="3"', html)
+
+    # 正常系：前回・今回のどちらでも使われていないファイルは削除されるか
+    def test_removes_stale_files(self):
+        first = export_feed("nikkei_med", ARTICLES, "v1", TEMPLATE)
+        export_feed("nikkei_med", ARTICLES[1:], "v2", TEMPLATE)
+        export_feed("nikkei_med", ARTICLES[2:], "v3", TEMPLATE)
+
+        files = os.listdir(self.export_dir)
+        self.assertNotIn(first["pages"]["1"]["html"], files)
+        self.assertEqual(len([f for f in files if f.endswith(".html")]), 4)  # 前回と今回の2ページずつ
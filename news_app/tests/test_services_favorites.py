@@ -0,0 +1,32 @@
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from news_app.models import Article
+from news_app.services.favorites import saved_article_ids
+
+
+# saved_article_ids関数のテスト
+class SavedArticleIdsTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="user", password="pass")
+        self.other = get_user_model().objects.create_user(username="other", password="pass")
+        self.article = Article.objects.create(user=self.user, article_title="保存した記事", article_url="https://example.com/1")
+        Article.objects.create(user=self.other, article_title="他のユーザーの記事", article_url="https://example.com/2")
+
+    # 正常系：1回のクエリで、保存済みの記事URLとIDを返すか（正規化すると同じURLも含む）
+    def test_returns_saved_urls_in_one_query(self):
+        urls = ["https://example.com/1", "https://EXAMPLE.com/1?utm_source=x", "https://example.com/2", "https://example.com/3"]
+
+        with self.assertNumQueries(1):
+            saved = saved_article_ids(self.user, urls)
+
+        self.assertEqual(saved, {
+            "https://example.com/1": self.article.pk,
+            "https://EXAMPLE.com/1?utm_source=x": self.article.pk,
+        })
+
+    # 異常系：未ログインのユーザー・URLがない場合は、クエリを実行しないか
+    def test_no_query_without_user_or_urls(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(saved_article_ids(AnonymousUser(), ["https://example.com/1"]), {})
+            self.assertEqual(saved_article_ids(self.user, []), {})
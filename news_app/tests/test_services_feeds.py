@@ -0,0 +1,105 @@
+import unittest
+from unittest.mock import patch
+import time
+from ..services.feeds import iter_feeds_as_completed, fetch_foreign_news, snapshot_version
+from ..services.deadline import Deadline
+from ..services.ingest import clear_recent
+
+
+# fetch_foreign_news関数のテスト
+class TestFetchForeignNews(unittest.TestCase):
+    def setUp(self):
+        clear_recent()  # 前のテストで取り込んだ結果を使わない
+
+    # 正常系：公開日時が日本時間に変換されるか
+    @patch('news_app.services.feeds.translate_article_titles', side_effect=lambda articles, deadline=None: articles)
+    @patch('news_app.services.feeds.fetch_news_from_api')
+    def test_converts_published_at_to_jst(self, mock_fetch, mock_translate):
+        mock_fetch.return_value = [["Title", "2025-03-29T12:00:00Z", "Source", "https://example.com", ""]]
+
+        result = fetch_foreign_news()
+        self.assertEqual(result[0][1], "2025/03/29 21:00")
+
+    # 正常系：タイトルは最初のページの分だけ翻訳されるか
+    @patch('news_app.services.feeds.translate_article_titles')
+    @patch('news_app.services.feeds.fetch_news_from_api')
+    def test_translates_first_page_only(self, mock_fetch, mock_translate):
+        mock_fetch.return_value = [[f"Title {i}", "", "", f"https://example.com/{i}", ""] for i in range(15)]
+        mock_translate.side_effect = lambda articles, deadline=None: [["JA:" + a[0], *a[1:]] for a in articles]
+
+        result = fetch_foreign_news()
+
+        mock_fetch.assert_called_once_with(translate=False, deadline=None)
+        self.assertEqual(len(mock_translate.call_args[0][0]), 10)
+        self.assertEqual(result[0][0], "JA:Title 0")
+        self.assertEqual(result[14][0], "Title 14")
+        self.assertEqual(len(result), 15)
+        self.assertEqual([a[0] for a in result[9:11]], ["JA:Title 9", "Title 10"])
+
+    # 正常系：翻訳しない残りの記事は、元の記事一覧をコピーせずに参照するか
+    @patch('news_app.services.feeds.translate_article_titles', side_effect=lambda articles, deadline=None: articles)
+    @patch('news_app.services.feeds.get_feed')
+    def test_remaining_articles_are_not_copied(self, mock_get_feed, mock_translate):
+        article_list = [[f"Title {i}", "", "", f"https://example.com/{i}", ""] for i in range(15)]
+        mock_get_feed.return_value = article_list
+
+        result = fetch_foreign_news()
+
+        self.assertIs(result[12], article_list[12])
+        self.assertIs(result[-1], article_list[-1])
+
+
+# snapshot_version関数のテスト
+class TestSnapshotVersion(unittest.TestCase):
+    # 内容が同じなら同じバージョン、違えば違うバージョンになるか
+    def test_snapshot_version(self):
+        articles = [["Title", "2025/03/29", "https://example.com"]]
+        self.assertEqual(snapshot_version(articles), snapshot_version([list(a) for a in articles]))
+        self.assertNotEqual(snapshot_version(articles), snapshot_version([["Other", "2025/03/29", "https://example.com"]]))
+
+
+NIKKEI_ARTICLE = ["日経の記事", "2025/03/30", "タグ", "https://example.com/n", ""]
+ZIZI_ARTICLE = ["時事の記事", "2025/03/30 12:00", "https://example.com/z", ""]
+
+
+# iter_feeds_as_completed関数のテスト
+class TestIterFeedsAsCompleted(unittest.TestCase):
+    def setUp(self):
+        clear_recent()  # 前のテストで取り込んだ結果を使わない
+
+    # 正常系：取得が早く終わったソースから順に返されるか
+    @patch('news_app.services.feeds.scraping_ZiziMed')
+    @patch('news_app.services.feeds.scraping_NikkeiMed')
+    def test_yields_in_completion_order(self, mock_nikkei, mock_zizi):
+        # 日経メディカルだけ遅くする
+        def slow_nikkei(deadline):
+            time.sleep(0.2)
+            return [NIKKEI_ARTICLE]
+        mock_nikkei.side_effect = slow_nikkei
+        mock_zizi.return_value = [ZIZI_ARTICLE]
+
+        result = list(iter_feeds_as_completed(["nikkei_med", "zizi_med"]))
+        self.assertEqual(result, [("zizi_med", [ZIZI_ARTICLE]), ("nikkei_med", [NIKKEI_ARTICLE])])
+
+    # 異常系：取得中に例外が発生したソースは空リストとして返されるか
+    @patch('news_app.services.feeds.scraping_ZiziMed', side_effect=Exception("取得エラー"))
+    @patch('news_app.services.feeds.scraping_NikkeiMed', return_value=[NIKKEI_ARTICLE])
+    def test_failed_source_yields_empty_list(self, mock_nikkei, mock_zizi):
+        result = dict(iter_feeds_as_completed(["nikkei_med", "zizi_med"]))
+        self.assertEqual(result, {"nikkei_med": [NIKKEI_ARTICLE], "zizi_med": []})
+
+    # 異常系：制限時間を過ぎても終わっていないソースは、待たずに空リストとして返されるか
+    @patch('news_app.services.feeds.scraping_ZiziMed')
+    @patch('news_app.services.feeds.scraping_NikkeiMed')
+    def test_slow_source_yields_empty_list_after_deadline(self, mock_nikkei, mock_zizi):
+        def slow_nikkei(deadline):
+            time.sleep(1)
+            return [NIKKEI_ARTICLE]
+        mock_nikkei.side_effect = slow_nikkei
+        mock_zizi.return_value = [ZIZI_ARTICLE]
+
+        started = time.monotonic()
+        result = list(iter_feeds_as_completed(["nikkei_med", "zizi_med"], Deadline(0.2)))
+
+        self.assertEqual(result, [("zizi_med", [ZIZI_ARTICLE]), ("nikkei_med", [])])
+        self.assertLess(time.monotonic() - started, 0.9)
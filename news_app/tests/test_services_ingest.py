@@ -0,0 +1,119 @@
+import unittest
+from unittest.mock import patch
+from django.db import DatabaseError
+from django.test import TestCase
+from ..models import IngestSnapshot
+from ..services.ingest import clear_recent, ingest, page_urls, save_snapshot
+
+
+# ingest関数のテスト
+class TestIngest(TestCase):
+    def setUp(self):
+        clear_recent()
+        self.addCleanup(clear_recent)
+        # 記事の登録（データベース）は test_services_readstate で確認する
+        patcher = patch("news_app.services.ingest.register_items")
+        self.mock_register = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    # 正常系：変わっていない記事は前回の整形結果を使い、新しい記事・変わった記事だけを整形するか
+    @patch('news_app.services.ingest.convert_utc_to_jst', side_effect=lambda dt: "JST:" + dt)
+    def test_normalizes_only_new_or_changed_items(self, mock_convert):
+        first = [
+            ["Title 1", "2025-03-29T12:00:00Z", "Source", "https://example.com/1", ""],
+            ["Title 2", "2025-03-29T13:00:00Z", "Source", "https://example.com/2", ""],
+        ]
+        result = ingest("foreign_news", first)
+        self.assertEqual([a[1] for a in result], ["JST:2025-03-29T12:00:00Z", "JST:2025-03-29T13:00:00Z"])
+        self.assertEqual(mock_convert.call_count, 2)
+        self.assertEqual(first[0][1], "2025-03-29T12:00:00Z")  # 元のリストは変更されない
+
+        second = [
+            ["Title 3", "2025-03-29T14:00:00Z", "Source", "https://example.com/3", ""],  # 新しい記事
+            ["Title 1", "2025-03-29T12:00:00Z", "Source", "https://example.com/1", ""],  # 変わっていない
+            ["Title 2 改", "2025-03-29T13:00:00Z", "Source", "https://example.com/2", ""],  # 変わった
+        ]
+        mock_convert.reset_mock()
+        result = ingest("foreign_news", second)
+
+        self.assertEqual([a[0] for a in result], ["Title 3", "Title 1", "Title 2 改"])
+        self.assertTrue(all(a[1].startswith("JST:") for a in result))
+        self.assertEqual([c.args[0] for c in mock_convert.call_args_list], ["2025-03-29T14:00:00Z", "2025-03-29T13:00:00Z"])
+
+        # 連番の id を振るのは新しい記事だけ（変わった記事は登録済み）。整形済みの記事も一緒に登録する
+        self.assertEqual(self.mock_register.call_args.args, ("foreign_news", [(
+            "https://example.com/3", "Title 3",
+            ["Title 3", "JST:2025-03-29T14:00:00Z", "Source", "https://example.com/3", ""], None,
+        )]))
+
+    # 正常系：整形処理のないソースは、取得したままの記事を返すか
+    def test_source_without_normalizer(self):
+        articles = [["時事の記事", "2025/03/30 12:00", "https://example.com/z", ""]]
+        self.assertEqual(ingest("zizi_med", articles), articles)
+        self.assertEqual(ingest("zizi_med", articles), articles)
+
+    # 正常系：記事一覧のバージョンと公開日時を取り込むときに計算し、変わっていない記事は前回の日時を使うか
+    def test_carries_version_and_published(self):
+        articles = [["時事の記事", "2025/03/30 12:00", "https://example.com/z", ""]]
+        first = ingest("zizi_med", articles)
+        self.assertEqual(first.published[0].isoformat(), "2025-03-30T12:00:00+09:00")
+
+        with patch("news_app.services.ingest.parse_datetime_jst") as mock_parse:
+            second = ingest("zizi_med", articles)
+        mock_parse.assert_not_called()
+        self.assertEqual(second.version, first.version)
+        self.assertEqual(second.published, first.published)
+        self.assertNotEqual(ingest("zizi_med", [["変わった記事", *articles[0][1:]]]).version, first.version)
+
+    # 正常系：前回と同じ記事一覧なら、データベースに接続せずに前回の記事一覧を返すか
+    def test_unchanged_reingest_has_no_queries(self):
+        articles = [["時事の記事", "2025/03/30 12:00", "https://example.com/z", ""]]
+        first = ingest("zizi_med", articles)
+
+        with self.assertNumQueries(0):
+            self.assertIs(ingest("zizi_med", [list(article) for article in articles]), first)
+        self.assertFalse(IngestSnapshot.objects.exists())  # リクエストの処理中の取り込みでは保存しない
+
+    # 正常系：保存した取り込み結果が、別のプロセス（メモリに前回の結果がない）でも使われるか
+    @patch('news_app.services.ingest.convert_utc_to_jst', side_effect=lambda dt: "JST:" + dt)
+    def test_saved_snapshot_is_used_by_other_process(self, mock_convert):
+        articles = [["Title 1", "2025-03-29T12:00:00Z", "Source", "https://example.com/1", ""]]
+        ingest("foreign_news", articles)
+        save_snapshot("foreign_news")
+        self.assertIn("https://example.com/1", IngestSnapshot.objects.get(name="foreign_news").items)
+
+        # 変わっていなければ、保存し直さない
+        with self.assertNumQueries(0):
+            save_snapshot("foreign_news")
+
+        clear_recent()
+        mock_convert.reset_mock()
+        self.mock_register.reset_mock()
+        result = ingest("foreign_news", articles)
+
+        self.assertEqual(result[0][1], "JST:2025-03-29T12:00:00Z")
+        mock_convert.assert_not_called()
+        self.mock_register.assert_not_called()
+
+    # 異常系：前回の取り込み結果を読み込めない場合は、すべての記事を整形して返すか
+    @patch('news_app.services.ingest.IngestSnapshot.objects.filter', side_effect=DatabaseError("接続エラー"))
+    def test_database_error_normalizes_all(self, mock_filter):
+        articles = [["時事の記事", "2025/03/30 12:00", "https://example.com/z", ""]]
+        with self.assertLogs('news_app.services.ingest', level='ERROR'):
+            self.assertEqual(ingest("zizi_med", articles), articles)
+
+
+# page_urls関数のテスト
+class TestPageUrls(unittest.TestCase):
+    # 正常系：ソースごとの位置から記事URLを取り出すか
+    def test_extracts_urls_by_source(self):
+        nikkei = [["日経の記事", "2025/03/30", "タグ", "https://example.com/n", ""]]
+        zizi = [["時事の記事", "2025/03/30 12:00", "https://example.com/z", ""]]
+
+        self.assertEqual(page_urls("nikkei_med", nikkei), ["https://example.com/n"])
+        self.assertEqual(page_urls("zizi_med", zizi), ["https://example.com/z"])
+
+    # 異常系：形式が違う記事・URLのない記事は無視するか
+    def test_skips_malformed_articles(self):
+        articles = [{"title": "記事", "url": "https://example.com/1"}, ["短い記事"], ["記事", "", "タグ", "", ""]]
+        self.assertEqual(page_urls("nikkei_med", articles), [])
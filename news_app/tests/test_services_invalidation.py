@@ -0,0 +1,119 @@
+import json
+from django.test import TestCase, override_settings
+from unittest.mock import patch
+from news_app.models import FeedVersion
+from news_app.services.invalidation import LocalFeedCache, NotificationListener, publish, local_feed_cache
+from news_app.services.feeds import get_feed, refresh_feed
+from news_app.services.ingest import clear_recent
+
+
+ARTICLES = [["日経の記事", "2025/03/30", "タグ", "https://example.com/n", ""]]
+
+
+# publish関数のテスト
+class PublishTests(TestCase):
+    # 正常系：バージョンが記録され、変わったときだけ更新されるか
+    def test_publish_records_version(self):
+        publish("nikkei_med", "v1")
+        self.assertEqual(FeedVersion.objects.get(name="nikkei_med").version, "v1")
+
+        publish("nikkei_med", "v1")
+        publish("nikkei_med", "v2")
+        self.assertEqual(FeedVersion.objects.get(name="nikkei_med").version, "v2")
+        self.assertEqual(FeedVersion.objects.count(), 1)
+
+
+# LocalFeedCacheクラスのテスト
+@override_settings(FEED_LOCAL_CACHE_SECONDS=600, FEED_INVALIDATION_POLL_SECONDS=0)
+class LocalFeedCacheTests(TestCase):
+    def setUp(self):
+        self.cache = LocalFeedCache()
+
+    # 正常系：有効期限内はキャッシュが返され、期限が過ぎると捨てられるか
+    def test_get_and_expire(self):
+        self.cache.set("nikkei_med", ARTICLES)
+        self.assertEqual(self.cache.get("nikkei_med"), ARTICLES)
+
+        with patch("news_app.services.invalidation.time.monotonic", return_value=10**9):
+            self.assertIsNone(self.cache.get("nikkei_med"))
+
+    # 異常系：設定が0の場合はキャッシュしないか
+    @override_settings(FEED_LOCAL_CACHE_SECONDS=0)
+    def test_disabled(self):
+        self.cache.set("nikkei_med", ARTICLES)
+        self.assertIsNone(self.cache.get("nikkei_med"))
+
+    # 正常系：他のプロセスが新しいバージョンを取り込むと、ポーリングでキャッシュが捨てられるか
+    def test_poll_drops_stale_entry(self):
+        publish("nikkei_med", "v1")
+        self.cache.get("nikkei_med")  # 最初のバージョンを記録する
+        self.cache.set("nikkei_med", ARTICLES)
+        self.cache.set("zizi_med", ARTICLES)
+
+        publish("nikkei_med", "v2")
+
+        self.assertIsNone(self.cache.get("nikkei_med"))
+        self.assertEqual(self.cache.get("zizi_med"), ARTICLES)  # 他のソースはそのまま
+
+    # 正常系：バージョンが記録される前にキャッシュした記事一覧は、最初のバージョンを受け取ったときに捨てられるか
+    def test_first_version_drops_entry_cached_before_it(self):
+        self.cache.get("nikkei_med")  # まだ FeedVersion がない
+        self.cache.set("nikkei_med", ARTICLES)
+
+        publish("nikkei_med", "v1")
+
+        self.assertIsNone(self.cache.get("nikkei_med"))
+
+    # 正常系：同じバージョンを受け取っても、キャッシュを捨てないか
+    def test_same_version_keeps_entry(self):
+        self.cache.receive("nikkei_med", "v1")
+        self.cache.set("nikkei_med", ARTICLES)
+        self.cache.receive("nikkei_med", "v1")
+        self.assertEqual(self.cache.entries["nikkei_med"][0], ARTICLES)
+
+    # 正常系：LISTEN/NOTIFY の通知を受け取ると、キャッシュが捨てられるか
+    def test_notification_drops_entry(self):
+        self.cache.receive("nikkei_med", "v1")
+        self.cache.set("nikkei_med", ARTICLES)
+
+        listener = NotificationListener(self.cache)
+        listener.handle(json.dumps({"name": "nikkei_med", "version": "v2"}))
+        listener.handle("不正な通知")  # 形式が不正な通知は無視する
+
+        self.assertNotIn("nikkei_med", self.cache.entries)
+
+
+# get_feed・refresh_feed とキャッシュの連携のテスト
+@override_settings(FEED_LOCAL_CACHE_SECONDS=600, FEED_INVALIDATION_POLL_SECONDS=0)
+class FeedCacheInvalidationTests(TestCase):
+    def setUp(self):
+        clear_recent()  # 前のテストで取り込んだ結果を使わない
+        local_feed_cache.clear()
+        self.addCleanup(local_feed_cache.clear)
+
+    # 正常系：キャッシュがあれば取得せず、取り込みが通知されると取得し直すか
+    @patch("news_app.services.feeds.scraping_NikkeiMed")
+    def test_refresh_invalidates_cached_feed(self, mock_scraping):
+        mock_scraping.return_value = ARTICLES
+        publish("nikkei_med", "v0")
+
+        self.assertEqual(get_feed("nikkei_med"), ARTICLES)
+        get_feed("nikkei_med")
+        self.assertEqual(mock_scraping.call_count, 1)
+
+        # 別のプロセス（refresh_feeds コマンド）が新しい記事を取り込み、バージョンを通知した
+        new_articles = [["新しい記事", "2025/03/31", "タグ", "https://example.com/new", ""]]
+        mock_scraping.return_value = new_articles
+        publish("nikkei_med", "v1")
+
+        self.assertEqual(get_feed("nikkei_med"), new_articles)
+        self.assertEqual(mock_scraping.call_count, 2)
+
+    # 正常系：取り込んだプロセスでは、キャッシュが新しい記事一覧に入れ替わるか
+    @patch("news_app.services.feeds.scraping_NikkeiMed")
+    def test_refresh_swaps_local_entry(self, mock_scraping):
+        mock_scraping.return_value = ARTICLES
+        refresh_feed("nikkei_med")
+
+        self.assertEqual(get_feed("nikkei_med"), ARTICLES)
+        self.assertEqual(mock_scraping.call_count, 1)
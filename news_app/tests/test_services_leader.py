@@ -0,0 +1,135 @@
+from datetime import timedelta
+from unittest.mock import patch
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from news_app.models import FeedVersion, Lease
+from news_app.services.leader import acquire, advisory_key, leader_lease, release
+from news_app.services.invalidation import publish, load_shared
+from news_app.services.feeds import get_feed, refresh_feed, snapshot_version
+from news_app.services.ingest import clear_recent
+
+
+ARTICLES = [["日経の記事", "2025/03/30", "タグ", "https://example.com/n", ""]]
+
+
+# リーダーのリース（ロック）のテスト
+class LeaderLeaseTests(TestCase):
+    # 正常系：取得中のロックは他のプロセスが取得できず、解放すると取得できるか
+    def test_only_one_holder(self):
+        token = acquire("refresh_feed:nikkei_med")
+        self.assertIsNotNone(token)
+
+        with leader_lease("refresh_feed:nikkei_med") as leader:
+            self.assertFalse(leader)
+        with leader_lease("refresh_feed:zizi_med") as leader:
+            self.assertTrue(leader)  # 名前が違えば取得できる
+
+        release("refresh_feed:nikkei_med", token)
+        with leader_lease("refresh_feed:nikkei_med") as leader:
+            self.assertTrue(leader)
+        self.assertFalse(Lease.objects.exists())  # 終わったら解放される
+
+    # 正常系：取得したプロセスが止まって期限が過ぎたロックは、他のプロセスが引き継ぐか
+    def test_takes_over_expired_lease(self):
+        Lease.objects.create(name="refresh_feed:nikkei_med", owner="止まったプロセス", expires_at=timezone.now() - timedelta(seconds=1))
+
+        with leader_lease("refresh_feed:nikkei_med") as leader:
+            self.assertTrue(leader)
+
+    # 正常系：リースの期限を延ばせるか。期限が過ぎて他のプロセスに引き継がれた後は、延ばせないか
+    def test_renew(self):
+        with leader_lease("refresh_feed:nikkei_med") as leader:
+            Lease.objects.update(expires_at=timezone.now() + timedelta(seconds=1))
+            self.assertTrue(leader.renew())
+            self.assertGreater(Lease.objects.get().expires_at, timezone.now() + timedelta(seconds=60))
+
+            Lease.objects.update(owner="引き継いだプロセス")
+            self.assertFalse(leader.renew())
+            self.assertFalse(leader)
+        self.assertTrue(Lease.objects.exists())  # 引き継いだプロセスのリースは解放しない
+
+    # 正常系：ロックが空くまで待つか
+    @patch("news_app.services.leader.POLL_SECONDS", 0)
+    @patch("news_app.services.leader.try_acquire", side_effect=[None, None, "token"])
+    def test_waits_for_release(self, mock_try):
+        self.assertEqual(acquire("refresh_feed:nikkei_med", wait=5), "token")
+        self.assertEqual(mock_try.call_count, 3)
+
+    # 正常系：アドバイザリーロックのキーは、名前ごとに決まった64ビットの整数になるか
+    def test_advisory_key(self):
+        key = advisory_key("refresh_feed:nikkei_med")
+        self.assertEqual(key, advisory_key("refresh_feed:nikkei_med"))
+        self.assertNotEqual(key, advisory_key("refresh_feed:zizi_med"))
+        self.assertTrue(-2**63 <= key < 2**63)
+
+
+# 複数のプロセスで refresh_feed を実行した場合のテスト
+@override_settings(FEED_LEADER_WAIT_SECONDS=0, FEED_REFRESH_MIN_SECONDS=60)
+class SharedRefreshTests(TestCase):
+    def setUp(self):
+        clear_recent()  # 前のテストで取り込んだ結果を使わない
+
+    # 正常系：他のプロセスが取得中の場合は、取得せずに保存済みの記事一覧を使うか
+    @patch("news_app.services.feeds.scraping_NikkeiMed")
+    def test_follower_uses_shared_feed(self, mock_scraping):
+        publish("nikkei_med", "v1", ARTICLES)
+        token = acquire("refresh_feed:nikkei_med")
+        self.addCleanup(release, "refresh_feed:nikkei_med", token)
+
+        self.assertEqual(refresh_feed("nikkei_med"), ARTICLES)
+        mock_scraping.assert_not_called()
+
+    # 正常系：他のプロセスが取得したばかりなら取得せず、古い場合は取得して保存するか
+    @patch("news_app.services.feeds.scraping_NikkeiMed")
+    def test_leader_skips_fresh_feed(self, mock_scraping):
+        publish("nikkei_med", "v1", ARTICLES)
+        self.assertEqual(refresh_feed("nikkei_med"), ARTICLES)
+        mock_scraping.assert_not_called()
+
+        new_articles = [["新しい記事", "2025/03/31", "タグ", "https://example.com/new", ""]]
+        mock_scraping.return_value = new_articles
+        FeedVersion.objects.filter(name="nikkei_med").update(updated_at=timezone.now() - timedelta(minutes=5))
+
+        self.assertEqual(refresh_feed("nikkei_med"), new_articles)
+        self.assertEqual(load_shared("nikkei_med")[1], new_articles)
+
+    # 異常系：取得中にリースが他のプロセスに引き継がれた場合は、取得した記事一覧を共有しないか
+    @patch("news_app.services.feeds.publish")
+    @patch("news_app.services.feeds.scraping_NikkeiMed")
+    def test_leader_lost_lease_does_not_publish(self, mock_scraping, mock_publish):
+        publish("nikkei_med", "v1", ARTICLES)
+        FeedVersion.objects.filter(name="nikkei_med").update(updated_at=timezone.now() - timedelta(minutes=5))
+
+        # 取得している間に、リースの期限が過ぎて他のプロセスに引き継がれる
+        def slow_scraping(deadline=None):
+            Lease.objects.update(owner="引き継いだプロセス")
+            return [["取得した記事", "2025/03/31", "タグ", "https://example.com/new", ""]]
+        mock_scraping.side_effect = slow_scraping
+
+        self.assertEqual(refresh_feed("nikkei_med"), ARTICLES)
+        mock_publish.assert_not_called()
+
+    # 正常系：リクエストの処理中（get_feed）は、共有された記事一覧があれば外部サービスから取得しないか
+    @patch("news_app.services.feeds.scraping_NikkeiMed")
+    def test_get_feed_uses_shared_feed(self, mock_scraping):
+        publish("nikkei_med", "v1", ARTICLES)
+
+        articles = get_feed("nikkei_med")
+        self.assertEqual(articles, ARTICLES)
+        self.assertEqual(snapshot_version(articles), "v1")
+        mock_scraping.assert_not_called()
+
+    # 正常系：共有された記事一覧がない場合だけ、外部サービスから取得するか
+    @patch("news_app.services.feeds.scraping_NikkeiMed", return_value=ARTICLES)
+    def test_get_feed_without_shared_feed(self, mock_scraping):
+        self.assertEqual(get_feed("nikkei_med"), ARTICLES)
+        mock_scraping.assert_called_once()
+
+    # 異常系：保存済みの記事一覧がない場合は、0件を返すか
+    @patch("news_app.services.feeds.scraping_NikkeiMed")
+    def test_follower_without_shared_feed(self, mock_scraping):
+        token = acquire("refresh_feed:nikkei_med")
+        self.addCleanup(release, "refresh_feed:nikkei_med", token)
+
+        self.assertEqual(refresh_feed("nikkei_med"), [])
+        mock_scraping.assert_not_called()
@@ -0,0 +1,111 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from django.core.management import call_command
+from django.test import RequestFactory, override_settings
+from ..services.memprofile import enabled_for, profile_request, profiled, load_reports, summarize_reports
+
+
+# メモリを確保するサービスの代わり
+@profiled
+def allocate(size):
+    return bytearray(size)
+
+
+class MemoryProfileTestCase(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.report_dir = tmp.name
+        self.settings = override_settings(MEMORY_PROFILE_DIR=self.report_dir, MEMORY_PROFILE=False)
+        self.settings.enable()
+        self.addCleanup(self.settings.disable)
+        self.factory = RequestFactory()
+
+
+# enabled_for関数のテスト
+class TestEnabledFor(MemoryProfileTestCase):
+    # 正常系：スタッフが memprofile=1 を付けた場合だけ有効になるか
+    def test_query_flag_requires_staff(self):
+        request = self.factory.get("/", {"memprofile": "1"})
+        request.user = SimpleNamespace(is_staff=True)
+        self.assertTrue(enabled_for(request))
+
+        request.user = SimpleNamespace(is_staff=False)
+        self.assertFalse(enabled_for(request))
+
+    # 正常系：設定で有効にした場合は、すべてのリクエストが対象になるか
+    def test_setting_enables_all_requests(self):
+        request = self.factory.get("/")
+        request.user = SimpleNamespace(is_staff=False)
+        self.assertFalse(enabled_for(request))
+        with override_settings(MEMORY_PROFILE=True):
+            self.assertTrue(enabled_for(request))
+
+
+# profile_request関数・profiledデコレーターのテスト
+class TestProfileRequest(MemoryProfileTestCase):
+    # 正常系：リクエスト全体とサービスの呼び出しごとに、ピークと確保した箇所が記録されるか
+    def test_writes_report_with_sections(self):
+        request = self.factory.get("/nikkei_med/")
+        kept = []
+
+        def get_response(request):
+            kept.append(allocate(2 * 1024 * 1024))
+            return "response"
+
+        response = profile_request(request, get_response)
+        self.assertEqual(response, "response")
+
+        with open(request.memprofile_report, encoding="utf-8") as f:
+            report = json.load(f)
+        self.assertEqual(report["path"], "/nikkei_med/")
+        self.assertGreaterEqual(report["peak_bytes"], 2 * 1024 * 1024)
+        self.assertGreaterEqual(report["size_delta"], 2 * 1024 * 1024)
+        self.assertEqual([section["name"] for section in report["sections"]], ["allocate"])
+        self.assertGreaterEqual(report["sections"][0]["peak_bytes"], 2 * 1024 * 1024)
+        self.assertTrue(any("test_services_memprofile.py" in site["site"] for site in report["top"]))
+
+    # 正常系：リクエストを調べていない場合は、そのまま呼び出されるか
+    def test_profiled_without_request(self):
+        self.assertEqual(len(allocate(10)), 10)
+        self.assertEqual(os.listdir(self.report_dir), [])
+
+
+# summarize_reports関数とmemprofile_diffコマンドのテスト
+class TestSummarizeReports(MemoryProfileTestCase):
+    def write_reports(self, name, peak):
+        report_dir = os.path.join(self.report_dir, name)
+        os.makedirs(report_dir)
+        for i in range(2):
+            with open(os.path.join(report_dir, f"{i}.json"), "w", encoding="utf-8") as f:
+                json.dump({
+                    "view": "NikkeiMedView",
+                    "peak_bytes": peak + i * 1024,
+                    "size_delta": 1024,
+                    "top": [{"site": "scrapingNikkeiMed.py:70", "size_diff": peak, "count_diff": 1}],
+                }, f)
+        return report_dir
+
+    # 正常系：ビューごとに平均がまとめられるか
+    def test_summarize(self):
+        summary = summarize_reports(load_reports(self.write_reports("before", 4096)))
+        self.assertEqual(summary["NikkeiMedView"]["requests"], 2)
+        self.assertEqual(summary["NikkeiMedView"]["peak_bytes"], 4096 + 512)
+        self.assertEqual(summary["NikkeiMedView"]["sites"], {"scrapingNikkeiMed.py:70": 4096})
+
+    # 正常系：2回分のレポートの増減が表示されるか
+    def test_diff_command(self):
+        before = self.write_reports("before", 4096)
+        after = self.write_reports("after", 8192)
+
+        out = io.StringIO()
+        call_command("memprofile_diff", before, after, stdout=out)
+
+        output = out.getvalue()
+        self.assertIn("NikkeiMedView", output)
+        self.assertIn("4.5 → 8.5", output)
+        self.assertIn("+4.0 KiB  scrapingNikkeiMed.py:70", output)
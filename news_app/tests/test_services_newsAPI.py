@@ -3,7 +3,9 @@ from unittest.mock import patch, MagicMock
 import pandas as pd
 import requests
 from ..services.translateByDeepl import Translator
-from ..services.newsAPI import fetch_news_data, extract_source_name, clean_and_format_data, translate_titles, fetch_news_from_api
+from ..services.newsAPI import fetch_news_data, extract_source_name, clean_and_format_data, translate_titles, fetch_news_from_api, translate_article_titles
+from django.core.cache import cache
+from ..services.deadline import Deadline
 
 
 # extract_source_name関数のテスト
@@ -135,6 +137,15 @@ class TestTranslateTitles(unittest.TestCase):
         # 例外が発生しても元のDataFrameが返ってくる
         self.assertTrue(result_df.equals(df))
 
+    # 異常系：残り時間が少ないときは翻訳せず、元のDataFrameを返すか
+    @patch.object(Translator, 'translate_text')
+    def test_translate_titles_skips_when_deadline_is_short(self, mock_translate_text):
+        df = pd.DataFrame({'title': ['Title 1']})
+        result_df = translate_titles(df, Deadline(0))
+
+        self.assertEqual(result_df.loc[0, 'title'], 'Title 1')
+        mock_translate_text.assert_not_called()
+
 # fetch_news_from_api関数のテスト
 class TestFetchNewsFromAPI(unittest.TestCase):
     # 正常系：APIからデータを取得して整形翻訳するテスト
@@ -187,4 +198,67 @@ class TestFetchNewsFromAPI(unittest.TestCase):
     @patch('news_app.services.newsAPI.fetch_news_data', return_value=object())  # DataFrameに変換できない
     def test_fetch_news_from_api_clean_format_data_exception(self, mock_fetch):
         result = fetch_news_from_api()
-        self.assertEqual(result, [])  # 整形失敗時も空リスト
\ No newline at end of file
+        self.assertEqual(result, [])  # 整形失敗時も空リスト
+
+    # 正常系：translate=False のときは翻訳せずに返すか
+    @patch('news_app.services.newsAPI.fetch_news_data')
+    @patch('news_app.services.newsAPI.Translator.translate_text')
+    def test_fetch_news_from_api_without_translation(self, mock_translate, mock_fetch):
+        mock_fetch.return_value = [
+            {
+                'title': 'Original Title',
+                'publishedAt': '2025-03-30T12:00:00Z',
+                'source': {'name': 'Mock News'},
+                'url': 'http://example.com',
+                'urlToImage': 'http://example.com/image.jpg'
+            }
+        ]
+
+        result = fetch_news_from_api(translate=False)
+
+        self.assertEqual(result[0][0], 'Original Title')
+        mock_translate.assert_not_called()
+
+# translate_article_titles関数のテスト
+class TestTranslateArticleTitles(unittest.TestCase):
+    def setUp(self):
+        cache.clear()
+
+    # 正常系：翻訳済みのタイトルは記録され、2回目は翻訳されないか
+    @patch.object(Translator, 'translate_many')
+    def test_memoizes_translations_per_title(self, mock_translate_text):
+        mock_translate_text.side_effect = lambda texts, deadline=None: {t: f"JA:{t}" for t in texts}
+        articles = [["Title 1", "2025/03/30 21:00", "Source", "http://example.com/1", ""],
+                    ["Title 2", "2025/03/30 21:00", "Source", "http://example.com/2", ""]]
+
+        result = translate_article_titles(articles)
+        self.assertEqual([a[0] for a in result], ["JA:Title 1", "JA:Title 2"])
+        self.assertEqual(articles[0][0], "Title 1")  # 元のリストは変更されない
+
+        # 記事一覧に記事が加わっても、新しいタイトルだけ翻訳される
+        translate_article_titles([["Title 3", "", "", "", ""]] + articles)
+        self.assertEqual(mock_translate_text.call_args_list[-1][0][0], ["Title 3"])
+        self.assertEqual(mock_translate_text.call_count, 2)
+
+    # 異常系：翻訳に失敗したタイトルは記録されず、次回もう一度翻訳されるか
+    @patch.object(Translator, 'translate_many')
+    def test_does_not_memoize_failures(self, mock_translate_text):
+        mock_translate_text.return_value = {}  # 翻訳に失敗したタイトルは返らない
+        articles = [["Title 1", "", "", "", ""]]
+
+        translate_article_titles(articles)
+        translate_article_titles(articles)
+
+        self.assertEqual(mock_translate_text.call_count, 2)
+
+    # 正常系：訳文が原文と同じタイトル（日本語のタイトル・固有名詞など）も記録され、翻訳し直さないか
+    @patch.object(Translator, 'translate_many')
+    def test_memoizes_unchanged_translations(self, mock_translate_text):
+        mock_translate_text.side_effect = lambda texts, deadline=None: {t: t for t in texts}
+        articles = [["日本語のタイトル", "", "", "", ""], ["COVID-19", "", "", "", ""]]
+
+        translate_article_titles(articles)
+        result = translate_article_titles(articles)
+
+        self.assertEqual([a[0] for a in result], ["日本語のタイトル", "COVID-19"])
+        self.assertEqual(mock_translate_text.call_count, 1)
@@ -0,0 +1,65 @@
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from news_app.models import FeedItem, ReadState
+from news_app.services.ingest import ingest
+from news_app.services.readstate import register_items, item_ids, unread_item_ids, mark_read
+from news_app.services.ingest import clear_recent
+
+
+# register_items関数と、取り込み（ingest）での記事の登録のテスト
+class RegisterItemsTests(TestCase):
+    def setUp(self):
+        clear_recent()  # 前のテストで取り込んだ結果を使わない
+        cache.clear()
+
+    # 正常系：古い記事から順に連番が振られ、登録済みの記事は登録し直さないか
+    def test_assigns_dense_ids_oldest_first(self):
+        register_items("nikkei_med", [("https://example.com/2", "新しい記事"), ("https://example.com/1", "古い記事")])
+        register_items("nikkei_med", [("https://example.com/3", "もっと新しい記事"), ("https://example.com/2?utm_source=x", "新しい記事")])
+
+        items = list(FeedItem.objects.order_by("pk").values_list("url", flat=True))
+        self.assertEqual(items, ["https://example.com/1", "https://example.com/2", "https://example.com/3"])
+        ids = list(FeedItem.objects.order_by("pk").values_list("pk", flat=True))
+        self.assertEqual(ids, list(range(ids[0], ids[0] + 3)))  # 抜けのない連番
+
+    # 正常系：取り込んだ新しい記事が登録されるか
+    def test_ingest_registers_new_items(self):
+        ingest("zizi_med", [["時事の記事", "2025/03/30 12:00", "https://example.com/z", ""]])
+
+        item = FeedItem.objects.get()
+        self.assertEqual((item.source, item.url, item.title), ("zizi_med", "https://example.com/z", "時事の記事"))
+
+
+# 既読・未読のテスト
+class ReadStateTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="user", password="pass")
+        self.urls = [f"https://example.com/{i}" for i in range(5)]
+        register_items("nikkei_med", [(url, "記事") for url in self.urls])
+        self.ids = item_ids(self.urls)
+
+    # 正常系：既読にした記事は未読に含まれず、登録されていない記事も含まれないか
+    def test_mark_read_and_unread(self):
+        self.assertEqual(mark_read(self.user, [self.ids[self.urls[0]], self.ids[self.urls[1]]]), 2)
+        self.assertEqual(mark_read(self.user, [self.ids[self.urls[0]]]), 0)  # 既読の記事は数えない
+
+        with self.assertNumQueries(2):
+            unread = unread_item_ids(self.user, self.urls + ["https://example.com/unknown"])
+
+        self.assertEqual(unread, {url: self.ids[url] for url in self.urls[2:]})
+        self.assertEqual(ReadState.objects.count(), 1)  # ユーザーごとに1行
+
+    # 異常系：未ログインのユーザーの場合は、クエリを実行しないか
+    def test_anonymous_user(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(unread_item_ids(AnonymousUser(), self.urls), {})
+
+    # 異常系：保存されたビットマップが壊れていても、エラーにならず未読として扱うか
+    def test_broken_bitmap(self):
+        ReadState.objects.create(user=self.user, bitmap=b"broken")
+
+        self.assertEqual(len(unread_item_ids(self.user, self.urls)), 5)
+        self.assertEqual(mark_read(self.user, [self.ids[self.urls[0]]]), 1)
+        self.assertEqual(len(unread_item_ids(self.user, self.urls)), 4)
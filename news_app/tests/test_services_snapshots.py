@@ -0,0 +1,90 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from django.test import override_settings
+from ..services.snapshots import ORDER, encode_snapshot, write_snapshot, open_snapshot, FeedSnapshot
+from ..services.feeds import refresh_feed, snapshot_version
+from ..services.ingest import clear_recent
+
+
+ARTICLES = [
+    ["糖尿病治療の新ガイドライン", "2025/03/30", "トレンド", "https://example.com/1", ""],
+    ["感染症の流行状況", "2025/03/29", "トレンド", "https://example.com/2", ""],
+    ["医師の働き方改革", "2025/03/28", "解説", "https://example.com/3", "https://example.com/3.jpg"],
+]
+
+
+class SnapshotTestCase(unittest.TestCase):
+    def setUp(self):
+        clear_recent()  # 前のテストで取り込んだ結果を使わない
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.snapshot_dir = tmp.name
+
+
+# FeedSnapshotクラスのテスト
+class TestFeedSnapshot(unittest.TestCase):
+    # 正常系：書き出した記事一覧を、そのまま取り出せるか
+    def test_round_trip(self):
+        snapshot = FeedSnapshot(encode_snapshot(ARTICLES, "v1"))
+
+        self.assertEqual(len(snapshot), 3)
+        self.assertEqual(snapshot.version, "v1")
+        self.assertEqual(list(snapshot), ARTICLES)
+        self.assertEqual(snapshot[-1], ARTICLES[-1])
+        self.assertEqual(snapshot[1:3], ARTICLES[1:3])
+        with self.assertRaises(IndexError):
+            snapshot[3]
+
+    # 正常系：同じ文字列は文字列表に1回だけ入るか
+    def test_strings_are_deduplicated(self):
+        once = len(encode_snapshot(ARTICLES[:1], "v1"))
+        twice = len(encode_snapshot(ARTICLES[:1] * 2, "v1"))
+        self.assertEqual(twice - once, 5 * 8 + ORDER.size)  # 増えるのはオフセット表と公開日時順の表の分だけ
+
+    # 異常系：空の記事一覧も扱えるか
+    def test_empty(self):
+        self.assertEqual(list(FeedSnapshot(encode_snapshot([], "v1"))), [])
+
+
+# open_snapshot関数のテスト
+class TestOpenSnapshot(SnapshotTestCase):
+    # 正常系：ファイルが置き換えられると、新しい内容が読まれるか
+    def test_reopens_after_swap(self):
+        with override_settings(FEED_SNAPSHOT_DIR=self.snapshot_dir):
+            self.assertIsNone(open_snapshot("nikkei_med"))
+
+            write_snapshot("nikkei_med", ARTICLES[:1], "v1")
+            first = open_snapshot("nikkei_med")
+            self.assertIs(open_snapshot("nikkei_med"), first)  # 変わっていなければ開き直さない
+
+            write_snapshot("nikkei_med", ARTICLES, "v2")
+            second = open_snapshot("nikkei_med")
+
+        self.assertEqual(second.version, "v2")
+        self.assertEqual(len(second), 3)
+        self.assertEqual(first[0], ARTICLES[0])  # 古い内容を読んでいる途中でも壊れない
+
+    # 正常系：保存先が未設定なら使わないか
+    @override_settings(FEED_SNAPSHOT_DIR=None)
+    def test_disabled_without_snapshot_dir(self):
+        self.assertIsNone(open_snapshot("nikkei_med"))
+
+
+# refresh_feed関数のテスト
+class TestRefreshFeed(SnapshotTestCase):
+    # 正常系：取得した記事一覧が書き出され、取得に失敗したときは前回の記事一覧が残るか
+    @patch('news_app.services.feeds.scraping_NikkeiMed')
+    def test_writes_snapshot_and_keeps_previous_on_failure(self, mock_nikkei):
+        with override_settings(FEED_SNAPSHOT_DIR=self.snapshot_dir):
+            mock_nikkei.return_value = ARTICLES
+            refresh_feed("nikkei_med")
+            mock_nikkei.return_value = []
+            refresh_feed("nikkei_med")
+
+            snapshot = open_snapshot("nikkei_med")
+
+        self.assertEqual(list(snapshot), ARTICLES)
+        self.assertEqual(snapshot_version(snapshot), snapshot_version(ARTICLES))
+        self.assertEqual(os.listdir(self.snapshot_dir), ["nikkei_med.feed"])  # 一時ファイルは残らない
@@ -0,0 +1,104 @@
+import os
+import unittest
+from unittest.mock import patch, MagicMock
+import requests
+from ..services.deadline import Deadline
+from ..services.sources import ExtractionPlan, fetch_html, get_plan, scrape_source
+from ..simulator.server import FIXTURES_DIR
+
+
+SAMPLE_CONFIG = {
+    "listing_urls": ["https://example.com/news/1", "https://example.com/news/2"],
+    "base_url": "https://example.com",
+    "item_selector": "li.item",
+    "fields": [
+        {"name": "title", "selector": "p.title"},
+        {"name": "url", "selector": ":scope > a", "attr": "href", "join": True},
+        {"name": "img", "selector": "img", "attr": "src", "join": True, "default": ""},
+    ],
+}
+
+SAMPLE_HTML = '''
+<ul>
+    <li class="item"><a href="/a1"><p class="title">Title 1</p></a><img src="/i1.jpg"/></li>
+    <li class="item"><a href="https://other.example.com/a2"><p class="title">Title 2</p></a></li>
+    <li class="item"><p class="title">URLなし</p></li>
+</ul>
+'''
+
+
+# ExtractionPlanクラスのテスト
+class TestExtractionPlan(unittest.TestCase):
+    # 正常系：記事ごとに項目を取り出し、相対URLに base_url を付けるか
+    # 異常系：必須の項目がない記事はスキップされるか
+    def test_extract(self):
+        plan = ExtractionPlan("sample", SAMPLE_CONFIG)
+
+        with self.assertLogs('news_app.services.sources', level='WARNING'):
+            result = plan.extract(SAMPLE_HTML)
+
+        self.assertEqual(result, [
+            ["Title 1", "https://example.com/a1", "https://example.com/i1.jpg"],
+            ["Title 2", "https://other.example.com/a2", ""],  # 絶対URLはそのまま、画像は既定値
+        ])
+
+    # 正常系：日経メディカルの設定で、記録済みの一覧ページから全記事を取り出せるか
+    def test_nikkei_config(self):
+        with open(os.path.join(FIXTURES_DIR, "nikkei_med.html"), encoding="utf-8") as f:
+            html = f.read()
+
+        result = get_plan("nikkei_med").extract(html)
+        self.assertEqual(len(result), 20)
+        self.assertEqual(result[0], [
+            "糖尿病治療の新ガイドライン", "2025/03/30", "トレンド",
+            "https://medical.nikkeibp.co.jp/leaf/all/news/2025/03/001.html",
+            "https://medical.nikkeibp.co.jp/images/thumb/001.jpg",
+        ])
+
+
+# scrape_source関数のテスト
+class TestScrapeSource(unittest.TestCase):
+    # 正常系：すべての一覧ページを取得し、結果をつなげるか（取得に失敗したページは飛ばす）
+    @patch('news_app.services.sources.fetch_html')
+    @patch.dict('news_app.services.sources.SOURCES', {"sample": SAMPLE_CONFIG})
+    def test_scrape_all_listing_urls(self, mock_fetch):
+        self.addCleanup(get_plan.cache_clear)
+        mock_fetch.side_effect = [SAMPLE_HTML, None]
+
+        result = scrape_source("sample")
+
+        self.assertEqual([call.args[0] for call in mock_fetch.call_args_list], SAMPLE_CONFIG["listing_urls"])
+        self.assertEqual(len(result), 2)
+
+
+# fetch_html関数のテスト
+class TestFetchHtml(unittest.TestCase):
+    # 正常系：正常にHTMLを返すか
+    @patch('news_app.services.sources.requests.get')
+    def test_fetch_html_success(self, mock_get):
+        mock_get.return_value = MagicMock(status_code=200, text='<html><body>test</body></html>')
+
+        html = fetch_html('https://dummyurl.com')
+        self.assertEqual(html, '<html><body>test</body></html>')
+
+    # 異常系：例外発生時にNoneを返すか
+    @patch('news_app.services.sources.requests.get')
+    def test_fetch_html_exception(self, mock_get):
+        mock_get.side_effect = requests.exceptions.RequestException("接続エラー")
+
+        html = fetch_html('https://dummyurl.com')
+        self.assertIsNone(html)
+
+    # 異常系：制限時間を過ぎている場合は通信せずにNoneを返すか
+    @patch('news_app.services.sources.requests.get')
+    def test_fetch_html_after_deadline(self, mock_get):
+        html = fetch_html('https://dummyurl.com', Deadline(0))
+        self.assertIsNone(html)
+        mock_get.assert_not_called()
+
+    # 正常系：通信のタイムアウトが残り時間に合わせられるか
+    @patch('news_app.services.sources.requests.get')
+    def test_fetch_html_timeout_follows_deadline(self, mock_get):
+        mock_get.return_value = MagicMock(text='<html></html>')
+        fetch_html('https://dummyurl.com', Deadline(3))
+        self.assertLessEqual(mock_get.call_args.kwargs["timeout"], 3)
@@ -0,0 +1,182 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import io
+import os
+import tempfile
+from PIL import Image
+from django.core.cache import cache
+from django.test.utils import override_settings
+from ..services.thumbnail import CacheUsage, normalize_width, resize_image, evict_cache, get_thumbnail, pinned_target, fetch_image, placeholder_image
+
+
+# テスト用の画像データ（PNG）を作る
+def make_image_bytes(width, height):
+    output = io.BytesIO()
+    Image.new("RGB", (width, height), "red").save(output, format="PNG")
+    return output.getvalue()
+
+
+# normalize_width関数のテスト
+class TestNormalizeWidth(unittest.TestCase):
+    def test_normalize_width(self):
+        self.assertEqual(normalize_width("240"), 240)
+        self.assertEqual(normalize_width("200"), 240)  # 近い幅に丸められる
+        self.assertEqual(normalize_width("9999"), 480)  # 最大幅を超えない
+        self.assertEqual(normalize_width(None), 240)  # 指定なしはデフォルト
+        self.assertEqual(normalize_width("abc"), 240)
+
+
+# pinned_target関数のテスト
+class TestPinnedTarget(unittest.TestCase):
+    # 異常系：http(s)以外や、サーバー内部のアドレスは拒否される
+    def test_rejects_non_http_and_private_hosts(self):
+        self.assertIsNone(pinned_target("file:///etc/passwd"))
+        self.assertIsNone(pinned_target("http://127.0.0.1/image.jpg"))
+        self.assertIsNone(pinned_target("http://192.168.0.1/image.jpg"))
+        self.assertIsNone(pinned_target("http://[::1]:8000/image.jpg"))
+
+
+# 名前解決の結果（ホスト名: アドレス）を固定する
+def fake_getaddrinfo(addresses):
+    def getaddrinfo(hostname, port):
+        return [(None, None, None, "", (addresses.get(hostname, hostname), 0))]
+    return getaddrinfo
+
+
+# 取得結果の代わりに使うレスポンス
+def fake_response(status=200, location=None, body=b""):
+    response = MagicMock(status_code=status, is_redirect=location is not None, headers={"Location": location})
+    response.__enter__.return_value = response
+    response.iter_content.return_value = [body]
+    return response
+
+
+# fetch_image関数のテスト
+@patch("news_app.services.thumbnail.socket.getaddrinfo", side_effect=fake_getaddrinfo({
+    "example.com": "93.184.216.34",
+    "cdn.example.com": "93.184.216.35",
+    "internal.example.com": "10.0.0.5",
+}))
+class TestFetchImage(unittest.TestCase):
+    # 正常系：確認したアドレスに接続し、Host ヘッダーには元のホスト名を使うか
+    @patch("news_app.services.thumbnail.requests.Session.get", return_value=fake_response(body=b"image"))
+    def test_connects_to_validated_address(self, mock_get, mock_dns):
+        self.assertEqual(fetch_image("https://example.com/image.png"), b"image")
+
+        args, kwargs = mock_get.call_args
+        self.assertEqual(args[0], "https://93.184.216.34/image.png")
+        self.assertEqual(kwargs["headers"], {"Host": "example.com"})
+        self.assertFalse(kwargs["allow_redirects"])
+
+    # 正常系：許可されたホストへのリダイレクトは、転送先も確認してからたどるか
+    @patch("news_app.services.thumbnail.requests.Session.get", side_effect=[
+        fake_response(302, "https://cdn.example.com/image.png"),
+        fake_response(body=b"image"),
+    ])
+    def test_follows_allowed_redirect(self, mock_get, mock_dns):
+        self.assertEqual(fetch_image("https://example.com/image.png"), b"image")
+        self.assertEqual(mock_get.call_args.args[0], "https://93.184.216.35/image.png")
+
+    # 異常系：サーバー内部のアドレスへのリダイレクトはたどらないか
+    @patch("news_app.services.thumbnail.requests.Session.get")
+    def test_rejects_redirect_to_private_host(self, mock_get, mock_dns):
+        for location in ("http://169.254.169.254/latest/meta-data/", "http://127.0.0.1/", "https://internal.example.com/a.png"):
+            mock_get.reset_mock(return_value=True)
+            mock_get.return_value = fake_response(302, location)
+            self.assertIsNone(fetch_image("https://example.com/image.png"))
+            mock_get.assert_called_once()
+
+    # 異常系：リダイレクトが多すぎる場合は取得しないか
+    @patch("news_app.services.thumbnail.requests.Session.get", return_value=fake_response(302, "/again.png"))
+    def test_too_many_redirects(self, mock_get, mock_dns):
+        self.assertIsNone(fetch_image("https://example.com/image.png"))
+        self.assertEqual(mock_get.call_count, 4)
+
+
+# placeholder_image関数のテスト
+class TestPlaceholderImage(unittest.TestCase):
+    # 正常系：許可された幅のJPEGが返るか
+    def test_placeholder_image(self):
+        with Image.open(io.BytesIO(placeholder_image("9999"))) as image:
+            self.assertEqual(image.format, "JPEG")
+            self.assertEqual(image.width, 480)
+
+
+# resize_image関数のテスト
+class TestResizeImage(unittest.TestCase):
+    # 正常系：縦横比を保って縮小され、JPEGになるか
+    def test_resize_image(self):
+        data = resize_image(make_image_bytes(1000, 500), 240)
+
+        with Image.open(io.BytesIO(data)) as image:
+            self.assertEqual(image.format, "JPEG")
+            self.assertEqual(image.size, (240, 120))
+
+    # 異常系：画像でないデータは None を返す
+    def test_resize_image_with_invalid_data(self):
+        self.assertIsNone(resize_image(b"not an image", 240))
+
+
+# evict_cache関数のテスト
+class TestEvictCache(unittest.TestCase):
+    # 正常系：上限を超えた場合、最終利用日時が古いファイルから削除されるか
+    def test_evicts_least_recently_used(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            for i, name in enumerate(["old", "middle", "new"]):
+                path = os.path.join(cache_dir, f"{name}.jpg")
+                with open(path, "wb") as f:
+                    f.write(b"x" * 100)
+                os.utime(path, (1000 + i, 1000 + i))
+
+            self.assertEqual(evict_cache(cache_dir, 200), 200)
+
+            self.assertEqual(sorted(os.listdir(cache_dir)), ["middle.jpg", "new.jpg"])
+
+
+# CacheUsageクラスのテスト
+class TestCacheUsage(unittest.TestCase):
+    # 正常系：ディレクトリを調べるのは、最初・上限を超えたとき・一定回数の書き込みごとだけか
+    @patch("news_app.services.thumbnail.EVICT_CHECK_WRITES", 5)
+    @patch("news_app.services.thumbnail.evict_cache", return_value=0)
+    def test_scans_only_when_needed(self, mock_evict):
+        usage = CacheUsage()
+        for _ in range(5):
+            usage.add("/cache", 10, 100)
+        self.assertEqual(mock_evict.call_count, 1)  # 最初の1回だけ
+
+        usage.add("/cache", 10, 100)
+        self.assertEqual(mock_evict.call_count, 2)  # 前回調べてから5回目の書き込みで調べ直す
+
+        usage.add("/cache", 200, 100)
+        self.assertEqual(mock_evict.call_count, 3)  # 上限を超えた
+
+
+# get_thumbnail関数のテスト
+class TestGetThumbnail(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.settings = override_settings(THUMB_CACHE_DIR=self.cache_dir.name, THUMB_ALLOW_PRIVATE_HOSTS=True)
+        self.settings.enable()
+        cache.clear()
+
+    def tearDown(self):
+        self.settings.disable()
+        self.cache_dir.cleanup()
+
+    # 正常系：2回目以降はキャッシュから返され、元画像を取得し直さないか
+    @patch('news_app.services.thumbnail.fetch_image')
+    def test_uses_disk_cache(self, mock_fetch):
+        mock_fetch.return_value = make_image_bytes(800, 600)
+
+        first = get_thumbnail("https://example.com/image.png", 240)
+        second = get_thumbnail("https://example.com/image.png", 240)
+
+        self.assertEqual(first, second)
+        mock_fetch.assert_called_once()
+
+    # 異常系：取得に失敗した画像は None を返し、しばらく取得し直さないか
+    @patch('news_app.services.thumbnail.fetch_image', return_value=None)
+    def test_failure_is_cached(self, mock_fetch):
+        self.assertIsNone(get_thumbnail("https://example.com/missing.png", 240))
+        self.assertIsNone(get_thumbnail("https://example.com/missing.png", 240))
+        mock_fetch.assert_called_once()
@@ -0,0 +1,132 @@
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+from ..services.ingest import FeedList
+from ..services.feeds import FEEDS
+from ..services.snapshots import FeedSnapshot, encode_snapshot
+from ..services.timeline import build_timeline_items, get_sorted_items, merge_page, prepare_timeline_page, encode_cursor, decode_cursor
+
+
+# build_timeline_items関数のテスト
+class TestBuildTimelineItems(unittest.TestCase):
+    # 正常系：新しい順に並び、日時がない記事は最後になるか
+    def test_sorted_newest_first(self):
+        articles = [
+            ["古い記事", "2025/03/28", "タグ", "https://example.com/1", ""],
+            ["日時なし", "", "タグ", "https://example.com/2", ""],
+            ["新しい記事", "2025/03/30", "タグ", "https://example.com/3", ""],
+        ]
+        items = build_timeline_items("nikkei_med", articles)
+        self.assertEqual([item.article[0] for item in items], ["新しい記事", "古い記事", "日時なし"])
+        self.assertEqual(items[0].source, "nikkei_med")
+
+
+# バージョンを持つ記事一覧（保存済みのファイルの記事一覧の代わり）
+class VersionedList(list):
+    def __init__(self, articles, version):
+        super().__init__(articles)
+        self.version = version
+
+
+# get_sorted_items関数のテスト
+class TestGetSortedItems(unittest.TestCase):
+    # 正常系：取り込んだ記事一覧は、取り込むときに変換した日時を使い、作ったリストを使い回すか
+    def test_uses_published_from_ingest(self):
+        published = datetime(2025, 3, 30, 3, 0, tzinfo=timezone.utc)
+        articles = FeedList([["記事", "変換できない日付", "https://example.com", ""]], "v1", [published])
+
+        with patch("news_app.services.timeline.parse_datetime_jst") as mock_parse:
+            first = get_sorted_items("test_source", articles)
+            self.assertIs(get_sorted_items("test_source", articles), first)
+        mock_parse.assert_not_called()
+        self.assertEqual(first[0].published_at, published)
+
+    # 正常系：保存済みのファイルの記事一覧は、同じバージョンなら前回作ったリストを使い回すか
+    def test_reuses_list_for_same_version(self):
+        articles = [["記事", "2025/03/30 12:00", "https://example.com", ""]]
+        first = get_sorted_items("test_source", VersionedList(articles, "v1"))
+        self.assertIs(get_sorted_items("test_source", VersionedList(articles, "v1")), first)
+        self.assertIsNot(get_sorted_items("test_source", VersionedList(articles, "v2")), first)
+
+
+    # 正常系：保存済みのファイルの記事一覧は、リストを作らずにファイルの新しい順の表から取り出すか
+    def test_snapshot_is_read_lazily(self):
+        articles = [
+            ["古い記事", "2025/03/28", "タグ", "https://example.com/1", ""],
+            ["日時なし", "", "タグ", "https://example.com/2", ""],
+            ["新しい記事", "2025/03/30 12:00", "タグ", "https://example.com/3", ""],
+        ]
+        snapshot = FeedSnapshot(encode_snapshot(articles, "v1"))
+
+        with patch("news_app.services.timeline.build_timeline_items") as mock_build:
+            items = get_sorted_items("nikkei_med", snapshot)
+        mock_build.assert_not_called()
+        self.assertNotIsInstance(items, list)
+
+        self.assertEqual(len(items), 3)
+        self.assertEqual([item.article[0] for item in items], ["新しい記事", "古い記事", "日時なし"])
+        self.assertEqual(items[0].published_at, datetime(2025, 3, 30, 3, 0, tzinfo=timezone.utc))
+        self.assertIsNone(items[-1].published_at)
+
+        page, cursor = merge_page({"nikkei_med": items}, {"nikkei_med": 1}, 1)
+        self.assertEqual(page[0].article, articles[0])
+        self.assertEqual(cursor, {"nikkei_med": 2})
+
+
+# prepare_timeline_page関数のテスト
+class TestPrepareTimelinePage(unittest.TestCase):
+    # 正常系：加工が必要なソースの記事だけを、ページの分だけまとめて加工するか
+    def test_prepares_only_page_items(self):
+        mock_translate = MagicMock(side_effect=lambda articles, deadline=None: [[f"訳:{article[0]}", *article[1:]] for article in articles])
+        items = build_timeline_items("foreign_news", [["Title", "2025-03-29T12:00:00Z", "", "", ""]]) + \
+            build_timeline_items("zizi_med", [["記事", "2025/03/29 22:00", "", ""]])
+
+        with patch.dict(FEEDS["foreign_news"], {"prepare_page": mock_translate}):
+            page = prepare_timeline_page(items)
+
+        self.assertEqual([item.article[0] for item in page], ["訳:Title", "記事"])
+        mock_translate.assert_called_once()
+
+
+# merge_page関数のテスト
+class TestMergePage(unittest.TestCase):
+    def setUp(self):
+        # 異なる日付形式のソースを混ぜる（UTCの12:00は日本時間の21:00）
+        self.sorted_lists = {
+            "foreign_news": build_timeline_items("foreign_news", [
+                ["UTC 12:00", "2025-03-29T12:00:00Z", "", "", ""],
+                ["UTC 00:00", "2025-03-29T00:00:00Z", "", "", ""],
+            ]),
+            "zizi_med": build_timeline_items("zizi_med", [
+                ["JST 22:00", "2025/03/29 22:00", "", ""],
+                ["JST 20:00", "2025/03/29 20:00", "", ""],
+                ["JST 08:00", "2025/03/29 08:00", "", ""],
+            ]),
+        }
+
+    # 正常系：タイムゾーンをそろえて、全体で新しい順に並ぶか
+    def test_merges_across_sources(self):
+        page, cursor = merge_page(self.sorted_lists, {}, 10)
+        self.assertEqual([item.article[0] for item in page],
+                         ["JST 22:00", "UTC 12:00", "JST 20:00", "UTC 00:00", "JST 08:00"])
+        self.assertEqual(cursor, {"foreign_news": 2, "zizi_med": 3})
+
+    # 正常系：cursor を使って、続きのページを取り出せるか
+    def test_next_page_from_cursor(self):
+        first, cursor = merge_page(self.sorted_lists, {}, 2)
+        second, cursor = merge_page(self.sorted_lists, decode_cursor(encode_cursor(cursor)), 2)
+        self.assertEqual([item.article[0] for item in first], ["JST 22:00", "UTC 12:00"])
+        self.assertEqual([item.article[0] for item in second], ["JST 20:00", "UTC 00:00"])
+
+
+# encode_cursor / decode_cursor関数のテスト
+class TestCursor(unittest.TestCase):
+    # 正常系：文字列にして戻すと元の cursor になるか（0 の位置は省略される）
+    def test_round_trip(self):
+        self.assertEqual(encode_cursor({"nikkei_med": 3, "zizi_med": 0}), "nikkei_med:3")
+        self.assertEqual(decode_cursor("nikkei_med:3,zizi_med:7"), {"nikkei_med": 3, "zizi_med": 7})
+
+    # 異常系：不正な値は無視されるか
+    def test_invalid_values_ignored(self):
+        self.assertEqual(decode_cursor("nikkei_med:abc,:3,zizi_med"), {})
+        self.assertEqual(decode_cursor(None), {})
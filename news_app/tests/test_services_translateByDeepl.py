@@ -1,11 +1,12 @@
-import unittest
 from unittest.mock import patch, MagicMock
+from django.test import TestCase
 from ..services.translateByDeepl import Translator
+from ..services.deadline import Deadline
 import deepl
 import os
 
-# translate_text関数のテスト
-class TestTranslateText(unittest.TestCase):
+# translate_text関数のテスト（利用量はデータベースに記録される）
+class TestTranslateText(TestCase):
     # 正常系：英語リストが正しく翻訳される 
     @patch('news_app.services.translateByDeepl.os.getenv', return_value='dummy_auth_key')
     @patch('news_app.services.translateByDeepl.deepl.Translator')
@@ -35,7 +36,7 @@ class TestTranslateText(unittest.TestCase):
         self.assertEqual(result, [])
     
     
-    # 異常系3：DeepL APIで例外が発生した場合、空リストを返す
+    # 異常系3：DeepL APIで例外が発生した場合、原文のリストを返す
     @patch('news_app.services.translateByDeepl.os.getenv', return_value='dummy_auth_key')
     @patch('news_app.services.translateByDeepl.deepl.Translator')
     def test_translate_text_deepl_exception(self, mock_translator_class, mock_getenv):
@@ -45,4 +46,129 @@ class TestTranslateText(unittest.TestCase):
 
         translator = Translator()
         result = translator.translate_text(['Hello'])
-        self.assertEqual(result, [])  # エラーが起きても空リストを返す
\ No newline at end of file
+        self.assertEqual(result, ['Hello'])  # エラーが起きても原文のリストを返す
+
+    # 異常系4：APIキーが設定されていない場合、空リストを返す
+    @patch('news_app.services.translateByDeepl.os.getenv', return_value=None)
+    def test_translate_text_without_auth_key(self, mock_getenv):
+        translator = Translator()
+        result = translator.translate_text(['Hello'])
+        self.assertEqual(result, [])
+
+    # 正常系：同じ文は1回だけ翻訳され、元の順番で返される
+    @patch('news_app.services.translateByDeepl.os.getenv', return_value='dummy_auth_key')
+    @patch('news_app.services.translateByDeepl.deepl.Translator')
+    def test_translate_text_deduplicates(self, mock_translator_class, mock_getenv):
+        mock_translator = MagicMock()
+        mock_translator.translate_text.side_effect = lambda texts, target_lang: [MagicMock(text=f"JA:{t}") for t in texts]
+        mock_translator_class.return_value = mock_translator
+
+        translator = Translator()
+        result = translator.translate_text(['Hello', 'World', 'Hello', ''])
+
+        self.assertEqual(result, ['JA:Hello', 'JA:World', 'JA:Hello', ''])
+        mock_translator.translate_text.assert_called_once_with(['Hello', 'World'], target_lang="JA")
+
+    # 正常系：件数の上限で分割して翻訳し、クライアントは使い回される
+    @patch('news_app.services.translateByDeepl.os.getenv', return_value='dummy_auth_key')
+    @patch('news_app.services.translateByDeepl.deepl.Translator')
+    def test_translate_text_splits_into_chunks(self, mock_translator_class, mock_getenv):
+        mock_translator = MagicMock()
+        mock_translator.translate_text.side_effect = lambda texts, target_lang: [MagicMock(text=f"JA:{t}") for t in texts]
+        mock_translator_class.return_value = mock_translator
+
+        translator = Translator()
+        translator.max_chunk_size = 2
+        texts = [f"Title {i}" for i in range(5)]
+        result = translator.translate_text(texts)
+        translator.translate_text(['Again'])
+
+        self.assertEqual(result, [f"JA:Title {i}" for i in range(5)])
+        self.assertEqual(mock_translator.translate_text.call_count, 4)  # 2件 + 2件 + 1件、2回目の呼び出しで1回
+        mock_translator_class.assert_called_once()  # クライアントは1回だけ作られる
+
+    # 異常系5：一部のまとまりだけ失敗した場合、そのまとまりだけ原文のまま返す
+    @patch('news_app.services.translateByDeepl.os.getenv', return_value='dummy_auth_key')
+    @patch('news_app.services.translateByDeepl.deepl.Translator')
+    def test_translate_text_partial_failure(self, mock_translator_class, mock_getenv):
+        def translate(texts, target_lang):
+            if 'Bad' in texts:
+                raise deepl.DeepLException("API error")
+            return [MagicMock(text=f"JA:{t}") for t in texts]
+
+        mock_translator = MagicMock()
+        mock_translator.translate_text.side_effect = translate
+        mock_translator_class.return_value = mock_translator
+
+        translator = Translator()
+        translator.max_chunk_size = 1
+        result = translator.translate_text(['Good', 'Bad'])
+
+        self.assertEqual(result, ['JA:Good', 'Bad'])
+
+    # 正常系：translate_many は翻訳できた文だけを返し、訳文が原文と同じ文も含むか
+    @patch('news_app.services.translateByDeepl.os.getenv', return_value='dummy_auth_key')
+    @patch('news_app.services.translateByDeepl.deepl.Translator')
+    def test_translate_many_returns_only_successes(self, mock_translator_class, mock_getenv):
+        def translate(texts, target_lang):
+            if 'Bad' in texts:
+                raise deepl.DeepLException("API error")
+            return [MagicMock(text=t if t == 'COVID-19' else f"JA:{t}") for t in texts]
+
+        mock_translator = MagicMock()
+        mock_translator.translate_text.side_effect = translate
+        mock_translator_class.return_value = mock_translator
+
+        translator = Translator()
+        translator.max_chunk_size = 1
+        result = translator.translate_many(['Good', 'COVID-19', 'Bad'])
+
+        self.assertEqual(result, {'Good': 'JA:Good', 'COVID-19': 'COVID-19'})
+
+    # 異常系6：混雑エラーの場合は再試行される
+    @patch('news_app.services.translateByDeepl.time.sleep')
+    @patch('news_app.services.translateByDeepl.os.getenv', return_value='dummy_auth_key')
+    @patch('news_app.services.translateByDeepl.deepl.Translator')
+    def test_translate_text_retries_on_too_many_requests(self, mock_translator_class, mock_getenv, mock_sleep):
+        mock_translator = MagicMock()
+        mock_translator.translate_text.side_effect = [
+            deepl.TooManyRequestsException("429"),
+            [MagicMock(text='こんにちは')],
+        ]
+        mock_translator_class.return_value = mock_translator
+
+        translator = Translator()
+        result = translator.translate_text(['Hello'])
+
+        self.assertEqual(result, ['こんにちは'])
+        self.assertEqual(mock_translator.translate_text.call_count, 2)
+        mock_sleep.assert_called_once()
+
+    # 異常系7：制限時間を過ぎている場合は翻訳せず、原文を返す
+    @patch('news_app.services.translateByDeepl.os.getenv', return_value='dummy_auth_key')
+    @patch('news_app.services.translateByDeepl.deepl.Translator')
+    def test_translate_text_after_deadline(self, mock_translator_class, mock_getenv):
+        mock_translator = MagicMock()
+        mock_translator_class.return_value = mock_translator
+
+        translator = Translator()
+        result = translator.translate_text(['Hello'], deadline=Deadline(0))
+
+        self.assertEqual(result, ['Hello'])
+        mock_translator.translate_text.assert_not_called()
+
+    # 異常系8：再試行の待ち時間が残り時間を超える場合は再試行しない
+    @patch('news_app.services.translateByDeepl.time.sleep')
+    @patch('news_app.services.translateByDeepl.os.getenv', return_value='dummy_auth_key')
+    @patch('news_app.services.translateByDeepl.deepl.Translator')
+    def test_translate_text_does_not_retry_past_deadline(self, mock_translator_class, mock_getenv, mock_sleep):
+        mock_translator = MagicMock()
+        mock_translator.translate_text.side_effect = deepl.TooManyRequestsException("429")
+        mock_translator_class.return_value = mock_translator
+
+        translator = Translator()
+        result = translator.translate_text(['Hello'], deadline=Deadline(1.5))
+
+        self.assertEqual(result, ['Hello'])
+        self.assertEqual(mock_translator.translate_text.call_count, 1)
+        mock_sleep.assert_not_called()
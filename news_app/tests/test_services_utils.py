@@ -1,6 +1,8 @@
 import unittest
-from ..services.utils import convert_utc_to_jst, parse_date
-from datetime import date
+from unittest.mock import patch
+from django.test import override_settings
+from ..services.utils import convert_utc_to_jst, parse_date, parse_datetime_jst, upstream_url, normalize_url, url_hash, JST
+from datetime import date, datetime, timezone
 
 # convert_utc_to_jst関数のテスト
 class TestConvertUtcToJst(unittest.TestCase):
@@ -58,4 +60,67 @@ class TestParseDate(unittest.TestCase):
     # 異常系4：空文字が渡されたとき → None を返す
     def test_parse_date_with_empty_string(self):
         result = parse_date("")
-        self.assertIsNone(result)
\ No newline at end of file
+        self.assertIsNone(result)
+
+
+# parse_datetime_jst関数のテスト
+class TestParseDatetimeJst(unittest.TestCase):
+
+    # 正常系：NewsAPIの形式（UTC）はUTCのdatetimeになり、日本時間と比較できるか
+    def test_parse_iso_utc(self):
+        result = parse_datetime_jst("2025-03-29T12:00:00Z")
+        self.assertEqual(result, datetime(2025, 3, 29, 12, 0, tzinfo=timezone.utc))
+        self.assertEqual(result, datetime(2025, 3, 29, 21, 0, tzinfo=JST))
+
+    # 正常系：時刻ありの形式は日本時間として扱われるか
+    def test_parse_datetime_string(self):
+        self.assertEqual(parse_datetime_jst("2025/03/29 21:00"), datetime(2025, 3, 29, 21, 0, tzinfo=JST))
+
+    # 正常系：日付のみの形式は日本時間の0時として扱われるか
+    def test_parse_date_only_string(self):
+        self.assertEqual(parse_datetime_jst("2025/03/29"), datetime(2025, 3, 29, 0, 0, tzinfo=JST))
+
+    # 異常系：変換できない値は None になるか
+    def test_parse_invalid_values(self):
+        self.assertIsNone(parse_datetime_jst("March 29, 2025"))
+        self.assertIsNone(parse_datetime_jst(""))
+        self.assertIsNone(parse_datetime_jst(None))
+
+
+# upstream_url関数のテスト
+class TestUpstreamUrl(unittest.TestCase):
+
+    # 正常系：疑似サーバーが設定されていなければ、URLはそのまま
+    @override_settings(UPSTREAM_SIMULATOR_URL=None)
+    def test_upstream_url_without_simulator(self):
+        self.assertEqual(upstream_url("https://medical.jiji.com/news/?c=medical"), "https://medical.jiji.com/news/?c=medical")
+
+    # 正常系：疑似サーバーが設定されていれば、ホスト名をパスに入れたURLになる
+    @override_settings(UPSTREAM_SIMULATOR_URL='http://127.0.0.1:8765/')
+    def test_upstream_url_with_simulator(self):
+        self.assertEqual(upstream_url("https://medical.jiji.com/news/?c=medical"), "http://127.0.0.1:8765/medical.jiji.com/news/?c=medical")
+        self.assertEqual(upstream_url("https://medical.jiji.com"), "http://127.0.0.1:8765/medical.jiji.com")
+
+
+# normalize_url関数・url_hash関数のテスト
+class TestNormalizeUrl(unittest.TestCase):
+
+    # 正常系：同じ記事を指すURLが同じ文字列になるか
+    def test_normalize_url(self):
+        self.assertEqual(
+            normalize_url("HTTPS://Example.com:443/news/1?utm_source=x&b=2&a=1#top"),
+            "https://example.com/news/1?a=1&b=2",
+        )
+        self.assertEqual(normalize_url("https://example.com"), "https://example.com/")
+        self.assertEqual(normalize_url("http://example.com:8080/a?fbclid=1"), "http://example.com:8080/a")
+
+    # 正常系：記事を区別するパラメータは残るか
+    def test_normalize_url_keeps_identifying_params(self):
+        self.assertNotEqual(url_hash("https://example.com/?p=1"), url_hash("https://example.com/?p=2"))
+
+    # 正常系：ハッシュは固定長で、URLがない場合は None
+    def test_url_hash(self):
+        self.assertEqual(len(url_hash("https://example.com/" + "a" * 1000)), 32)
+        self.assertEqual(url_hash("https://example.com/a?utm_medium=mail"), url_hash("https://EXAMPLE.com/a"))
+        self.assertIsNone(url_hash(""))
+        self.assertIsNone(url_hash(None))
@@ -0,0 +1,111 @@
+import unittest
+from django.test import override_settings
+import json
+import os
+import tempfile
+import threading
+import deepl
+import requests
+from ..simulator.server import SimulatorConfig, make_server
+from ..simulator.loadgen import percentile, summarize
+from ..simulator.recorder import trim_html, trim_json, write_fixture
+from ..services.sources import get_plan
+from ..services.scrapingNikkeiMed import parse_article_info
+from ..services.scrapingZiziMed import parse_articles
+from ..services.utils import upstream_url
+
+
+# 疑似サーバーのテスト
+class TestUpstreamSimulator(unittest.TestCase):
+    def start_server(self, config=None):
+        server = make_server(port=0, config=config)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    # 正常系：記録済みのHTMLが返され、各サイトの解析処理で記事を取り出せるか
+    def test_serves_recorded_pages(self):
+        simulator_url = self.start_server()
+
+        with override_settings(UPSTREAM_SIMULATOR_URL=simulator_url):
+            nikkei = requests.get(upstream_url('https://medical.nikkeibp.co.jp/inc/all/article/'), timeout=5)
+            zizi = requests.get(upstream_url('https://medical.jiji.com/news/?c=medical'), timeout=5)
+            news = requests.get(upstream_url('https://newsapi.org/v2/everything'), timeout=5)
+
+        self.assertEqual(len(parse_article_info(nikkei.text)), 20)
+        self.assertEqual(len(parse_articles(zizi.text)), 20)
+        self.assertEqual(len(news.json()["articles"]), 20)
+
+    # 正常系：疑似DeepLで翻訳・利用量の取得ができるか（deeplライブラリからそのまま使える）
+    def test_fake_deepl(self):
+        simulator_url = self.start_server()
+
+        with override_settings(UPSTREAM_SIMULATOR_URL=simulator_url):
+            client = deepl.Translator("dummy-key", server_url=upstream_url("https://api.deepl.com/"))
+
+        results = client.translate_text(["Hello", "World"], target_lang="JA")
+        self.assertEqual([r.text for r in results], ["[JA] Hello", "[JA] World"])
+        self.assertEqual(client.get_usage().character.count, 10)
+
+    # 異常系：エラーの割合を1にすると、すべて503が返るか
+    def test_error_injection(self):
+        simulator_url = self.start_server(SimulatorConfig(error_rate=1.0))
+
+        response = requests.get(f"{simulator_url}/medical.jiji.com/news/", timeout=5)
+        self.assertEqual(response.status_code, 503)
+
+
+# 負荷試験の集計のテスト
+class TestLoadTestSummary(unittest.TestCase):
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile(values, 100), 100)
+        self.assertIsNone(percentile([], 50))
+
+    def test_summarize(self):
+        results = [("/a/", 200, 0.1), ("/a/", 500, 0.3), ("/b/", None, 1.0), ("/b/", 200, 0.2)]
+
+        summary = summarize(results, elapsed=2.0)
+
+        self.assertEqual(summary["全体"]["requests"], 4)
+        self.assertEqual(summary["全体"]["errors"], 2)  # 500 と接続エラー
+        self.assertEqual(summary["全体"]["throughput"], 2.0)
+        self.assertEqual(summary["/a/"]["max"], 0.3)
+
+
+# 記録したページ（fixtures）の保存処理のテスト
+class TestRecorder(unittest.TestCase):
+    # 正常系：解析に関係しない要素を取り除き、記事一覧の構造は残すか
+    def test_trim_html(self):
+        html = """<html><head><meta charset="utf-8"><meta name="description" content="x"><script>var a = 1;</script>
+        <style>p {}</style></head><body><!-- 広告 --><ul><li class="articleTextList__item"><a href="/news/1">
+        <p class="articleTextList__title">タイトル</p><span class="articleTextList__date">2025/03/30 09:00</span></a></li></ul>
+        <noscript>JavaScriptを有効にしてください</noscript></body></html>"""
+
+        trimmed = trim_html(html)
+
+        for removed in ("<script", "<style", "<noscript", "広告", "description"):
+            self.assertNotIn(removed, trimmed)
+        self.assertIn('<meta charset="utf-8"/>', trimmed)
+        self.assertEqual(get_plan("zizi_med").extract(trimmed), get_plan("zizi_med").extract(html))
+
+    # 正常系：NewsAPI のレスポンスは先頭の記事だけを残すか
+    def test_trim_json(self):
+        data = json.loads(trim_json(json.dumps({"status": "ok", "articles": [{"title": str(i)} for i in range(80)]})))
+        self.assertEqual(data["status"], "ok")
+        self.assertEqual(len(data["articles"]), 50)
+
+    # 正常系：記録したURLを先頭に付けて保存するか
+    def test_write_fixture(self):
+        with tempfile.TemporaryDirectory() as fixtures_dir:
+            path = write_fixture("zizi_med.html", "https://medical.jiji.com/news/?c=medical", "<p>本文</p>", fixtures_dir)
+            with open(path, encoding="utf-8") as f:
+                body = f.read()
+
+        self.assertEqual(os.path.basename(path), "zizi_med.html")
+        self.assertTrue(body.startswith("<!-- 記録: https://medical.jiji.com/news/?c=medical"))
+        self.assertIn("<p>本文</p>", body)
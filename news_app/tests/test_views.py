@@ -1,11 +1,14 @@
 from django.test import TestCase, Client, RequestFactory
 from django.urls import reverse
 from django.contrib.auth import get_user_model
-from news_app.models import Article
+from news_app.models import Article, FeedItem, ReadState
+from news_app.services.readstate import mark_read, register_items
 from news_app.views import OnlyYouMixin
 from django.http import Http404
-from unittest.mock import patch
-from news_app.views import ForeignNewsView
+from unittest.mock import patch, ANY
+from news_app.views import ForeignNewsView, FeedPageMixin, ConditionalPageMixin
+from news_app import urls as news_app_urls
+from news_app.services.feeds import FEEDS
 from django.contrib.sessions.middleware import SessionMiddleware
 from django.utils.http import urlencode
 from datetime import datetime, date
@@ -13,6 +16,15 @@ from urllib.parse import quote
 from django.contrib.auth.models import AnonymousUser
 from django.core.exceptions import PermissionDenied
 from django.contrib.messages import get_messages
+from django.test import override_settings
+from news_app.services.snapshots import write_snapshot
+from news_app.services.export import export_feed
+import re
+import tempfile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from news_app.services.ingest import clear_recent
+from news_app.services.invalidation import publish
 
 
 
@@ -99,6 +111,30 @@ class OnlyYouMixinTests(TestCase):
         with self.assertRaises(PermissionDenied):
             mixin.handle_no_permission()
 
+# FeedPageMixin・ConditionalPageMixin を使うビューのテスト
+class MixinHookTests(TestCase):
+    # URLに登録されているビューのクラスのうち、cls のサブクラスのもの
+    def registered_views(self, cls):
+        views = [getattr(pattern.callback, "view_class", None) for pattern in news_app_urls.urlpatterns]
+        return [view for view in views if view is not None and issubclass(view, cls)]
+
+    # 正常系：記事一覧のビューは、ソース名と記事一覧の取得（get_article_list）を実装しているか
+    def test_feed_views_override_hooks(self):
+        views = self.registered_views(FeedPageMixin)
+        self.assertEqual({view.feed_name for view in views}, set(FEEDS))
+        for view_class in views:
+            view = view_class()
+            self.assertIsNot(type(view).get_article_list, FeedPageMixin.get_article_list, view_class.__name__)
+
+    # 正常系：ETag を使うビューは、ETag の元になる値（get_etag_parts）を実装しているか
+    def test_conditional_views_override_hooks(self):
+        views = self.registered_views(ConditionalPageMixin)
+        self.assertGreater(len(views), len(FEEDS))  # 記事一覧のビューとお気に入り一覧
+        for view_class in views:
+            view = view_class()
+            self.assertIsNot(type(view).get_etag_parts, ConditionalPageMixin.get_etag_parts, view_class.__name__)
+
+
 # IndexView のテスト 
 class IndexViewTests(TestCase):
 
@@ -113,6 +149,7 @@ class IndexViewTests(TestCase):
 class ForeignNewsViewTests(TestCase):
     # sessionを使うので、RequestFactoryを使ってリクエストを作成する。
     def setUp(self):
+        clear_recent()  # 前のテストで取り込んだ結果を使わない
         self.factory = RequestFactory()
         self.user = get_user_model().objects.create_user(username='user', password='pass')
 
@@ -138,7 +175,7 @@ class ForeignNewsViewTests(TestCase):
 
     #正常系：セッションにデータがなければAPIを呼び、セッションに保存されるか
     @patch("news_app.views.fetch_news_from_api")
-    @patch("news_app.views.convert_utc_to_jst", side_effect=lambda dt: "JST:" + dt)
+    @patch("news_app.services.ingest.convert_utc_to_jst", side_effect=lambda dt: "JST:" + dt)
     def test_fetches_from_api_on_first_access(self, mock_convert, mock_fetch):
         mock_fetch.return_value = [
             ["Title", "2025-03-30T12:00:00Z", "Source", "https://example.com", "https://img.jpg"]
@@ -178,7 +215,7 @@ class ForeignNewsViewTests(TestCase):
 
     #正常系： ページネーションが正しく機能しているか
     @patch("news_app.views.fetch_news_from_api")
-    @patch("news_app.views.convert_utc_to_jst", side_effect=lambda dt: dt)
+    @patch("news_app.services.ingest.convert_utc_to_jst", side_effect=lambda dt: dt)
     def test_context_contains_page_obj(self, mock_convert, mock_fetch):
         mock_fetch.return_value = [
             ["Title", "2025-03-30T12:00:00Z", "Source", "https://example.com", "https://img.jpg"]
@@ -198,7 +235,7 @@ class ForeignNewsViewTests(TestCase):
 
     #正常系：convert_utc_to_jst()がすべての記事に対して呼ばれているか（=ループ内で正しく動いてるか）
     @patch("news_app.views.fetch_news_from_api")
-    @patch("news_app.views.convert_utc_to_jst")
+    @patch("news_app.services.ingest.convert_utc_to_jst")
     def test_date_conversion_is_applied(self, mock_convert, mock_fetch):
         mock_fetch.return_value = [
             ["Title", "2025-03-30T12:00:00Z", "Source", "https://example.com", "https://img.jpg"],
@@ -227,9 +264,34 @@ class ForeignNewsViewTests(TestCase):
         self.assertEqual(mock_convert.call_args_list[2][0][0], "2025-03-30T14:00:00Z")
 
 
+    #正常系：タイトルは表示するページの記事だけ翻訳されるか
+    @patch("news_app.views.translate_article_titles")
+    @patch("news_app.views.fetch_news_from_api")
+    @patch("news_app.services.ingest.convert_utc_to_jst", side_effect=lambda dt: dt)
+    def test_translates_only_requested_page(self, mock_convert, mock_fetch, mock_translate):
+        mock_fetch.return_value = [
+            [f"Title {i}", "2025-03-30T12:00:00Z", "Source", f"https://example.com/{i}", ""] for i in range(15)
+        ]
+        mock_translate.side_effect = lambda articles, deadline=None: [["JA:" + a[0], *a[1:]] for a in articles]
+
+        request = self.factory.get('/foreign_news/?page=2')
+        request.user = self.user
+        self.add_session_to_request(request)
+
+        view = ForeignNewsView()
+        view.request = request
+        page_obj = view.get_context_data()["page_obj"]
+
+        mock_fetch.assert_called_once_with(translate=False, deadline=ANY)  # 取得時には翻訳しない
+        self.assertEqual(len(mock_translate.call_args[0][0]), 5)  # 2ページ目の5件だけ翻訳する
+        self.assertEqual(page_obj.object_list[0][0], "JA:Title 10")
+        self.assertEqual(request.session["foreign_news_data"][10][0], "Title 10")  # セッションには原文のまま保存される
+
+
 # NikkeiMedView のテスト
 class NikkeiMedViewTests(TestCase):
     def setUp(self):
+        clear_recent()  # 前のテストで取り込んだ結果を使わない
         # get_user_model() でユーザーモデルを取得してユーザー作成
         self.user = get_user_model().objects.create_user(username='user', password='pass')
         self.client.login(username='user', password='pass')
@@ -244,7 +306,7 @@ class NikkeiMedViewTests(TestCase):
     # 正常系1：ページネーションが正しく機能しているか
     @patch('news_app.views.scraping_NikkeiMed')
     def test_view_returns_200_with_articles(self, mock_scraping):
-        mock_scraping.return_value = [{'title': f'記事{i}', 'url': f'https://example.com/article{i}'} for i in range(15)]
+        mock_scraping.return_value = [[f'記事{i}', '2025/03/30', 'タグ', f'https://example.com/article{i}', ''] for i in range(15)]
 
         response = self.client.get(reverse('news_app:nikkei_med'))
 
@@ -254,17 +316,37 @@ class NikkeiMedViewTests(TestCase):
         # 10件表示されるページネーションの確認(1ページ目)
         self.assertEqual(len(response.context_data['page_obj']), 10)
 
+    # 正常系：refresh_feeds が共有した記事一覧（FeedVersion）があれば、スクレイピングせずに表示するか
+    @patch('news_app.views.scraping_NikkeiMed')
+    def test_view_uses_shared_feed(self, mock_scraping):
+        publish("nikkei_med", "v1", [["共有された記事", "2025/03/30", "タグ", "https://example.com/shared", ""]])
+
+        response = self.client.get(reverse('news_app:nikkei_med'))
+
+        self.assertContains(response, "共有された記事")
+        mock_scraping.assert_not_called()
+
     # 正常系2：ページネーションが正しく機能しているか
     @patch('news_app.views.scraping_NikkeiMed')
     def test_view_pagination_second_page(self, mock_scraping):
         # 15件あるので、2ページ目は5件になるはず
-        mock_scraping.return_value = [{'title': f'記事{i}', 'url': f'https://example.com/article{i}'} for i in range(15)]
+        mock_scraping.return_value = [[f'記事{i}', '2025/03/30', 'タグ', f'https://example.com/article{i}', ''] for i in range(15)]
 
         response = self.client.get(reverse('news_app:nikkei_med') + '?page=2')
 
         self.assertEqual(response.status_code, 200)
         self.assertEqual(len(response.context_data['page_obj']), 5)
 
+    # 正常系：取り込み（ingest）を通して記事が登録され、未読の印が付くか
+    @patch('news_app.views.scraping_NikkeiMed')
+    def test_articles_are_ingested(self, mock_scraping):
+        mock_scraping.return_value = [[f'記事{i}', '2025/03/30', 'タグ', f'https://example.com/article{i}', ''] for i in range(15)]
+
+        response = self.client.get(reverse('news_app:nikkei_med'))
+
+        self.assertEqual(FeedItem.objects.filter(source="nikkei_med").count(), 15)
+        self.assertEqual(len(response.context_data['unread']), 10)
+
     # 異常系：スクレイピングが失敗した場合(空のリストを返すとき)、ビューがクラッシュしないか
     @patch("news_app.views.scraping_NikkeiMed")
     def test_view_handles_scraping_failure(self, mock_scraping):
@@ -277,9 +359,53 @@ class NikkeiMedViewTests(TestCase):
         self.assertEqual(len(response.context_data["page_obj"]), 0)  # 空の記事リストになってる
 
 
+    # 正常系：記事一覧が変わっていなければ、2回目は 304 が返されるか
+    @patch('news_app.views.scraping_NikkeiMed')
+    def test_returns_304_when_etag_matches(self, mock_scraping):
+        mock_scraping.return_value = [["記事", "2025/03/30", "タグ", "https://example.com/1", ""]]
+
+        response = self.client.get(reverse('news_app:nikkei_med'))
+        etag = response["ETag"]
+
+        response2 = self.client.get(reverse('news_app:nikkei_med'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response2.status_code, 304)
+        self.assertEqual(response2.content, b"")
+
+        # ページ番号が違えば ETag も変わる
+        response3 = self.client.get(reverse('news_app:nikkei_med') + '?page=2', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response3.status_code, 200)
+
+    # 正常系：記事一覧が変わった場合は、同じETagを送っても 200 で描画されるか
+    @patch('news_app.views.scraping_NikkeiMed')
+    def test_returns_200_when_articles_change(self, mock_scraping):
+        mock_scraping.return_value = [["記事", "2025/03/30", "タグ", "https://example.com/1", ""]]
+        etag = self.client.get(reverse('news_app:nikkei_med'))["ETag"]
+
+        mock_scraping.return_value = [["新しい記事", "2025/03/31", "タグ", "https://example.com/2", ""]]
+        response = self.client.get(reverse('news_app:nikkei_med'), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "新しい記事")
+
+    # 正常系：記事一覧のファイルがあれば、スクレイピングせずにファイルの記事を表示するか
+    @patch('news_app.views.scraping_NikkeiMed')
+    def test_uses_snapshot_file(self, mock_scraping):
+        articles = [[f"保存済みの記事{i}", "2025/03/30", "タグ", f"https://example.com/{i}", ""] for i in range(15)]
+        with tempfile.TemporaryDirectory() as snapshot_dir:
+            with override_settings(FEED_SNAPSHOT_DIR=snapshot_dir):
+                write_snapshot("nikkei_med", articles, "v1")
+                response = self.client.get(reverse('news_app:nikkei_med') + '?page=2')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "保存済みの記事10")
+        self.assertEqual(len(response.context_data['page_obj']), 5)
+        mock_scraping.assert_not_called()
+
+
 # ZiziMedView のテスト
 class ZiziMedViewTests(TestCase):
     def setUp(self):
+        clear_recent()  # 前のテストで取り込んだ結果を使わない
         self.user = get_user_model().objects.create_user(username="user", password="pass")
         self.client.login(username="user", password="pass") # ログイン
 
@@ -293,7 +419,7 @@ class ZiziMedViewTests(TestCase):
     @patch("news_app.views.scraping_ZiziMed")
     def test_view_returns_200_with_articles(self, mock_scraping):
         mock_scraping.return_value = [
-            {"title": f"記事{i}", "url": f"https://example.com/article{i}"} for i in range(15)
+            [f"記事{i}", "2025/03/30 12:00", f"https://example.com/article{i}", ""] for i in range(15)
         ]
 
         response = self.client.get(reverse("news_app:zizi_med"))
@@ -307,7 +433,7 @@ class ZiziMedViewTests(TestCase):
     @patch("news_app.views.scraping_ZiziMed")
     def test_view_pagination_second_page(self, mock_scraping):
         mock_scraping.return_value = [
-            {"title": f"記事{i}", "url": f"https://example.com/article{i}"} for i in range(15)
+            [f"記事{i}", "2025/03/30 12:00", f"https://example.com/article{i}", ""] for i in range(15)
         ]
         
         response = self.client.get(reverse("news_app:zizi_med") + "?page=2")
@@ -329,6 +455,374 @@ class ZiziMedViewTests(TestCase):
         self.assertEqual(len(response.context["page_obj"]), 0)
 
 
+# FeedStreamView のテスト
+class FeedStreamViewTests(TestCase):
+    def setUp(self):
+        clear_recent()  # 前のテストで取り込んだ結果を使わない
+        # 記事は別のスレッドで取り込まれる。テストのデータベース（トランザクション中の SQLite）には
+        # 別のスレッドから書き込めないので、記事の登録は test_services_readstate で確認する
+        patcher = patch("news_app.services.ingest.register_items", return_value=0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = get_user_model().objects.create_user(username="user", password="pass")
+        self.client.login(username="user", password="pass")
+
+    # 異常系：ログインしていないとき、ログインページへリダイレクトされるか
+    def test_redirect_if_not_logged_in(self):
+        self.client.logout()
+        response = self.client.get(reverse("news_app:feed_stream"))
+        self.assertRedirects(response, f"/accounts/login/?next={reverse('news_app:feed_stream')}")
+
+    # 正常系：外枠が最初に送られ、その後に各ソースの記事が送られるか
+    @patch("news_app.services.feeds.fetch_news_from_api", return_value=[])
+    @patch("news_app.services.feeds.scraping_ZiziMed")
+    @patch("news_app.services.feeds.scraping_NikkeiMed")
+    def test_streams_shell_then_sections(self, mock_nikkei, mock_zizi, mock_api):
+        mock_nikkei.return_value = [["日経の記事", "2025/03/30", "タグ", "https://example.com/n", ""]]
+        mock_zizi.return_value = [["時事の記事", "2025/03/30 12:00", "https://example.com/z", ""]]
+
+        response = self.client.get(reverse("news_app:feed_stream"))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+
+        chunks = [chunk.decode("utf-8") for chunk in response.streaming_content]
+
+        # 最初のチャンクはナビゲーションを含む外枠で、記事はまだ含まない
+        self.assertIn("ユーザー名：user", chunks[0])
+        self.assertNotIn("日経の記事", chunks[0])
+
+        # 記事はストリーミングで後から送られる
+        body = "".join(chunks)
+        self.assertIn("日経の記事", body)
+        self.assertIn("時事の記事", body)
+        self.assertIn("記事を取得できませんでした。", body)  # 国際ニュースは空
+        self.assertTrue(body.rstrip().endswith("</html>"))
+
+
+# 記事一覧のページで、保存済みの記事に「保存済み」が表示されるかのテスト
+class SavedBadgeTests(TestCase):
+    def setUp(self):
+        clear_recent()  # 前のテストで取り込んだ結果を使わない
+        self.user = get_user_model().objects.create_user(username="user", password="pass")
+        self.client.login(username="user", password="pass")
+        self.articles = [[f"記事{i}", "2025/03/30", "タグ", f"https://example.com/{i}", ""] for i in range(15)]
+        self.saved = Article.objects.create(user=self.user, article_title="記事1", article_url="https://example.com/1")
+
+    # 正常系：保存済みの記事には編集のリンクが、それ以外には登録のリンクが表示されるか
+    @patch("news_app.views.scraping_NikkeiMed")
+    def test_shows_saved_badge(self, mock_scraping):
+        mock_scraping.return_value = self.articles
+
+        response = self.client.get(reverse("news_app:nikkei_med"))
+
+        self.assertEqual(response.context_data["saved"], {"https://example.com/1": self.saved.pk})
+        self.assertContains(response, "保存済み", count=1)
+        self.assertContains(response, reverse("news_app:update_favorite", args=[self.saved.pk]))
+        self.assertContains(response, "お気に入りに登録", count=9)
+
+    # 正常系：保存済みかどうかの確認は、記事の件数に関係なく1ページにつき1回のクエリか
+    @patch("news_app.views.scraping_NikkeiMed")
+    def test_one_query_per_page(self, mock_scraping):
+        mock_scraping.return_value = self.articles
+        self.client.get(reverse("news_app:nikkei_med"))  # セッション・ユーザーの読み込みを揃えておく
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse("news_app:nikkei_med"))
+
+        lookups = [q["sql"] for q in queries.captured_queries if '"news_app_article"' in q["sql"] and "url_hash" in q["sql"]]
+        self.assertEqual(len(lookups), 1)
+
+    # 正常系：お気に入りを登録すると ETag が変わり、古い表示が 304 で使われないか
+    @patch("news_app.views.scraping_NikkeiMed")
+    def test_etag_changes_after_saving(self, mock_scraping):
+        mock_scraping.return_value = self.articles
+        etag = self.client.get(reverse("news_app:nikkei_med"))["ETag"]
+
+        Article.objects.create(user=self.user, article_title="記事2", article_url="https://example.com/2")
+        response = self.client.get(reverse("news_app:nikkei_med"), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "保存済み", count=2)
+
+    # 正常系：保存済み・未読の記事があるページも書き出し済みのページを使い、ユーザーごとの表示を差し込むか
+    @patch("news_app.views.scraping_NikkeiMed")
+    def test_exported_page_with_user_state(self, mock_scraping):
+        mock_scraping.return_value = self.articles
+        register_items("nikkei_med", [(article[3], article[0]) for article in self.articles])
+        with tempfile.TemporaryDirectory() as export_dir, override_settings(FEED_EXPORT_DIR=export_dir):
+            export_feed("nikkei_med", self.articles, "v1", "partials/nikkei_med_articles.html")
+
+            response = self.client.get(reverse("news_app:nikkei_med"))
+            self.assertIn("exported_page", response.context_data)
+            mock_scraping.assert_not_called()
+            self.assertContains(response, "保存済み", count=1)
+            self.assertContains(response, reverse("news_app:update_favorite", args=[self.saved.pk]))
+            self.assertContains(response, "お気に入りに登録", count=9)
+            self.assertContains(response, 'class="unread-badge"', count=10)
+            self.assertContains(response, "このページを既読にする", count=1)
+            self.assertNotContains(response, "user-state:")
+
+            # 既読にすると ETag が変わり、未読の印が消える
+            etag = response["ETag"]
+            mark_read(self.user, FeedItem.objects.values_list("pk", flat=True))
+            response = self.client.get(reverse("news_app:nikkei_med"), HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn("exported_page", response.context_data)
+            self.assertNotContains(response, 'class="unread-badge"')
+            self.assertNotContains(response, "このページを既読にする")
+
+    # 正常系：タイムラインでも、保存済みの記事に「保存済み」が表示されるか
+    @patch("news_app.services.feeds.fetch_news_from_api", return_value=[])
+    @patch("news_app.services.feeds.scraping_ZiziMed", return_value=[])
+    @patch("news_app.services.feeds.scraping_NikkeiMed")
+    @patch("news_app.services.ingest.register_items", return_value=0)  # 別のスレッドからは書き込めないため（TimelineViewTests を参照）
+    def test_timeline_shows_saved_badge(self, mock_register, mock_nikkei, mock_zizi, mock_api):
+        mock_nikkei.return_value = self.articles
+
+        response = self.client.get(reverse("news_app:timeline"))
+
+        self.assertEqual(response.context["saved"], {"https://example.com/1": self.saved.pk})
+        self.assertContains(response, "保存済み", count=1)
+
+
+# 未読の表示と、ページの記事をまとめて既読にするビューのテスト
+class ReadStateViewTests(TestCase):
+    def setUp(self):
+        clear_recent()  # 前のテストで取り込んだ結果を使わない
+        self.user = get_user_model().objects.create_user(username="user", password="pass")
+        self.client.login(username="user", password="pass")
+        self.articles = [[f"記事{i}", "2025/03/30", "タグ", f"https://example.com/{i}", ""] for i in range(15)]
+        register_items("nikkei_med", [(article[3], article[0]) for article in self.articles])
+
+    # 正常系：未読の記事に印が付き、「このページを既読にする」で印が消えるか
+    @patch("news_app.views.scraping_NikkeiMed")
+    def test_mark_page_read(self, mock_scraping):
+        mock_scraping.return_value = self.articles
+        response = self.client.get(reverse("news_app:nikkei_med"))
+        etag = response["ETag"]
+
+        self.assertContains(response, "unread-badge", count=10)
+        self.assertContains(response, "このページを既読にする")
+        unread_ids = list(response.context_data["unread"].values())
+
+        response = self.client.post(reverse("news_app:mark_read"), {"item": unread_ids, "next": reverse("news_app:nikkei_med")})
+        self.assertRedirects(response, reverse("news_app:nikkei_med"), fetch_redirect_response=False)
+
+        response = self.client.get(reverse("news_app:nikkei_med"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "10件の記事を既読にしました。")
+        self.assertNotContains(response, "unread-badge")
+        self.assertNotContains(response, "このページを既読にする")
+
+        # 2ページ目は未読のまま
+        response = self.client.get(reverse("news_app:nikkei_med") + "?page=2")
+        self.assertContains(response, "unread-badge", count=5)
+
+    # 異常系：外部のURLには戻らず、不正な id は無視するか
+    def test_rejects_external_next_and_invalid_ids(self):
+        response = self.client.post(reverse("news_app:mark_read"), {"item": ["abc", "999999"], "next": "https://evil.example.com/"})
+
+        self.assertRedirects(response, reverse("news_app:index"), fetch_redirect_response=False)
+        self.assertFalse(ReadState.objects.exists())
+
+    # 異常系：ログインしていないときは、ログインページへリダイレクトされるか
+    def test_requires_login(self):
+        self.client.logout()
+        response = self.client.post(reverse("news_app:mark_read"), {"item": ["1"]})
+        self.assertRedirects(response, f"/accounts/login/?next={reverse('news_app:mark_read')}", fetch_redirect_response=False)
+
+
+# クリック・ページの表示の記録のテスト
+@override_settings(ANALYTICS_ENABLED=True)
+class AnalyticsViewTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="user", password="pass")
+        self.client.login(username="user", password="pass")
+        patcher = patch("news_app.views.event_buffer")
+        self.mock_buffer = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    # 正常系：「記事を読む」のリンクはクリックを記録してから記事へ転送するか
+    @patch("news_app.views.scraping_NikkeiMed")
+    def test_click_is_recorded_and_redirected(self, mock_scraping):
+        mock_scraping.return_value = [["記事", "2025/03/30", "タグ", "https://example.com/1", ""]]
+        response = self.client.get(reverse("news_app:nikkei_med"))
+        link = re.search(r'href="(/go/\?t=[^"]+)"', response.content.decode("utf-8")).group(1)
+
+        response = self.client.get(link)
+
+        self.assertRedirects(response, "https://example.com/1", fetch_redirect_response=False)
+        self.mock_buffer.record.assert_any_call("click", "nikkei_med", ANY, "https://example.com/1")
+
+    # 正常系：ニュース一覧の表示が記録されるか
+    @patch("news_app.views.scraping_NikkeiMed", return_value=[])
+    def test_page_view_is_recorded(self, mock_scraping):
+        self.client.get(reverse("news_app:nikkei_med"))
+        self.mock_buffer.record.assert_called_once_with("view", "nikkei_med", ANY)
+
+    # 異常系：署名が不正なリンクは転送しないか
+    def test_invalid_link(self):
+        response = self.client.get(reverse("news_app:track_click"), {"t": "https://evil.example.com/"})
+        self.assertEqual(response.status_code, 404)
+        self.mock_buffer.record.assert_not_called()
+
+
+# TimelineView のテスト
+class TimelineViewTests(TestCase):
+    def setUp(self):
+        clear_recent()  # 前のテストで取り込んだ結果を使わない
+        # 記事は別のスレッドで取り込まれる。テストのデータベース（トランザクション中の SQLite）には
+        # 別のスレッドから書き込めないので、記事の登録は test_services_readstate で確認する
+        patcher = patch("news_app.services.ingest.register_items", return_value=0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = get_user_model().objects.create_user(username="user", password="pass")
+        self.client.login(username="user", password="pass")
+
+    # 異常系：ログインしていないとき、ログインページへリダイレクトされるか
+    def test_redirect_if_not_logged_in(self):
+        self.client.logout()
+        response = self.client.get(reverse("news_app:timeline"))
+        self.assertRedirects(response, f"/accounts/login/?next={reverse('news_app:timeline')}")
+
+    # 正常系：すべてのソースの記事が新しい順に並び、続きのページへ進めるか
+    @patch("news_app.services.feeds.fetch_news_from_api", return_value=[])
+    @patch("news_app.services.feeds.scraping_ZiziMed")
+    @patch("news_app.services.feeds.scraping_NikkeiMed")
+    def test_merged_newest_first_with_cursor(self, mock_nikkei, mock_zizi, mock_api):
+        mock_nikkei.return_value = [[f"日経{i}", f"2025/03/{10 + i:02d}", "タグ", f"https://example.com/n{i}", ""] for i in range(15)]
+        mock_zizi.return_value = [[f"時事{i}", f"2025/03/{10 + i:02d} 12:00", f"https://example.com/z{i}", ""] for i in range(15)]
+
+        response = self.client.get(reverse("news_app:timeline"))
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, "timeline.html")
+
+        entries = response.context["entries"]
+        self.assertEqual(len(entries), 20)
+        # 同じ日なら時刻ありの時事（12:00）が、日経（0:00扱い）より先になる
+        self.assertEqual([entry["articles"][0][0] for entry in entries[:3]], ["時事14", "日経14", "時事13"])
+        self.assertEqual(entries[0]["label"], "時事メディカルのニュース")
+
+        response = self.client.get(reverse("news_app:timeline"), {"cursor": response.context["next_cursor"]})
+        entries = response.context["entries"]
+        self.assertEqual(len(entries), 10)
+        self.assertEqual(entries[0]["articles"][0][0], "時事4")
+        self.assertIsNone(response.context["next_cursor"])
+
+
+# FeedExportView と、書き出し済みのページを使うビューのテスト
+class FeedExportViewTests(TestCase):
+    def setUp(self):
+        clear_recent()  # 前のテストで取り込んだ結果を使わない
+        self.user = get_user_model().objects.create_user(username="user", password="pass")
+        self.client.login(username="user", password="pass")
+
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        override = override_settings(FEED_EXPORT_DIR=tmp.name, FEED_EXPORT_ACCEL_PREFIX=None, FEED_EXPORT_SENDFILE=False)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        articles = [[f"書き出し済みの記事{i}", "2025/03/30", "タグ", f"https://example.com/{i}", ""] for i in range(15)]
+        export_feed("nikkei_med", articles, "v1", "partials/nikkei_med_articles.html")
+
+    # 正常系：ソースのページは、スクレイピング・描画をせずに書き出し済みのページを表示するか
+    @patch("news_app.views.scraping_NikkeiMed")
+    def test_feed_page_uses_exported_page(self, mock_scraping):
+        response = self.client.get(reverse("news_app:nikkei_med") + "?page=2")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "書き出し済みの記事10")
+        self.assertContains(response, "ユーザー名：user")
+        self.assertNotIn("page_obj", response.context_data)
+        mock_scraping.assert_not_called()
+
+    # 正常系：書き出したファイルがそのまま配信され、2回目は 304 になるか
+    def test_serves_exported_json(self):
+        response = self.client.get(reverse("news_app:feed_export", args=["nikkei_med", 2, "json"]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/json; charset=utf-8")
+        self.assertIn("書き出し済みの記事10", b"".join(response.streaming_content).decode("utf-8"))
+
+        response = self.client.get(reverse("news_app:feed_export", args=["nikkei_med", 2, "json"]), HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+    # 正常系：X-Accel-Redirect が設定されていれば、ファイルの送信を nginx に任せるか
+    def test_x_accel_redirect(self):
+        with override_settings(FEED_EXPORT_ACCEL_PREFIX="/_feed_exports/"):
+            response = self.client.get(reverse("news_app:feed_export", args=["nikkei_med", 1, "html"]))
+        self.assertTrue(response["X-Accel-Redirect"].startswith("/_feed_exports/nikkei_med-1-"))
+        self.assertEqual(response.content, b"")
+
+    # 異常系：存在しないページ・ソース・形式は404、ログインしていなければリダイレクトされるか
+    def test_not_found_and_login_required(self):
+        self.assertEqual(self.client.get(reverse("news_app:feed_export", args=["nikkei_med", 3, "html"])).status_code, 404)
+        self.assertEqual(self.client.get(reverse("news_app:feed_export", args=["zizi_med", 1, "html"])).status_code, 404)
+        self.assertEqual(self.client.get(reverse("news_app:feed_export", args=["nikkei_med", 1, "txt"])).status_code, 404)
+
+        self.client.logout()
+        response = self.client.get(reverse("news_app:feed_export", args=["nikkei_med", 1, "html"]))
+        self.assertEqual(response.status_code, 302)
+
+
+# ThumbnailView のテスト
+class ThumbnailViewTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="user", password="pass")
+        self.client.login(username="user", password="pass")
+        self.url = reverse("news_app:thumb") + "?" + urlencode({"url": "https://example.com/image.jpg", "w": "240"})
+
+    # 正常系：サムネイルが長期キャッシュ用のヘッダーとETag付きで返されるか
+    @patch("news_app.views.get_thumbnail", return_value=b"jpeg-bytes")
+    def test_returns_thumbnail_with_cache_headers(self, mock_thumb):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "image/jpeg")
+        self.assertIn("max-age=", response["Cache-Control"])
+        self.assertTrue(response.has_header("ETag"))
+        self.assertEqual(response.content, b"jpeg-bytes")
+
+    # 正常系：ETagが一致する場合は 304 を返すか
+    @patch("news_app.views.get_thumbnail", return_value=b"jpeg-bytes")
+    def test_returns_304_when_etag_matches(self, mock_thumb):
+        etag = self.client.get(self.url)["ETag"]
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+
+    # 異常系：サムネイルを作成できない場合は、指定されたURLへリダイレクトせず代わりの画像を返すか
+    @patch("news_app.views.get_thumbnail", return_value=None)
+    def test_returns_placeholder_on_failure(self, mock_thumb):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "image/jpeg")
+        self.assertFalse(response.has_header("Location"))
+        self.assertNotIn("immutable", response["Cache-Control"])
+
+
+# DeeplUsageView のテスト
+class DeeplUsageViewTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="user", password="pass")
+        self.staff = get_user_model().objects.create_user(username="staff", password="pass", is_staff=True)
+
+    # 異常系：スタッフ以外は403が返るか
+    def test_forbidden_for_non_staff(self):
+        self.client.login(username="user", password="pass")
+        response = self.client.get(reverse("news_app:deepl_usage"))
+        self.assertEqual(response.status_code, 403)
+
+    # 正常系：スタッフには利用量がJSONで返るか
+    def test_returns_summary_for_staff(self):
+        self.client.login(username="staff", password="pass")
+        response = self.client.get(reverse("news_app:deepl_usage"))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("daily_used", response.json())
+        self.assertIn("monthly_budget", response.json())
+
+
 # FavoriteListView のテスト
 
 class FavoriteListViewTests(TestCase):
@@ -379,6 +873,33 @@ class FavoriteListViewTests(TestCase):
         self.assertEqual(len(response2.context["page_obj"]), 1)  # 2ページ目は1件
 
 
+    # 正常系：お気に入りが変わっていなければ 304、更新されれば 200 が返されるか
+    def test_favorite_list_etag(self):
+        article = Article.objects.create(user=self.user, article_title="記事", article_url="https://example.com/1")
+
+        etag = self.client.get(reverse("news_app:favorite_list"))["ETag"]
+        response = self.client.get(reverse("news_app:favorite_list"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        # 削除すると件数が変わるので、ETag が一致しなくなる
+        article.delete()
+        response = self.client.get(reverse("news_app:favorite_list"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    # 正常系：未表示のメッセージがある場合は、ETagが一致しても描画されるか
+    def test_favorite_list_renders_pending_messages(self):
+        etag = self.client.get(reverse("news_app:favorite_list"))["ETag"]
+
+        # お気に入りを追加すると、一覧ページにメッセージが表示される
+        self.client.post(reverse("news_app:add_favorite"), data={
+            "article_title": "記事", "article_url": "https://example.com/1", "published_at": "2025-03-30",
+        })
+        response = self.client.get(reverse("news_app:favorite_list"), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "お気に入り記事を追加しました")
+
+
 # AddFavoriteView のテスト
 class AddFavoriteViewTests(TestCase):
     def setUp(self):
@@ -5,12 +5,20 @@ from django.views.generic import RedirectView
 app_name = "news_app"
 urlpatterns = [
     path("", views.IndexView.as_view(), name="index"),
+    path("feed_stream/", views.FeedStreamView.as_view(), name="feed_stream"),
+    path("timeline/", views.TimelineView.as_view(), name="timeline"),
     path("foreign_news/", views.ForeignNewsView.as_view(), name="foreign_news"),
     path("nikkei_med/", views.NikkeiMedView.as_view(), name="nikkei_med"),
     path("zizi_med/", views.ZiziMedView.as_view(), name="zizi_med"),
+    path("archive/<str:source>/", views.FeedArchiveView.as_view(), name="feed_archive"),
     path("favorite_list/", views.FavoriteListView.as_view(), name="favorite_list"),
     path("add_favorite/", views.AddFavoriteView.as_view(), name="add_favorite"),
     path("update_favorite/<int:pk>/", views.UpdateFavoriteView.as_view(), name="update_favorite"),
     path("delete_favorite/<int:pk>/", views.DeleteFavoriteView.as_view(), name="delete_favorite"),
+    path("go/", views.TrackClickView.as_view(), name="track_click"),
+    path("mark_read/", views.MarkReadView.as_view(), name="mark_read"),
+    path("feeds/<str:source>/<int:page>.<str:fmt>", views.FeedExportView.as_view(), name="feed_export"),
+    path("thumb/", views.ThumbnailView.as_view(), name="thumb"),
+    path("deepl_usage/", views.DeeplUsageView.as_view(), name="deepl_usage"),
     ]
 
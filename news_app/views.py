@@ -3,17 +3,39 @@ from django.views import generic
 from django.core.paginator import Paginator
 from .services.scrapingNikkeiMed import scraping_NikkeiMed
 from .services.scrapingZiziMed import scraping_ZiziMed
-from .services.newsAPI import fetch_news_from_api
-from .services.utils import parse_date, convert_utc_to_jst
+from .services.newsAPI import fetch_news_from_api, translate_article_titles
+from .services.utils import parse_date
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from .models import Article
+from .models import Article, FeedItem, AnalyticsEvent
 from .forms import AddFavoriteForm
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
+from django.utils.http import url_has_allowed_host_and_scheme
 import logging
+import hashlib
+from django.db.models import Count, Max
 from django.contrib import messages
 from datetime import datetime, timezone, timedelta
 from django.shortcuts import get_object_or_404
 from django.contrib.auth.views import redirect_to_login
+from django.http import StreamingHttpResponse, HttpResponse, HttpResponseRedirect, Http404, FileResponse
+from django.conf import settings
+from django.shortcuts import redirect
+from django.utils.cache import get_conditional_response, quote_etag
+from django.template.loader import render_to_string
+from .services.feeds import FEEDS, iter_feeds_as_completed, load_shared_feed, snapshot_version
+from .services.backfill import BACKFILL_SOURCES
+from .services.thumbnail import FAILURE_CACHE_SECONDS, get_thumbnail, make_etag, placeholder_image
+from .services.snapshots import open_snapshot
+from .services.invalidation import local_feed_cache
+from .services.export import apply_user_state, find_exported_page, exported_file_path, read_exported_articles, CONTENT_TYPES as EXPORT_CONTENT_TYPES
+from .services.ingest import ingest, page_urls
+from .services.favorites import saved_article_ids
+from .services.readstate import unread_item_ids, mark_read
+from .services.timeline import get_sorted_items, merge_page, prepare_timeline_page, encode_cursor, decode_cursor
+from .services.deeplUsage import usage_ledger
+from .services.deadline import Deadline
+from .services.analytics import event_buffer, read_tracked_url
+from django.http import JsonResponse
 
 
 logger = logging.getLogger(__name__)
@@ -50,100 +72,460 @@ class OnlyYouMixin(UserPassesTestMixin):
 class IndexView(generic.TemplateView):
     template_name = "index.html"
 
-# 国際ニュースのビュー
-class ForeignNewsView(LoginRequiredMixin, generic.TemplateView):
-    template_name = "foreign_news.html"
+# ETag を使って、内容が変わっていないページには 304 Not Modified を返すミックスイン
+# ETag の元になる値は get_etag_parts() で各ビューが決める。
+# 一致した場合はテンプレートを描画しないので、サーバーの負荷と通信量を減らせる。
+class ConditionalPageMixin:
+
+    # ETag の元になる値のリストを返す（各ビューで実装する）
+    def get_etag_parts(self):
+        raise NotImplementedError
+
+    # ユーザー・ページ番号・未表示のメッセージ数を含めた ETag を作る
+    # ヘッダーにユーザー名、本文にメッセージが表示されるため、これらもETagに含める。
+    def get_etag(self):
+        parts = [
+            self.request.user.pk,
+            self.request.GET.get("page", "1"),
+            len(messages.get_messages(self.request)),  # 数えるだけなので、メッセージは消費されない
+            *self.get_etag_parts(),
+        ]
+        raw = "|".join(str(part) for part in parts)
+        return quote_etag(hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32])
+
+    def get(self, request, *args, **kwargs):
+        etag = self.get_etag()
+
+        # 未表示のメッセージがある場合は、表示させるために必ず描画する
+        response = None
+        if not len(messages.get_messages(request)):
+            response = get_conditional_response(request, etag=etag)
+
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+
+        response["ETag"] = etag
+        # ブラウザにはキャッシュさせつつ、毎回 ETag で確認させる
+        response["Cache-Control"] = "private, no-cache"
+        return response
+
+
+# リクエスト全体の制限時間（デッドライン）を扱う共通の処理
+# 取得・翻訳などの各処理にデッドラインを渡し、リクエストの処理時間が REQUEST_DEADLINE_SECONDS を超えないようにする。
+# 同時実行数の上限を超えて保存済みの記事一覧で表示する場合（AdmissionControlMiddleware）は、
+# 制限時間を0にして、外部サービスに接続しない。
+class DeadlineMixin():
+    admission_group = "feeds"  # 同時実行数を制限するグループ（AdmissionControlMiddleware を参照）
+
+    def get_deadline(self):
+        if not hasattr(self, "_deadline"):
+            seconds = 0 if getattr(self.request, "admission_degraded", False) else settings.REQUEST_DEADLINE_SECONDS
+            self._deadline = Deadline(seconds)
+        return self._deadline
+
+    # 外部サービスに接続せずに表示できるか（すべてのソースの記事一覧が保存済みか）
+    @classmethod
+    def has_cached_content(cls, request):
+        return all(open_snapshot(name) is not None for name in FEEDS)
+
+
+# ページの表示を記録するミックスイン（services/analytics.py のバッファに追加するだけで、DBには書き込まない）
+# GET のリクエストを数える（304 を返す場合も表示として数える）。ログインの確認より後に置く。
+class PageViewMixin():
+    page_view_source = None  # 記録するソース名
+
+    def get_page_view_source(self):
+        return self.page_view_source
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method == "GET":
+            event_buffer.record(AnalyticsEvent.KIND_VIEW, self.get_page_view_source(), request.user)
+        return super().dispatch(request, *args, **kwargs)
+
+
+# ニュース一覧のビューで共通の処理（記事一覧の取得・ページネーション・ETag）
+class FeedPageMixin(PageViewMixin, DeadlineMixin, ConditionalPageMixin):
+    paginate_by = 10  # 1ページに表示する記事数
+    feed_name = None  # ソース名（feeds.FEEDS のキー）
+
+    # 記事一覧を取得する（各ビューで実装する）
+    def get_article_list(self):
+        raise NotImplementedError
+
+    def get_page_view_source(self):
+        return self.feed_name
+
+    # 1回のリクエストの中では、記事一覧の取得は1回だけにする
+    # 保存済みの記事一覧のファイル（FEED_SNAPSHOT_DIR）か、プロセス内のキャッシュか、
+    # refresh_feeds が共有した記事一覧（FeedVersion）があれば、取得せずにそれを使う。
+    def get_cached_article_list(self):
+        if not hasattr(self, "_article_list"):
+            self._article_list = open_snapshot(self.feed_name)
+            if self._article_list is None:
+                self._article_list = local_feed_cache.get(self.feed_name)
+            if self._article_list is None:
+                self._article_list = load_shared_feed(self.feed_name)
+            if self._article_list is None:
+                self._article_list = self.get_article_list()
+                local_feed_cache.set(self.feed_name, self._article_list)
+        return self._article_list
+
+    # 外部サービスに接続せずに表示できるか（書き出し済みのページか、保存済みの記事一覧・キャッシュがあるか）
+    @classmethod
+    def has_cached_content(cls, request):
+        return (find_exported_page(cls.feed_name, request.GET.get("page")) is not None
+                or open_snapshot(cls.feed_name) is not None
+                or local_feed_cache.get(cls.feed_name) is not None)
+
+    # 書き出し済みのページ（FEED_EXPORT_DIR）を返す（ない場合は None）
+    # 書き出したHTMLはどのユーザーにも同じ内容なので、保存済み・未読の記事は書き出したページの記事で調べ、
+    # 表示するときに差し込む（export.apply_user_state を参照）。
+    def get_exported_page(self):
+        if not hasattr(self, "_exported_page"):
+            exported = find_exported_page(self.feed_name, self.request.GET.get("page"))
+            if exported is not None:
+                articles = read_exported_articles(exported)
+                if articles is None:
+                    exported = None
+                else:
+                    self.get_saved(articles)
+                    self.get_unread(articles)
+            self._exported_page = exported
+        return self._exported_page
+
+    # 表示するページの記事のうち、ユーザーが保存済みのもの {記事URL: お気に入りのID}
+    # 記事ごとではなく、1ページ分をまとめて1回のクエリで調べる。
+    def get_saved(self, articles=None):
+        if not hasattr(self, "_saved"):
+            if articles is None:
+                articles = self.get_page_obj().object_list
+            self._saved = saved_article_ids(self.request.user, page_urls(self.feed_name, articles))
+        return self._saved
+
+    # 表示するページの記事のうち、ユーザーがまだ読んでいないもの {記事URL: 記事の id}
+    def get_unread(self, articles=None):
+        if not hasattr(self, "_unread"):
+            if articles is None:
+                articles = self.get_page_obj().object_list
+            self._unread = unread_item_ids(self.request.user, page_urls(self.feed_name, articles))
+        return self._unread
+
+    # ETag には記事一覧のバージョン（内容のハッシュ）と、保存済み・未読の記事を使う
+    # お気に入りの登録・既読にしたときに、古い表示が 304 で使われないようにする。
+    def get_etag_parts(self):
+        exported = self.get_exported_page()
+        if exported:
+            parts = [exported["version"], exported["html"]]
+        else:
+            parts = [snapshot_version(self.get_cached_article_list())]
+        return parts + [
+            snapshot_version(sorted(self.get_saved().items())),
+            snapshot_version(sorted(self.get_unread().items())),
+        ]
+
+    # 表示するページを取得する（1回のリクエストの中では1回だけ作る）
+    def get_page_obj(self):
+        if not hasattr(self, "_page_obj"):
+            # 記事一覧を取得
+            article_list = self.get_cached_article_list()
+
+            # ページネーション処理
+            paginator = Paginator(article_list, self.paginate_by)
+            page_number = self.request.GET.get("page")
+            self._page_obj = paginator.get_page(page_number)
+        return self._page_obj
 
     # テンプレートに記事情報を渡す
+    # 書き出し済みのページがあれば、記事一覧を取得・描画せずにその内容を渡す。
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        exported = self.get_exported_page()
+        if exported:
+            with open(exported_file_path(exported["html"]), encoding="utf-8") as f:
+                context["exported_page"] = apply_user_state(f.read(), self.get_saved(), self.get_unread(), self.request)
+        else:
+            context["page_obj"] = self.get_page_obj()
+            context["saved"] = self.get_saved()
+            context["unread"] = self.get_unread()
+        return context
 
-        # 記事一覧を取得
-        article_list = self.get_foreign_news_data()
-
-        # ページネーション処理（1ページに10記事）
-        paginator = Paginator(article_list, 10)
-        page_number = self.request.GET.get("page")
-        page_obj = paginator.get_page(page_number)
-
-        # テンプレートに渡す
-        context["page_obj"] = page_obj
 
-        return context
-    
+# 国際ニュースのビュー
+class ForeignNewsView(LoginRequiredMixin, FeedPageMixin, generic.TemplateView):
+    template_name = "foreign_news.html"
+    feed_name = "foreign_news"
+
+    def get_article_list(self):
+        return self.get_foreign_news_data()
+
+    # タイトルの翻訳は、表示するページの記事だけ行う
+    # 翻訳結果はタイトルごとに記録されるので、同じ記事を2回翻訳することはない。
+    def get_page_obj(self):
+        page_obj = super().get_page_obj()
+        if not getattr(page_obj, "translated", False):
+            page_obj.object_list = translate_article_titles(list(page_obj.object_list), self.get_deadline())
+            page_obj.translated = True
+        return page_obj
+
+    # セッションに記事一覧が保存されていれば、APIを叩かずに表示できる
+    @classmethod
+    def has_cached_content(cls, request):
+        return "foreign_news_data" in request.session or super().has_cached_content(request)
+
+    # 翻訳済みのタイトルが変わった場合も ETag が変わるようにする
+    def get_etag_parts(self):
+        if self.get_exported_page():
+            return super().get_etag_parts()
+        titles = [article[0] for article in self.get_page_obj().object_list]
+        return super().get_etag_parts() + [snapshot_version(titles)]
 
     # 初回だけAPI取得（セッションに保存）
     # シングルページアプリケーションのように、毎回APIを叩くのではなく、
     # セッションに保存しておくことで、ページ遷移時にAPIを叩かないようにする。
+    # タイトルは翻訳前のまま保存し、表示するときにページ単位で翻訳する。
     def get_foreign_news_data(self):
         # セッションに保存されていない場合はAPIを叩く
         # セッションに保存されている場合は、セッションから取得する。
+        # 制限時間内に取得できなかった場合（0件）は保存せず、次のアクセスでもう一度取得する。
+        # 取り込み（ingest）で、公開日時(article[1])を日本時間に変換し、新しい記事に既読の管理用の id を振る。
         if "foreign_news_data" not in self.request.session:
-            article_list = fetch_news_from_api()
-            
-            # published_at(=article_listの2番目の要素=article[1])を日本時間に変換
-            for article in article_list:
-                article[1] = convert_utc_to_jst(article[1])
+            article_list = ingest(self.feed_name, fetch_news_from_api(translate=False, deadline=self.get_deadline()))
 
+            if not article_list:
+                return article_list
             self.request.session["foreign_news_data"] = article_list
         return self.request.session["foreign_news_data"]
     
 
 
 # 日経メディカルのビュー
-class NikkeiMedView(LoginRequiredMixin, generic.TemplateView):
+class NikkeiMedView(LoginRequiredMixin, FeedPageMixin, generic.TemplateView):
     template_name = "nikkei_med.html"
+    feed_name = "nikkei_med"
 
-    # テンプレートに記事情報を渡す
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
+    # 取り込み（ingest）を通して、新しい記事に既読の管理用の id を振る
+    def get_article_list(self):
+        return ingest(self.feed_name, scraping_NikkeiMed(self.get_deadline()))
+
+# 時事メディカルのビュー
+class ZiziMedView(LoginRequiredMixin, FeedPageMixin, generic.TemplateView):
+    template_name = "zizi_med.html"
+    feed_name = "zizi_med"
 
-        # 記事一覧を取得
-        article_list = scraping_NikkeiMed()
+    def get_article_list(self):
+        return ingest(self.feed_name, scraping_ZiziMed(self.get_deadline()))
 
-        # ページネーション処理（1ページに10記事）
-        paginator = Paginator(article_list, 10)
-        page_number = self.request.GET.get("page")
-        page_obj = paginator.get_page(page_number)
+# 過去の記事の一覧のビュー（backfill_feeds で遡って取り込んだ記事と、取り込んだ記事を公開日時の新しい順に表示する）
+# 例：/archive/nikkei_med/?page=2
+# 公開日時が分からない記事（整形済みの記事を保存する前に登録した記事を含む）は、並べる位置が決まらないので表示しない。
+class FeedArchiveView(LoginRequiredMixin, PageViewMixin, generic.ListView):
+    template_name = "feed_archive.html"
+    page_view_source = "feed_archive"
+    paginate_by = 10
 
-        # テンプレートに渡す
-        context["page_obj"] = page_obj
+    def get_queryset(self):
+        self.source = self.kwargs["source"]
+        if self.source not in BACKFILL_SOURCES:
+            raise Http404("ページが見つかりません。")
+        return (FeedItem.objects.filter(source=self.source, published_at__isnull=False)
+                .order_by("-published_at", "-id").values_list("article", flat=True))
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        urls = page_urls(self.source, context["page_obj"].object_list)
+        context["feed"] = FEEDS[self.source]
+        context["saved"] = saved_article_ids(self.request.user, urls)
+        context["unread"] = unread_item_ids(self.request.user, urls)
         return context
 
-# 時事メディカルのビュー
-class ZiziMedView(LoginRequiredMixin, generic.TemplateView):
-    template_name = "zizi_med.html"
+# すべてのソースのニュースをまとめて表示するビュー
+# ページの外枠（ヘッダー・ナビ）を先に送信し、各ソースの記事は取得できた順に送信する。
+# これにより、一番遅いソースを待たずに最初の記事を表示できる。
+class FeedStreamView(LoginRequiredMixin, PageViewMixin, DeadlineMixin, generic.View):
+    template_name = "feed_stream.html"
+    page_view_source = "feed_stream"
+    section_template_name = "partials/feed_section.html"
+    stream_marker = "<!-- feed-stream -->"
+    articles_per_source = 10  # 各ソースで表示する記事数
+
+    def get(self, request, *args, **kwargs):
+        # 外枠を描画し、記事を差し込む位置で前後に分割する
+        shell = render_to_string(self.template_name, {"stream_marker": self.stream_marker}, request=request)
+        head, tail = shell.split(self.stream_marker, 1)
+
+        response = StreamingHttpResponse(self.stream(head, tail), content_type="text/html; charset=utf-8")
+        # nginx などのリバースプロキシにバッファリングさせず、すぐにクライアントへ送らせる
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    # 外枠の前半 → 取得できたソースから順に記事ブロック → 外枠の後半 の順に送信する
+    def stream(self, head, tail):
+        yield head
+        for name, articles in iter_feeds_as_completed(deadline=self.get_deadline()):
+            articles = articles[:self.articles_per_source]
+            urls = page_urls(name, articles)
+            yield render_to_string(self.section_template_name, {
+                "feed": FEEDS[name],
+                "articles": articles,
+                "saved": saved_article_ids(self.request.user, urls),
+                "unread": unread_item_ids(self.request.user, urls),
+            }, request=self.request)
+        yield tail
+
+# すべてのソースの記事を、公開日時の新しい順にまとめて表示するビュー
+# ソースごとに新しい順に並べたリストをヒープでマージし、1ページ分だけ取り出す。
+# ページ番号の代わりに、各ソースの続きの位置（cursor）をURLで受け渡す。
+class TimelineView(LoginRequiredMixin, PageViewMixin, DeadlineMixin, generic.TemplateView):
+    template_name = "timeline.html"
+    page_view_source = "timeline"
+    paginate_by = 20  # 1ページに表示する記事数
 
-    # テンプレートに記事情報を渡す
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        # 記事一覧を取得
-        article_list = scraping_ZiziMed()
+        # ソースごとの並べ替え済みリスト（取り込んだときに作ったものを使う）
+        # 表示用の加工（タイトルの翻訳など）は、表示するページの記事の分だけ行う
+        deadline = self.get_deadline()
+        fetched = dict(iter_feeds_as_completed(deadline=deadline, raw=True))
+        sorted_lists = {source: get_sorted_items(source, fetched[source]) for source in FEEDS if source in fetched}
+
+        cursor = decode_cursor(self.request.GET.get("cursor"))
+        items, next_cursor = merge_page(sorted_lists, cursor, self.paginate_by)
+        has_next = any(next_cursor[source] < len(sorted_lists[source]) for source in sorted_lists)
+        items = prepare_timeline_page(items, deadline)
+
+        # テンプレートに渡す（記事の表示はソースごとの部分テンプレートを使う）
+        context["entries"] = [{
+            "label": FEEDS[item.source]["label"],
+            "template": FEEDS[item.source]["template"],
+            "articles": [item.article],
+        } for item in items]
+        context["next_cursor"] = encode_cursor(next_cursor) if has_next else None
+        # 保存済み・未読の記事は、ページ全体（すべてのソース）をまとめて調べる
+        urls = [url for item in items for url in page_urls(item.source, [item.article])]
+        context["saved"] = saved_article_ids(self.request.user, urls)
+        context["unread"] = unread_item_ids(self.request.user, urls)
 
-        # ページネーション処理（1ページに10記事）
-        paginator = Paginator(article_list, 10)
-        page_number = self.request.GET.get("page")
-        page_obj = paginator.get_page(page_number)
+        return context
 
-        # テンプレートに渡す
-        context["page_obj"] = page_obj
+# 表示しているページの記事をまとめて既読にするビュー
+# フォームから記事の id（item）を受け取り、既読にしてから元のページに戻る。
+class MarkReadView(LoginRequiredMixin, generic.View):
+    admission_group = "favorites"
+    max_items = 100  # 1回で既読にできる記事の数
 
-        return context
+    def post(self, request, *args, **kwargs):
+        ids = {int(value) for value in request.POST.getlist("item")[:self.max_items] if value.isdigit()}
+        # 取り込んだ記事の id だけを既読にする
+        ids = FeedItem.objects.filter(pk__in=ids).values_list("pk", flat=True) if ids else []
+        added = mark_read(request.user, ids)
+        if added:
+            messages.success(request, f"{added}件の記事を既読にしました。")
+
+        next_url = request.POST.get("next")
+        if not url_has_allowed_host_and_scheme(next_url, allowed_hosts={request.get_host()}, require_https=request.is_secure()):
+            next_url = reverse("news_app:index")
+        return redirect(next_url)
+
+# 「記事を読む」のリンクの転送先（クリックを記録してから記事のページへ転送する）
+# 例：/go/?t=<記事のURLとソース名の署名付きの値>
+# 記録はバッファに追加するだけなので、転送はすぐに返る。
+class TrackClickView(generic.View):
+    def get(self, request, *args, **kwargs):
+        tracked = read_tracked_url(request.GET.get("t", ""))
+        if tracked is None:
+            raise Http404("リンクが不正です。")
+
+        url, source = tracked
+        event_buffer.record(AnalyticsEvent.KIND_CLICK, source, request.user, url)
+        return HttpResponseRedirect(url)
+
+# 書き出し済みのページ（記事一覧のHTML・JSON）を配信するビュー
+# 例：/feeds/nikkei_med/2.html, /feeds/nikkei_med/2.json
+# ログインの確認だけを行い、ファイルの送信はWebサーバーに任せる（設定されている場合）。
+#     FEED_EXPORT_ACCEL_PREFIX: nginx の X-Accel-Redirect
+#     FEED_EXPORT_SENDFILE: X-Sendfile（Apache の mod_xsendfile など）
+class FeedExportView(LoginRequiredMixin, generic.View):
+    def get(self, request, source, page, fmt):
+        exported = find_exported_page(source, page) if source in FEEDS and fmt in EXPORT_CONTENT_TYPES else None
+        if exported is None or exported["number"] != page:
+            raise Http404("ページが見つかりません。")
+
+        # ファイル名には内容のハッシュが含まれているので、それを ETag にする
+        filename = exported[fmt]
+        etag = quote_etag(filename)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            if settings.FEED_EXPORT_ACCEL_PREFIX:
+                response = HttpResponse(content_type=EXPORT_CONTENT_TYPES[fmt])
+                response["X-Accel-Redirect"] = settings.FEED_EXPORT_ACCEL_PREFIX.rstrip("/") + "/" + filename
+            elif settings.FEED_EXPORT_SENDFILE:
+                response = HttpResponse(content_type=EXPORT_CONTENT_TYPES[fmt])
+                response["X-Sendfile"] = exported_file_path(filename)
+            else:
+                response = FileResponse(open(exported_file_path(filename), "rb"), content_type=EXPORT_CONTENT_TYPES[fmt])
+
+        response["ETag"] = etag
+        response["Cache-Control"] = "private, no-cache"
+        return response
+
+# 記事画像のサムネイルを配信するビュー
+# 外部サイトの画像を縮小・キャッシュしたものを返す。例：/thumb/?url=https://...&w=240
+class ThumbnailView(LoginRequiredMixin, generic.View):
+    cache_max_age = 60 * 60 * 24 * 30  # ブラウザにキャッシュさせる期間（30日）
+
+    def get(self, request, *args, **kwargs):
+        url = request.GET.get("url", "")
+        data = get_thumbnail(url, request.GET.get("w"))
+
+        # サムネイルを作成できなかった場合は、代わりの画像を返す
+        # （指定されたURLへはリダイレクトしない。任意のサイトへ転送するのに使われるため）
+        if data is None:
+            response = HttpResponse(placeholder_image(request.GET.get("w")), content_type="image/jpeg")
+            response["Cache-Control"] = f"public, max-age={FAILURE_CACHE_SECONDS}"
+            return response
+
+        # ブラウザが同じ画像を持っている場合は 304 を返す
+        etag = quote_etag(make_etag(data))
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(data, content_type="image/jpeg")
+
+        response["ETag"] = etag
+        response["Cache-Control"] = f"public, max-age={self.cache_max_age}, immutable"
+        return response
+
+# DeepLの利用量を返すビュー（ダッシュボード用、スタッフのみ）
+class DeeplUsageView(LoginRequiredMixin, UserPassesTestMixin, generic.View):
+    raise_exception = True  # スタッフ以外は403を返す
+
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get(self, request, *args, **kwargs):
+        return JsonResponse(usage_ledger.summary())
 
 # お気に入り記事一覧のビュー
-class FavoriteListView(LoginRequiredMixin ,generic.ListView):
+class FavoriteListView(LoginRequiredMixin, ConditionalPageMixin, generic.ListView):
+    admission_group = "favorites"
     model = Article
     template_name = "favorite_list.html"
     paginate_by = 5
 
+    # ETag にはお気に入りの件数と最終更新日時を使う（削除でも件数が変わるので検知できる）
+    def get_etag_parts(self):
+        stats = Article.objects.filter(user=self.request.user).aggregate(
+            count=Count("pk"), last_modified=Max("updated_at")
+        )
+        return [stats["count"], stats["last_modified"]]
+
     def get_queryset(self):
         articles = Article.objects.filter(user=self.request.user).order_by("-created_at")
         return articles
     
 # お気に入り記事追加のビュー
 class AddFavoriteView(LoginRequiredMixin, generic.FormView):
+    admission_group = "favorites"
     model = Article
     template_name = "add_favorite.html"
     form_class = AddFavoriteForm
@@ -186,6 +568,7 @@ class AddFavoriteView(LoginRequiredMixin, generic.FormView):
 
 # お気に入り記事更新のビュー
 class UpdateFavoriteView(LoginRequiredMixin, OnlyYouMixin, generic.UpdateView):
+    admission_group = "favorites"
     model = Article
     template_name = "update_favorite.html"
     form_class = AddFavoriteForm
@@ -204,6 +587,7 @@ class UpdateFavoriteView(LoginRequiredMixin, OnlyYouMixin, generic.UpdateView):
 
 # お気に入り記事削除のビュー
 class DeleteFavoriteView(LoginRequiredMixin, OnlyYouMixin, generic.DeleteView):
+    admission_group = "favorites"
     model = Article
     template_name = "delete_favorite.html"
     success_url = reverse_lazy("news_app:favorite_list")
@@ -62,6 +62,8 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 
     "allauth.account.middleware.AccountMiddleware",
+    "news_app.middleware.MemoryProfileMiddleware",
+    "news_app.middleware.AdmissionControlMiddleware",
 ]
 
 ROOT_URLCONF = "news_app_django.urls"
@@ -234,4 +236,77 @@ MESSAGE_TAGS = {
 }
 
 # メッセージをセッションに保存するためのストレージを指定
-MESSAGE_STORAGE = 'django.contrib.messages.storage.session.SessionStorage'
\ No newline at end of file
+MESSAGE_STORAGE = 'django.contrib.messages.storage.session.SessionStorage'
+
+# サムネイル画像のキャッシュ設定
+THUMB_CACHE_DIR = os.path.join(BASE_DIR, "cache", "thumbs")  # 保存先ディレクトリ
+THUMB_CACHE_MAX_BYTES = 200 * 1024 * 1024                     # キャッシュ全体の上限（200MB）
+
+# DeepL APIの利用量の予算（文字数）。すべてのプロセスで共有する（使った文字数はデータベースに記録する）
+# 制限しない場合は、ここで None を設定する（環境変数では数値だけを指定できる）
+DEEPL_MONTHLY_CHARACTER_BUDGET = int(os.getenv("DEEPL_MONTHLY_CHARACTER_BUDGET", 500000))  # 無料プランの上限
+DEEPL_DAILY_CHARACTER_BUDGET = int(os.getenv("DEEPL_DAILY_CHARACTER_BUDGET", 30000))
+DEEPL_RESERVED_CHARACTERS = 10000   # DeepL側の残り文字数がこれを下回る翻訳は行わない
+DEEPL_USAGE_STUB = os.getenv("DEEPL_USAGE_STUB") == "1"  # 1 の場合、DeepLの利用量APIを呼ばずにローカルの記録を使う
+
+# 外部サービスから取得したページの保存先（未設定なら保存しない）
+UPSTREAM_ARCHIVE_DIR = os.getenv("UPSTREAM_ARCHIVE_DIR") or None
+UPSTREAM_REPLAY = os.getenv("UPSTREAM_REPLAY") == "1"  # 1 の場合、ネットワークに接続せず保存済みのページを使う
+
+# 記事一覧のファイルの保存先（refresh_feeds コマンドで書き出し、各ワーカーが共有して読む）
+# 未設定の場合は、表示のたびに記事を取得する
+FEED_SNAPSHOT_DIR = os.getenv("FEED_SNAPSHOT_DIR") or None
+
+# 描画済みのページの保存先（refresh_feeds コマンドで書き出す）。未設定の場合は、表示のたびに描画する
+FEED_EXPORT_DIR = os.getenv("FEED_EXPORT_DIR") or None
+# 書き出したファイルをWebサーバーに配信させる方法（どちらも未設定なら Django が配信する）
+FEED_EXPORT_ACCEL_PREFIX = os.getenv("FEED_EXPORT_ACCEL_PREFIX") or None  # nginx の internal location（例：/_feed_exports/）
+FEED_EXPORT_SENDFILE = os.getenv("FEED_EXPORT_SENDFILE") == "1"           # 1 の場合、X-Sendfile ヘッダーを使う（Apache など）
+# タイトルの翻訳が必要なソース（国際ニュース）で書き出すページ数。残りのページは表示するときに翻訳する
+FEED_EXPORT_PREPARED_PAGES = int(os.getenv("FEED_EXPORT_PREPARED_PAGES", 3))
+
+# ニュース一覧のリクエスト全体の制限時間（秒）。取得・翻訳はこの時間内に終わらせ、間に合わない翻訳は省略する
+REQUEST_DEADLINE_SECONDS = float(os.getenv("REQUEST_DEADLINE_SECONDS", 8))
+
+# ビューのグループごとの同時実行数の上限（プロセスごと）。上限を超えたリクエストは保存済みの記事一覧で表示するか 503 を返す
+# feeds: 外部サービスから記事を取得するビュー、favorites: お気に入り（DBだけを使うビュー）
+ADMISSION_LIMITS = {
+    "feeds": int(os.getenv("ADMISSION_FEEDS_LIMIT", 4)),
+    "favorites": int(os.getenv("ADMISSION_FAVORITES_LIMIT", 16)),
+}
+ADMISSION_WAIT_SECONDS = 0.05  # 枠が空くのを待つ時間（秒）
+ADMISSION_RETRY_AFTER = 5      # 503 のときに再試行させるまでの時間（秒）
+
+# メモリ使用量の調査（tracemalloc）。1 の場合はすべてのリクエストを調べる（スタッフは ?memprofile=1 で個別に調べられる）
+MEMORY_PROFILE = os.getenv("MEMORY_PROFILE") == "1"
+MEMORY_PROFILE_DIR = os.path.join(BASE_DIR, "cache", "memprofile")  # レポートの保存先
+MEMORY_PROFILE_TOP = 15  # レポートに記録する、確保が増えた箇所の数
+
+# 管理画面で、推定件数がこれを超えるテーブルは正確な件数を数えない（PostgreSQL のみ）
+ADMIN_EXACT_COUNT_LIMIT = 100000
+
+# 記事一覧をプロセス内にキャッシュする期間（秒）。0 の場合はキャッシュしない
+# refresh_feeds で取り込むと全ワーカーに通知されるので、長めにしても新しい記事は数秒以内に表示される（例：600）
+FEED_LOCAL_CACHE_SECONDS = int(os.getenv("FEED_LOCAL_CACHE_SECONDS", 0))
+FEED_INVALIDATION_POLL_SECONDS = 5  # PostgreSQL 以外で、更新を確認する間隔（秒）
+
+# 記事のクリック・ページの表示の記録。1 の場合は記録する（プロセス内にためて、まとめて書き込む）
+# 集計は rollup_analytics コマンドで行う
+ANALYTICS_ENABLED = os.getenv("ANALYTICS_ENABLED") == "1"
+ANALYTICS_BATCH_SIZE = 500      # この件数たまったら書き込む
+ANALYTICS_FLUSH_SECONDS = 5     # 件数に関係なく、この間隔（秒）で書き込む
+ANALYTICS_MAX_BUFFERED = 10000  # ためておく件数の上限（超えた分は捨てる）
+
+# 複数のノードで refresh_feeds を実行する場合の設定（ソースごとに1つのプロセスだけが外部サービスから取得する）
+FEED_REFRESH_MIN_SECONDS = int(os.getenv("FEED_REFRESH_MIN_SECONDS", 60))  # この秒数以内に他のノードが取得した記事一覧は、取得し直さずに使う
+FEED_LEADER_WAIT_SECONDS = 30    # 他のプロセスが取得中の場合に、終わるのを待つ時間（秒）
+FEED_LEADER_LEASE_SECONDS = 300  # PostgreSQL 以外で、取得中のプロセスが止まった場合にロックを引き継ぐまでの時間（秒）
+
+# 過去の記事一覧を遡って取り込む設定（backfill_feeds コマンド。コマンドの引数で変えられる）
+BACKFILL_WORKERS = 4          # ソースごとに並列に取得するページ数
+BACKFILL_RATE_PER_HOST = 2.0  # ホストごとの1秒あたりの取得回数の上限
+BACKFILL_BATCH_SIZE = 1000    # まとめて登録する記事数（登録するたびに進み具合を保存する）
+
+# 負荷試験用の疑似サーバー（python manage.py simulate_upstreams）のURL。設定すると外部サービスの接続先が置き換わる
+# （例：http://127.0.0.1:8765。services/utils.py の upstream_url を参照）
+UPSTREAM_SIMULATOR_URL = os.getenv("UPSTREAM_SIMULATOR_URL") or None